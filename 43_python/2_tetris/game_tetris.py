@@ -1,7 +1,13 @@
 import pygame
 import random
 import asyncio
+import os
 import platform
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop
 
 # Initialize Pygame
 pygame.init()
@@ -41,7 +47,8 @@ SHAPES = [
 ]
 
 # Game variables
-FPS = 60
+FPS = 60  # Render frame cap
+SIM_HZ = 60  # Game logic steps per second (independent of FPS)
 FALL_SPEED = 0.5  # Seconds per fall
 FALL_TICK = 0
 
@@ -68,15 +75,24 @@ class Tetromino:
                                    ( (self.x + j) * BLOCK_SIZE, (self.y + i) * BLOCK_SIZE,
                                      BLOCK_SIZE - 1, BLOCK_SIZE - 1))
 
+    def draw_ghost(self, ghost_y):
+        for i, row in enumerate(self.shape):
+            for j, cell in enumerate(row):
+                if cell:
+                    pygame.draw.rect(screen, self.color,
+                                   ( (self.x + j) * BLOCK_SIZE, (ghost_y + i) * BLOCK_SIZE,
+                                     BLOCK_SIZE - 1, BLOCK_SIZE - 1), 2)
+
 # Game grid
 grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+heights = HeightMap(grid, empty=None)  # Top filled row of each column
 current_piece = Tetromino()
 score = 0
 game_over = False
 
 async def main():
     global current_piece, score, FALL_TICK, game_over
-    clock = pygame.time.Clock()
+    loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
 
     while not game_over:
         # Event handling
@@ -101,23 +117,29 @@ async def main():
                     if check_collision(current_piece, grid):
                         for _ in range(3):  # Rotate back
                             current_piece.rotate()
-
-        # Update piece position
-        FALL_TICK += clock.get_time() / 1000
-        if FALL_TICK >= FALL_SPEED:
-            current_piece.move(0, 1)
-            if check_collision(current_piece, grid):
-                current_piece.move(0, -1)
-                place_piece(current_piece, grid)
-                clear_lines()
-                current_piece = Tetromino()
+                if event.key == pygame.K_SPACE:
+                    current_piece.y = landing_y(current_piece)
+                    FALL_TICK = FALL_SPEED  # Lock on the next step
+
+        # Update piece position in fixed steps
+        for _ in range(loop.advance()):
+            FALL_TICK += loop.step
+            if FALL_TICK >= FALL_SPEED:
+                current_piece.move(0, 1)
                 if check_collision(current_piece, grid):
-                    game_over = True
-            FALL_TICK = 0
+                    current_piece.move(0, -1)
+                    place_piece(current_piece, grid)
+                    clear_lines()
+                    current_piece = Tetromino()
+                    if check_collision(current_piece, grid):
+                        game_over = True
+                        break
+                FALL_TICK -= FALL_SPEED  # Keep the leftover time so falls don't drift
 
         # Draw
         screen.fill(BLACK)
         draw_grid(grid)
+        current_piece.draw_ghost(landing_y(current_piece))
         current_piece.draw()
 
         # Display score
@@ -126,8 +148,7 @@ async def main():
         screen.blit(score_text, (10, 10))
 
         pygame.display.flip()
-        clock.tick(FPS)
-        await asyncio.sleep(1.0 / FPS)
+        await loop.idle_async()
 
 def check_collision(piece, grid):
     for i, row in enumerate(piece.shape):
@@ -143,6 +164,19 @@ def place_piece(piece, grid):
         for j, cell in enumerate(row):
             if cell and piece.y + i >= 0:
                 grid[piece.y + i][piece.x + j] = piece.color
+    heights.lock(shape_cells(piece.shape, piece.x, piece.y))
+
+def landing_y(piece):
+    # Look up the landing row from the column heights: O(piece width)
+    distance = heights.drop_distance(shape_cells(piece.shape, piece.x, piece.y))
+    if distance is None:
+        # Piece is tucked under an overhang, fall back to stepping down row by row
+        start_y = piece.y
+        while not check_collision(piece, grid):
+            piece.y += 1
+        distance = piece.y - 1 - start_y
+        piece.y = start_y
+    return piece.y + distance
 
 def clear_lines():
     global grid, score
@@ -150,6 +184,7 @@ def clear_lines():
     lines_cleared = GRID_HEIGHT - len(new_grid)
     score += lines_cleared * 100
     grid = [[None for _ in range(GRID_WIDTH)] for _ in range(lines_cleared)] + new_grid
+    heights.clear_rows(grid, lines_cleared)
 
 def draw_grid(grid):
     for i, row in enumerate(grid):
@@ -1,7 +1,15 @@
 import pygame
 import random
 import asyncio
+import os
 import platform
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.animation import Animator, RowFlash
+from tetris_common.gravity import Gravity, seconds_table
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop
 
 # Initialize Pygame
 pygame.init()
@@ -42,12 +50,16 @@ SHAPES = [
 ]
 
 # Game variables
-FPS = 60
-BASE_FALL_SPEED = 0.5  # Seconds per fall
-FALL_TICK = 0
+FPS = 60  # Render frame cap
+SIM_HZ = 60  # Game logic steps per second (independent of FPS)
+BASE_FALL_SPEED = 0.5  # Seconds per fall before the level speed-up
+LOCK_DELAY = 0.5  # Seconds a landed piece can still move before it locks
+SOFT_DROP_FACTOR = 20  # Gravity multiplier while DOWN is held
 LEVEL = 1
 score = 0
 game_over = False
+# Same speeds as before the gravity engine (level 1 is about 0.45 s per row)
+LEVEL_TABLE = seconds_table([BASE_FALL_SPEED / (1 + level * 0.1) for level in range(1, 21)])
 
 # Tetromino class
 class Tetromino:
@@ -77,17 +89,35 @@ class Tetromino:
                     pygame.draw.line(screen, WHITE, (x + 2, y + 2), (x + BLOCK_SIZE - 3, y + BLOCK_SIZE - 3), 1)
                     pygame.draw.line(screen, WHITE, (x + BLOCK_SIZE - 3, y + 2), (x + 2, y + BLOCK_SIZE - 3), 1)
 
+    def draw_ghost(self, ghost_y):
+        for i, row in enumerate(self.shape):
+            for j, cell in enumerate(row):
+                if cell:
+                    x, y = (self.x + j) * BLOCK_SIZE, (ghost_y + i) * BLOCK_SIZE
+                    pygame.draw.rect(screen, self.color, (x, y, BLOCK_SIZE - 1, BLOCK_SIZE - 1), 2)
+
+def make_row_surface(color):
+    # One full row of flash cells, rendered once and reused by every line clear
+    surface = pygame.Surface((GRID_WIDTH * BLOCK_SIZE, BLOCK_SIZE))
+    surface.fill(BLACK)
+    for j in range(GRID_WIDTH):
+        pygame.draw.rect(surface, color, (j * BLOCK_SIZE, 0, BLOCK_SIZE - 1, BLOCK_SIZE - 1))
+    return surface
+
+FLASH_FRAMES = [make_row_surface(WHITE), make_row_surface(GRAY)]
+
 # Game grid
 grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+heights = HeightMap(grid, empty=None)  # Top filled row of each column
 current_piece = Tetromino()
 next_piece = Tetromino()
 
 async def main():
-    global current_piece, next_piece, score, FALL_TICK, game_over, LEVEL
-    clock = pygame.time.Clock()
-    clear_animation = False
-    clear_timer = 0
-    clear_lines_list = []
+    global current_piece, next_piece, score, game_over, LEVEL
+    loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
+    # Level speeds come from LEVEL_TABLE (cells per frame)
+    gravity = Gravity(LEVEL_TABLE, lock_delay=LOCK_DELAY, soft_drop_factor=SOFT_DROP_FACTOR)
+    effects = Animator()  # Line clear flashes run alongside the game logic
 
     while True:
         if game_over:
@@ -104,12 +134,18 @@ async def main():
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
                     # Restart game
                     grid[:] = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+                    heights.rebuild(grid)
                     score = 0
                     LEVEL = 1
                     game_over = False
                     current_piece = Tetromino()
                     next_piece = Tetromino()
-            await asyncio.sleep(1.0 / FPS)
+                    gravity.level = LEVEL
+                    gravity.soft_drop = False
+                    gravity.reset()
+                    effects.clear()
+                    loop.reset()
+            await loop.idle_async()
             continue
 
         # Event handling
@@ -117,55 +153,60 @@ async def main():
             if event.type == pygame.QUIT:
                 return
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
+                # After a hard drop the piece stays put until it locks on the next step
+                if event.key == pygame.K_LEFT and not gravity.hard_drop:
                     current_piece.move(-1, 0)
                     if check_collision(current_piece, grid):
                         current_piece.move(1, 0)
-                if event.key == pygame.K_RIGHT:
+                    else:
+                        gravity.on_move()
+                if event.key == pygame.K_RIGHT and not gravity.hard_drop:
                     current_piece.move(1, 0)
                     if check_collision(current_piece, grid):
                         current_piece.move(-1, 0)
+                    else:
+                        gravity.on_move()
                 if event.key == pygame.K_DOWN:
-                    current_piece.move(0, 1)
-                    if check_collision(current_piece, grid):
-                        current_piece.move(0, -1)
-                if event.key == pygame.K_UP:
+                    gravity.soft_drop = True
+                if event.key == pygame.K_UP and not gravity.hard_drop:
                     current_piece.rotate()
                     if check_collision(current_piece, grid):
                         for _ in range(3):
                             current_piece.rotate()
+                    else:
+                        gravity.on_move()
+                if event.key == pygame.K_SPACE and not gravity.hard_drop:
+                    current_piece.y = landing_y(current_piece)
+                    gravity.lock_now()
+            if event.type == pygame.KEYUP and event.key == pygame.K_DOWN:
+                gravity.soft_drop = False
 
-        # Update piece position
-        if not clear_animation:
-            FALL_TICK += clock.get_time() / 1000
-            fall_speed = BASE_FALL_SPEED / (1 + LEVEL * 0.1)  # Increase speed with level
-            if FALL_TICK >= fall_speed:
-                current_piece.move(0, 1)
+        # Update game logic in fixed steps
+        for _ in range(loop.advance()):
+            # Fall as many rows as the level's gravity allows, keeping the fraction
+            rows, lock = gravity.update(loop.step, landing_y(current_piece) - current_piece.y)
+            current_piece.move(0, rows)
+            if lock:
+                place_piece(current_piece, grid)
+                cleared_rows = clear_lines()
+                gravity.level = LEVEL
+                if cleared_rows:
+                    effects.add(RowFlash(cleared_rows, FLASH_FRAMES, BLOCK_SIZE, duration=0.2))
+                current_piece = next_piece
+                next_piece = Tetromino()
+                gravity.reset()
                 if check_collision(current_piece, grid):
-                    current_piece.move(0, -1)
-                    place_piece(current_piece, grid)
-                    clear_lines_list = clear_lines()
-                    if clear_lines_list:
-                        clear_animation = True
-                        clear_timer = 0
-                    else:
-                        current_piece = next_piece
-                        next_piece = Tetromino()
-                        if check_collision(current_piece, grid):
-                            game_over = True
-                FALL_TICK = 0
-
-        # Handle line clear animation
-        if clear_animation:
-            clear_timer += clock.get_time() / 1000
-            if clear_timer >= 0.2:  # Flash for 0.2 seconds
-                clear_animation = False
+                    game_over = True
+                    break
+
+            effects.update(loop.step)
 
         # Draw
         screen.fill(BLACK)
-        draw_grid(grid, clear_animation, clear_lines_list)
-        if not clear_animation:
-            current_piece.draw()
+        draw_grid(grid)
+        effects.draw(screen)
+        current_piece.draw_ghost(landing_y(current_piece))
+        current_piece.draw()
 
         # Draw next piece preview
         font = pygame.font.Font(None, 36)
@@ -180,8 +221,7 @@ async def main():
         screen.blit(level_text, (GRID_WIDTH * BLOCK_SIZE + 10, SCREEN_HEIGHT - 30))
 
         pygame.display.flip()
-        clock.tick(FPS)
-        await asyncio.sleep(1.0 / FPS)
+        await loop.idle_async()
 
 def check_collision(piece, grid):
     for i, row in enumerate(piece.shape):
@@ -197,27 +237,38 @@ def place_piece(piece, grid):
         for j, cell in enumerate(row):
             if cell and piece.y + i >= 0:
                 grid[piece.y + i][piece.x + j] = piece.color
+    heights.lock(shape_cells(piece.shape, piece.x, piece.y))
+
+def landing_y(piece):
+    # Look up the landing row from the column heights: O(piece width)
+    distance = heights.drop_distance(shape_cells(piece.shape, piece.x, piece.y))
+    if distance is None:
+        # Piece is tucked under an overhang, fall back to stepping down row by row
+        start_y = piece.y
+        while not check_collision(piece, grid):
+            piece.y += 1
+        distance = piece.y - 1 - start_y
+        piece.y = start_y
+    return piece.y + distance
 
 def clear_lines():
+    # Returns the indices the full rows had before the grid is compacted
     global grid, score, LEVEL
+    cleared_rows = [i for i, row in enumerate(grid) if all(cell is not None for cell in row)]
     new_grid = [row for row in grid if any(cell is None for cell in row)]
-    lines_cleared = GRID_HEIGHT - len(new_grid)
+    lines_cleared = len(cleared_rows)
     if lines_cleared > 0:
         score += lines_cleared * 100 * LEVEL
         LEVEL = 1 + score // 1000  # Increase level every 1000 points
         grid = [[None for _ in range(GRID_WIDTH)] for _ in range(lines_cleared)] + new_grid
-        return [i for i, row in enumerate(grid) if all(cell is not None for cell in row)]
-    return []
+        heights.clear_rows(grid, lines_cleared)
+    return cleared_rows
 
-def draw_grid(grid, clear_animation, clear_lines_list):
+def draw_grid(grid):
     for i, row in enumerate(grid):
         for j, cell in enumerate(row):
             x, y = j * BLOCK_SIZE, i * BLOCK_SIZE
-            if clear_animation and i in clear_lines_list:
-                # Flash effect for clearing lines
-                color = WHITE if (pygame.time.get_ticks() // 100) % 2 == 0 else GRAY
-                pygame.draw.rect(screen, color, (x, y, BLOCK_SIZE - 1, BLOCK_SIZE - 1))
-            elif cell:
+            if cell:
                 # Draw block with shadow and texture
                 pygame.draw.rect(screen, DARK_GRAY, (x + 2, y + 2, BLOCK_SIZE - 1, BLOCK_SIZE - 1))
                 pygame.draw.rect(screen, cell, (x, y, BLOCK_SIZE - 1, BLOCK_SIZE - 1))
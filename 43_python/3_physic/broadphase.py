@@ -0,0 +1,117 @@
+"""physic2.py의 공-공 충돌 후보를 고르는 균일 격자 공간 해시 (브로드페이즈)
+
+모든 공 쌍을 check_collision으로 검사하면 공 n개에 n(n-1)/2번이라, 공이 수백 개만 넘어도 프레임이 무너집니다.
+여기서는 매 스텝 공 중심을 가장 큰 공의 지름 크기 격자 칸에 넣고, 같은 칸과 이웃 칸에 있는 공끼리만 넘겨줍니다.
+- 칸 크기가 두 공의 반지름 합 이상이므로, 겹칠 수 있는 두 공은 항상 같은 칸이나 바로 옆 칸에 있음
+- 이웃 칸은 오른쪽, 아래쪽 절반(4칸)만 보므로 같은 쌍이 두 번 나오지 않음
+- 칸은 공이 있는 곳만 dict에 만드므로 화면 크기와 상관없이 공 수에 비례하는 시간과 메모리만 씀
+
+사용법: python broadphase.py   (공 수별 한 스텝 시간 측정, 전체 쌍 검사와 비교)
+"""
+import math
+import random
+import time
+
+# 오른쪽, 아래쪽 이웃 칸 (나머지 절반은 그 칸에서 볼 때 이쪽이 이웃이 됨)
+NEIGHBORS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class SpatialHash:
+    def __init__(self, cell_size=None):
+        """cell_size를 주지 않으면 rebuild할 때마다 가장 큰 공의 지름으로 정함"""
+        self.fixed_cell_size = cell_size
+        self.cell_size = cell_size
+        self.cells = {}  # (칸 x, 칸 y) -> 그 칸에 중심이 있는 공 목록
+
+    def rebuild(self, balls):
+        """공들의 지금 위치로 격자를 다시 만듦 (스텝마다 한 번)"""
+        cell_size = self.fixed_cell_size
+        if cell_size is None:
+            cell_size = max((2 * ball.radius for ball in balls), default=1)
+        self.cell_size = cell_size
+        cells = {}
+        for ball in balls:
+            key = (math.floor(ball.x / cell_size), math.floor(ball.y / cell_size))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [ball]
+            else:
+                bucket.append(ball)
+        self.cells = cells
+
+    def pairs(self):
+        """겹칠 수 있는 (공, 공) 쌍, 같은 쌍은 한 번만"""
+        cells = self.cells
+        for (cx, cy), bucket in cells.items():
+            count = len(bucket)
+            for i in range(count):
+                a = bucket[i]
+                for j in range(i + 1, count):
+                    yield a, bucket[j]
+            for dx, dy in NEIGHBORS:
+                other = cells.get((cx + dx, cy + dy))
+                if other is not None:
+                    for a in bucket:
+                        for b in other:
+                            yield a, b
+
+
+def brute_force_pairs(balls):
+    """원래 방식: 모든 공 쌍"""
+    for i in range(len(balls)):
+        for j in range(i + 1, len(balls)):
+            yield balls[i], balls[j]
+
+
+class _BenchBall:
+    __slots__ = ("x", "y", "vx", "vy", "radius")
+
+    def __init__(self, x, y, radius):
+        self.x, self.y = x, y
+        self.vx, self.vy = random.uniform(-2, 2), random.uniform(-2, 2)
+        self.radius = radius
+
+
+def _move(balls, width, height):
+    for ball in balls:
+        ball.x = min(max(ball.x + ball.vx, 0), width)
+        ball.y = min(max(ball.y + ball.vy, 0), height)
+
+
+def _count_hits(pairs):
+    """후보 쌍 중 실제로 겹친 수 (physic2의 check_collision과 같은 거리 검사)"""
+    hits = 0
+    for a, b in pairs:
+        if math.hypot(b.x - a.x, b.y - a.y) < a.radius + b.radius:
+            hits += 1
+    return hits
+
+
+if __name__ == "__main__":
+    # 공의 밀도(화면 중 공이 차지하는 비율)를 일정하게 두고 공 수만 늘림 -> 스텝 시간이 공 수에 비례해야 함
+    RADIUS = 20
+    COVERAGE = 0.1
+    STEPS = 5
+    BRUTE_FORCE_LIMIT = 2000  # 이보다 많으면 전체 쌍 검사는 너무 오래 걸려서 생략
+
+    random.seed(0)
+    grid = SpatialHash()
+    print(f"{'공 수':>6} {'격자(ms)':>10} {'공당(us)':>9} {'전체 쌍(ms)':>12} {'충돌':>6}")
+    for count in (100, 500, 1000, 2000, 5000, 10000):
+        side = math.sqrt(count * math.pi * RADIUS ** 2 / COVERAGE)
+        width, height = side * 10 / 7, side * 7 / 10
+        balls = [_BenchBall(random.uniform(0, width), random.uniform(0, height), RADIUS) for _ in range(count)]
+
+        started = time.perf_counter()
+        for _ in range(STEPS):
+            _move(balls, width, height)
+            grid.rebuild(balls)
+            hits = _count_hits(grid.pairs())
+        grid_time = (time.perf_counter() - started) / STEPS
+
+        brute = "-"
+        if count <= BRUTE_FORCE_LIMIT:
+            started = time.perf_counter()
+            assert _count_hits(brute_force_pairs(balls)) == hits
+            brute = f"{(time.perf_counter() - started) * 1000:.1f}"
+        print(f"{count:6d} {grid_time * 1000:10.2f} {grid_time / count * 1e6:9.2f} {brute:>12} {hits:6d}")
@@ -3,6 +3,8 @@ import sys
 import math
 import random
 
+from broadphase import SpatialHash
+
 # 초기 설정
 pygame.init()
 WIDTH, HEIGHT = 1000, 700
@@ -97,6 +99,7 @@ class Button:
 # 시뮬레이션 함수 및 상태
 balls = []
 paused = False
+grid = SpatialHash()  # 가까운 공끼리만 충돌 검사
 
 def pause_sim():
     global paused
@@ -157,9 +160,9 @@ while running:
     if not paused:
         for ball in balls:
             ball.update()
-        for i in range(len(balls)):
-            for j in range(i + 1, len(balls)):
-                balls[i].check_collision(balls[j])
+        grid.rebuild(balls)
+        for ball, other in grid.pairs():
+            ball.check_collision(other)
 
     for ball in balls:
         ball.draw(screen)
@@ -0,0 +1,147 @@
+"""리듬 게임 오디오: 믹서 설정, 타격음, 오디오 시계, 지연 보정값 저장
+
+노트 위치와 판정은 프레임 수가 아니라 '지금 음악이 몇 ms 재생되었는가'로 계산해야
+프레임이 떨어져도 음악과 어긋나지 않습니다.
+"""
+import json
+import math
+import os
+import platform
+import time
+from array import array
+
+import pygame
+
+# --- 믹서 설정 ---
+# 버퍼가 작을수록 소리가 빨리 나오지만, 너무 작으면 끊김(underrun)이 생김
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = 256  # 샘플 수 (44.1kHz에서 약 6ms), 소리가 끊기면 512나 1024로 늘림
+HIT_CHANNELS = 4    # 타격음 전용으로 예약해 두는 채널 수
+
+LATENCY_FILE = os.path.join(os.path.expanduser("~"), ".beat_latency.json")
+
+
+def init_mixer(buffer=MIXER_BUFFER, frequency=MIXER_FREQUENCY):
+    """작은 버퍼로 믹서를 다시 열고 타격음 채널을 예약, 실제로 열린 (주파수, 버퍼 지연 ms)를 반환
+
+    pygame.init()보다 먼저 불러야 기본 설정(큰 버퍼)으로 한 번 열리는 것을 피할 수 있습니다.
+    """
+    if pygame.mixer.get_init():
+        pygame.mixer.quit()
+    pygame.mixer.pre_init(frequency, -16, 2, buffer)
+    pygame.mixer.init(frequency, -16, 2, buffer)
+    pygame.mixer.set_reserved(HIT_CHANNELS)
+    frequency = pygame.mixer.get_init()[0]
+    return frequency, buffer * 1000 / frequency
+
+
+def make_click(frequency=1500, duration=0.03, volume=0.6):
+    """짧게 감쇠하는 사인파 타격음 (샘플 파일이 없을 때 사용)"""
+    rate, _, channels = pygame.mixer.get_init()
+    count = int(rate * duration)
+    samples = array('h')
+    for i in range(count):
+        value = int(32767 * volume * math.sin(2 * math.pi * frequency * i / rate) * math.exp(-6 * i / count))
+        samples.extend([value] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+class HitSounds:
+    """미리 불러 둔 타격음을 예약 채널에서 돌아가며 재생
+
+    키를 누를 때마다 파일을 읽거나 빈 채널을 찾지 않으므로 누르는 즉시 소리가 납니다.
+    """
+
+    def __init__(self, path=None):
+        if path and os.path.exists(path):
+            self.sound = pygame.mixer.Sound(path)
+        else:
+            self.sound = make_click()
+        self.channels = [pygame.mixer.Channel(i) for i in range(HIT_CHANNELS)]
+        self.next_channel = 0
+
+    def play(self):
+        self.channels[self.next_channel].play(self.sound)
+        self.next_channel = (self.next_channel + 1) % len(self.channels)
+
+
+def load_latency(path=LATENCY_FILE):
+    """이 컴퓨터에 저장된 지연 보정값(ms), 없으면 0"""
+    try:
+        with open(path, 'r') as f:
+            return float(json.load(f).get(platform.node(), 0))
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def save_latency(offset, path=LATENCY_FILE):
+    """지연 보정값을 컴퓨터 이름별로 저장 (같은 파일을 여러 컴퓨터가 써도 섞이지 않음)"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[platform.node()] = round(offset, 1)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+
+def estimate_latency(click_times, tap_times, interval):
+    """박자음 시각과 입력 시각(ms)에서 지연을 추정 -> 중앙값(ms), 입력이 부족하면 None
+
+    입력마다 가장 가까운 박자음과의 차이를 구하고, 박자 간격의 절반 넘게 벗어난 입력은 버립니다.
+    """
+    errors = []
+    for tap in tap_times:
+        nearest = min(click_times, key=lambda click: abs(tap - click), default=None)
+        if nearest is not None and abs(tap - nearest) < interval / 2:
+            errors.append(tap - nearest)
+    if len(errors) < 4:
+        return None
+    errors.sort()
+    return errors[len(errors) // 2]
+
+
+class AudioClock:
+    """음악 재생 위치(ms)를 부드럽게 알려 주는 시계
+
+    pygame.mixer.music.get_pos()는 오디오 버퍼 단위로 띄엄띄엄 바뀌므로, 그 사이는
+    벽시계(perf_counter)로 채우고 get_pos() 값이 바뀔 때마다 오차를 조금씩 줄입니다.
+    offset은 소리가 실제로 스피커에서 나오기까지의 지연(ms)으로, 그만큼 시계를 늦춥니다.
+    """
+
+    SNAP_ERROR = 100  # 이보다 크게 어긋나면 보정하지 않고 바로 맞춤 (ms)
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self.start_wall = None
+        self.correction = 0.0
+        self.last_pos = -1
+        self.last_time = 0.0
+
+    def start(self):
+        """음악 재생(play)과 동시에 호출"""
+        self.start_wall = time.perf_counter()
+        self.correction = 0.0
+        self.last_pos = -1
+        self.last_time = 0.0
+
+    def now(self):
+        """현재 곡 위치(ms), 지연 보정 포함, 뒤로 가지 않음"""
+        if self.start_wall is None:
+            return 0.0
+        estimate = (time.perf_counter() - self.start_wall) * 1000 + self.correction
+
+        pos = pygame.mixer.music.get_pos()
+        if pos >= 0 and pos != self.last_pos:
+            self.last_pos = pos
+            error = pos - estimate
+            if abs(error) > self.SNAP_ERROR:
+                self.correction += error
+            else:
+                self.correction += error * 0.2
+            estimate = (time.perf_counter() - self.start_wall) * 1000 + self.correction
+
+        song_time = max(self.last_time, estimate - self.offset)
+        self.last_time = song_time
+        return song_time
@@ -1,44 +1,62 @@
 import pygame
 import sys
 import os
+import time
+from bisect import bisect_left
+
+from audio import MIXER_BUFFER, AudioClock, HitSounds, estimate_latency, init_mixer, load_latency, save_latency
+from chart import ChartError, load_beatmap
+from judge import DEFAULT_WINDOWS, NO_HOLD, Judge
+from library import Library
+from replay import ReplayRecorder
 
 # --- 초기화 ---
+init_mixer(MIXER_BUFFER)  # pygame.init()보다 먼저 작은 버퍼로 믹서를 엶 (버퍼 크기는 audio.py)
 pygame.init()
-pygame.mixer.init()
 
 # --- 상수 정의 ---
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-FPS = 120  # 더 부드러운 노트 움직임을 위해 FPS를 높게 설정
+FPS = 120  # 더 부드러운 노트 움직임을 위해 FPS를 높게 설정 (노트 위치는 FPS와 무관)
 
 # 색상
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 GRAY = (50, 50, 50)
-LANE_COLORS = [(255, 100, 100), (100, 255, 100), (100, 100, 255), (255, 255, 100)]
+GRAY_TEXT = (150, 150, 150)
+LANE_COLORS = [(255, 100, 100), (100, 255, 100), (100, 100, 255), (255, 255, 100),
+               (255, 100, 255), (100, 255, 255), (255, 160, 60), (200, 200, 255)]
 JUDGEMENT_LINE_COLOR = (200, 200, 200)
 
 # 게임 설정
-LANE_COUNT = 4
-LANE_WIDTH = 100
+LANE_COUNT = 4  # 비트맵에 레인 수가 없을 때 (4~8레인 지원)
+LANE_WIDTH = 100  # 최대 너비, 레인이 많으면 MAX_TOTAL_LANE_WIDTH 안에 들어가도록 좁힘
 LANE_SEPARATOR_WIDTH = 10
-TOTAL_LANE_WIDTH = (LANE_COUNT * LANE_WIDTH) + ((LANE_COUNT - 1) * LANE_SEPARATOR_WIDTH)
-LANE_START_X = (SCREEN_WIDTH - TOTAL_LANE_WIDTH) // 2
+MAX_TOTAL_LANE_WIDTH = 700
 
 JUDGEMENT_LINE_Y = 500
 NOTE_HEIGHT = 20
-NOTE_SPEED = 5  # 1프레임당 이동하는 픽셀 수
-
-# 판정 범위 (판정선과의 거리 기준, 픽셀 단위)
-PERFECT_RANGE = 20
-GREAT_RANGE = 40
-GOOD_RANGE = 60
-
-# 키 매핑 (D, F, J, K)
-KEY_MAPPING = {
-    pygame.K_d: 0,
-    pygame.K_f: 1,
-    pygame.K_j: 2,
-    pygame.K_k: 3
+HOLD_BODY_MARGIN = 20  # 롱노트 몸통은 머리보다 양옆으로 이만큼 좁게
+SCROLL_SPEED = 0.6  # 1ms당 이동하는 픽셀 수 (초당 600픽셀)
+
+# 판정 범위 (노트 시간과 입력 시간의 차이, ms 단위), 리플레이 검증기와 같은 값을 쓰도록 judge.py에서 가져옴
+JUDGEMENT_WINDOWS = DEFAULT_WINDOWS
+PERFECT_WINDOW, GREAT_WINDOW, GOOD_WINDOW = (window for _, window, _ in JUDGEMENT_WINDOWS)
+
+# 오디오 출력 지연 보정 (ms), 소리가 늦게 들리면 값을 키움
+# 시작 화면에서 C를 눌러 측정하면 이 컴퓨터용 값이 저장되고 다음 실행부터 자동으로 불러옴
+audio_offset = load_latency()
+
+# 지연 측정 설정
+CALIBRATION_INTERVAL = 500  # 박자음 간격 (ms)
+CALIBRATION_CLICKS = 16
+
+# 레인 수별 키 배치 (왼쪽 레인부터)
+KEY_LAYOUTS = {
+    4: (pygame.K_d, pygame.K_f, pygame.K_j, pygame.K_k),
+    5: (pygame.K_d, pygame.K_f, pygame.K_SPACE, pygame.K_j, pygame.K_k),
+    6: (pygame.K_s, pygame.K_d, pygame.K_f, pygame.K_j, pygame.K_k, pygame.K_l),
+    7: (pygame.K_s, pygame.K_d, pygame.K_f, pygame.K_SPACE, pygame.K_j, pygame.K_k, pygame.K_l),
+    8: (pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_f, pygame.K_j, pygame.K_k, pygame.K_l, pygame.K_SEMICOLON),
 }
 
 # --- 화면 및 시계 설정 ---
@@ -61,46 +79,208 @@ except FileNotFoundError as e:
     print(f"오류: 애셋 파일({e.filename})을 찾을 수 없습니다. 게임을 종료합니다.")
     sys.exit()
 
-
-# --- 비트맵 로드 함수 ---
-
-
-# --- 비트맵 로드 함수 ---
-def load_beatmap(filename):
-    beatmap = []
-    try:
-        with open(filename, 'r') as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) == 2:
-                    time = int(parts[0])
-                    lane = int(parts[1])
-                    beatmap.append({'time': time, 'lane': lane, 'spawned': False})
-    except FileNotFoundError:
-        print(f"오류: 비트맵 파일 '{filename}'을 찾을 수 없습니다.")
-        return []
-    # 시간을 기준으로 정렬
-    return sorted(beatmap, key=lambda x: x['time'])
+# 타격음 (hit.wav가 없으면 짧은 클릭음을 만들어 씀)
+hit_sounds = HitSounds(os.path.join(os.path.dirname(os.path.abspath(__file__)), "hit.wav"))
+
+
+# --- 레인 배치 ---
+class LaneLayout:
+    """레인 수에 따라 정해지는 레인 위치, 키, 노트 이미지, 배경
+
+    Surface는 레인 수마다 한 번만 만들어 두고(get_layout), 곡을 다시 시작해도 재사용합니다.
+    """
+    def __init__(self, lane_count):
+        self.lane_count = lane_count
+        self.lane_width = min(LANE_WIDTH, (MAX_TOTAL_LANE_WIDTH - (lane_count - 1) * LANE_SEPARATOR_WIDTH) // lane_count)
+        self.total_width = lane_count * self.lane_width + (lane_count - 1) * LANE_SEPARATOR_WIDTH
+        self.start_x = (SCREEN_WIDTH - self.total_width) // 2
+        self.note_width = self.lane_width - 10
+        self.body_width = self.note_width - HOLD_BODY_MARGIN
+        self.key_mapping = {key: lane for lane, key in enumerate(KEY_LAYOUTS[lane_count])}
+        self.key_names = ", ".join(pygame.key.name(key).upper() for key in KEY_LAYOUTS[lane_count])
+
+        # 레인 색마다 노트 이미지를 한 번만 만들어 두고 모든 노트가 같이 씀
+        # 롱노트 몸통은 화면 높이만큼 긴 이미지에서 필요한 길이만 잘라(area) 그림
+        self.note_surfaces = []
+        self.body_surfaces = []
+        for color in LANE_COLORS[:lane_count]:
+            surface = pygame.Surface((self.note_width, NOTE_HEIGHT)).convert()
+            surface.fill(color)
+            self.note_surfaces.append(surface)
+            body = pygame.Surface((self.body_width, SCREEN_HEIGHT)).convert()
+            body.fill([c // 2 for c in color])
+            self.body_surfaces.append(body)
+
+        self.background = self.make_background()
+
+    def lane_x(self, lane):
+        return self.start_x + lane * (self.lane_width + LANE_SEPARATOR_WIDTH)
+
+    def make_background(self):
+        """레인과 판정선처럼 움직이지 않는 부분을 미리 그려 둔 배경"""
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        background.fill(BLACK)
+        for i in range(self.lane_count):
+            pygame.draw.rect(background, GRAY, (self.lane_x(i), 0, self.lane_width, SCREEN_HEIGHT))
+        pygame.draw.line(background, JUDGEMENT_LINE_COLOR, (self.start_x, JUDGEMENT_LINE_Y),
+                         (self.start_x + self.total_width, JUDGEMENT_LINE_Y), 5)
+        return background
+
+LAYOUTS = {}
+
+def get_layout(lane_count):
+    if lane_count not in LAYOUTS:
+        LAYOUTS[lane_count] = LaneLayout(lane_count)
+    return LAYOUTS[lane_count]
 
 # --- 노트 클래스 ---
-class Note(pygame.sprite.Sprite):
-    def __init__(self, lane):
-        super().__init__()
+class Note:
+    __slots__ = ("lane", "time", "end", "held", "image", "rect", "body", "body_rect", "body_area")
+
+    def __init__(self, layout):
+        self.lane = 0
+        self.time = 0
+        self.end = 0
+        self.held = False
+        self.image = layout.note_surfaces[0]
+        self.rect = pygame.Rect(0, 0, layout.note_width, NOTE_HEIGHT)
+        # 롱노트 몸통: 화면에 그릴 위치와, 긴 몸통 이미지에서 잘라 낼 부분
+        self.body = None
+        self.body_rect = pygame.Rect(0, 0, layout.body_width, 0)
+        self.body_area = pygame.Rect(0, 0, layout.body_width, 0)
+
+    def reset(self, layout, lane, time, end):
         self.lane = lane
-
-        note_width = LANE_WIDTH - 10
-        self.image = pygame.Surface([note_width, NOTE_HEIGHT])
-        self.image.fill(LANE_COLORS[lane])
-
-        x_pos = LANE_START_X + lane * (LANE_WIDTH + LANE_SEPARATOR_WIDTH) + 5
-        self.rect = self.image.get_rect(center=(x_pos + note_width // 2, 0))
-        self.speed = NOTE_SPEED
-
-    def update(self):
-        self.rect.y += self.speed
-        # 화면 밖으로 나가면 자동 삭제
-        if self.rect.top > SCREEN_HEIGHT:
-            self.kill()
+        self.time = time  # 판정선에 도달해야 하는 곡 위치 (ms)
+        self.end = end    # 롱노트 끝 (일반 노트는 0)
+        self.held = False
+        self.image = layout.note_surfaces[lane]
+        self.rect.x = layout.lane_x(lane) + 5
+        self.body = layout.body_surfaces[lane] if end else None
+        self.body_rect.x = self.rect.x + HOLD_BODY_MARGIN // 2
+
+    def update(self, song_time):
+        # 프레임마다 더하지 않고 곡 위치로부터 바로 계산하므로 프레임이 떨어져도 음악과 맞음
+        # 누르고 있는 롱노트는 머리가 판정선에 멈춰 있음
+        head_time = max(self.time, song_time) if self.held else self.time
+        head_y = JUDGEMENT_LINE_Y - (head_time - song_time) * SCROLL_SPEED
+        self.rect.centery = head_y
+        if self.end:
+            top = max(0, int(JUDGEMENT_LINE_Y - (self.end - song_time) * SCROLL_SPEED))
+            self.body_rect.y = top
+            self.body_area.height = min(SCREEN_HEIGHT, max(0, int(head_y) - top))
+
+class NotePool:
+    """미리 만든 Note 객체를 돌려 쓰는 고정 크기 풀
+
+    노트가 몰리는 구간에서도 새 객체나 Surface를 만들지 않으므로 GC로 인한 프레임 끊김이 없습니다.
+    롱노트도 몸통 이미지를 잘라 쓰므로 길이와 상관없이 노트 하나와 같은 비용입니다.
+    """
+    def __init__(self, size, layout):
+        self.layout = layout
+        self.free = [Note(layout) for _ in range(size)]
+        self.active = {}  # 노트 번호 -> 화면에 나와 있는 Note
+
+    def spawn(self, index, lane, time, end=0):
+        # 프레임이 한참 멈췄다가 몰아서 진행할 때만 모자랄 수 있으므로 그때는 하나 더 만듦
+        note = self.free.pop() if self.free else Note(self.layout)
+        note.reset(self.layout, lane, time, end)
+        self.active[index] = note
+        return note
+
+    def hold(self, index):
+        self.active[index].held = True
+
+    def release(self, index):
+        self.free.append(self.active.pop(index))
+
+    def update(self, song_time):
+        for note in self.active.values():
+            note.update(song_time)
+
+    def draw(self, surface):
+        # 롱노트 몸통을 먼저, 그 위에 노트 머리 전체를 blits 한 번씩으로 그림
+        active = self.active.values()
+        surface.blits([(note.body, note.body_rect, note.body_area) for note in active if note.body], doreturn=False)
+        surface.blits([(note.image, note.rect) for note in active], doreturn=False)
+
+def pool_size(times, ends, visible_time):
+    """화면에 동시에 떠 있을 수 있는 노트의 최대 개수
+
+    노트마다 화면에 있는 구간은 [시작 - 보이는 시간, 끝 + Miss 범위]이므로,
+    노트가 새로 나오는 순간마다 아직 사라지지 않은 노트 수를 세면 됩니다.
+    """
+    stops = sorted(max(t, end) for t, end in zip(times, ends))
+    return max((i + 1 - bisect_left(stops, t - visible_time) for i, t in enumerate(times)), default=0)
+
+# --- 플레이 화면 ---
+class Playfield:
+    """곡 하나의 노트 생성, 이동, 판정을 묶은 것
+
+    game_loop와 자동 플레이 벤치마크(bench_autoplay.py)가 같은 코드로 돌아가도록 화면/입력과 분리했습니다.
+    """
+    def __init__(self, chart):
+        self.times = chart.times
+        self.lanes = chart.lanes
+        self.ends = chart.ends
+        self.layout = get_layout(chart.lane_count)
+        self.judge = Judge(chart.times, chart.lanes, chart.lane_count, JUDGEMENT_WINDOWS, chart.ends)
+        # 노트가 화면 맨 위에서 판정선까지 도달하는 데 걸리는 시간 (ms)
+        self.spawn_ahead = JUDGEMENT_LINE_Y / SCROLL_SPEED
+        # 생성부터 Miss 처리까지 걸리는 시간 동안 겹치는 노트 수만큼만 풀을 만듦
+        self.pool = NotePool(pool_size(chart.times, chart.ends, self.spawn_ahead + GOOD_WINDOW), self.layout)
+
+    def press(self, lane, now):
+        """레인 키 입력 -> (판정 이름, 노트 번호) 또는 None"""
+        # 입력 시각까지 먼저 진행해서, 그 전에 지나간 노트는 입력보다 먼저 Miss 처리
+        # (프레임 간격과 상관없이 항상 같은 순서로 판정되므로 리플레이 검증 결과와 일치)
+        self.update(now)
+        held = self.judge.hold_notes[lane]
+        # 해당 레인에서 판정 범위 안의 가장 가까운 노트를 찾음
+        result = self.judge.hit(lane, now)
+        if held != NO_HOLD and self.judge.hold_notes[lane] != held:
+            self.pool.release(held)  # 떼지 않고 다음 롱노트를 눌러서 끝이 Miss된 롱노트
+        if result:
+            if self.ends[result[1]]:
+                self.pool.hold(result[1])  # 롱노트는 뗄 때까지 화면에 남김
+            else:
+                self.pool.release(result[1])
+        return result
+
+    def release(self, lane, now):
+        """레인 키를 뗌 -> 롱노트 끝 (판정 이름, 노트 번호) 또는 None"""
+        self.update(now)
+        result = self.judge.release(lane, now)
+        if result:
+            self.pool.release(result[1])
+        return result
+
+    def update(self, now):
+        """now(ms)까지 진행 -> (새로 생성된 노트 번호들, Miss 처리된 노트 번호들, 끝까지 누른 롱노트 번호들)"""
+        # 노트 생성: 시간순으로 정렬되어 있으므로 커서 위치의 노트만 확인하면 됨
+        spawned = self.judge.spawn(now + self.spawn_ahead)
+        for index in spawned:
+            self.pool.spawn(index, self.lanes[index], self.times[index], self.ends[index])
+
+        # 노트 이동
+        self.pool.update(now)
+
+        # Miss / 롱노트 완료 판정: 레인마다 head 앞쪽의 지나간 노트와 누르고 있는 롱노트만 확인
+        missed, completed = self.judge.expire(now)
+        for index in missed:
+            self.pool.release(index)
+        for index in completed:
+            self.pool.release(index)
+        return spawned, missed, completed
+
+    def draw(self, surface):
+        # 레인과 판정선은 미리 그려 둔 배경을 복사
+        surface.blit(self.layout.background, (0, 0))
+        # 노트 그리기
+        self.pool.draw(surface)
+
+RESULT_OVERLAY = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+RESULT_OVERLAY.fill((0, 0, 0, 180))  # 반투명 배경
 
 # --- 텍스트 렌더링 함수 ---
 def draw_text(text, font, color, surface, x, y, center=True):
@@ -118,35 +298,144 @@ class GameState:
     PLAYING = 1
     RESULT = 2
 
+# --- 종료 ---
+def quit_game():
+    pygame.quit()
+    sys.exit()
+
+# --- 곡 선택 화면 ---
+SONG_LIST_ROWS = 8  # 한 화면에 보이는 곡 수
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+def select_song(library, selected=0, difficulty="", message=None):
+    """곡 목록에서 곡과 난이도를 고름 -> (곡 번호, 난이도), ESC를 누르면 None
+
+    음악은 여기서 불러오지 않고, 인덱스에 저장된 정보만으로 목록을 그립니다.
+    message(앞에서 난 오류 등)는 다음 키를 누를 때까지 제목 아래에 보여 줍니다.
+    """
+    songs = library.songs
+    while True:
+        song = songs[selected]
+        levels = library.difficulties(song)
+        if difficulty not in levels:
+            difficulty = levels[0]
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type != pygame.KEYDOWN:
+                continue
+            message = None
+            if event.key == pygame.K_ESCAPE:
+                return None
+            elif event.key == pygame.K_UP:
+                selected = (selected - 1) % len(songs)
+            elif event.key == pygame.K_DOWN:
+                selected = (selected + 1) % len(songs)
+            elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                step = 1 if event.key == pygame.K_RIGHT else -1
+                difficulty = levels[(levels.index(difficulty) + step) % len(levels)]
+            elif event.key == pygame.K_RETURN:
+                return selected, difficulty
+
+        # 선택한 곡이 보이도록 목록을 스크롤
+        first = min(max(0, selected - SONG_LIST_ROWS // 2), max(0, len(songs) - SONG_LIST_ROWS))
+
+        screen.fill(BLACK)
+        draw_text("곡 선택", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 50)
+        if message:
+            draw_text(message, font_small, LANE_COLORS[0], screen, SCREEN_WIDTH // 2, 90)
+        for row, i in enumerate(range(first, min(first + SONG_LIST_ROWS, len(songs)))):
+            y = 120 + row * 40
+            color = LANE_COLORS[3] if i == selected else WHITE
+            draw_text(songs[i]["title"], font_small, color, screen, 80, y, center=False)
+            draw_text(format_duration(songs[i]["duration"]), font_small, color, screen, 640, y, center=False)
+
+        levels_text = "   ".join(f"[{name}]" if name == difficulty else name for name in levels)
+        draw_text(levels_text, font_small, WHITE, screen, SCREEN_WIDTH // 2, 470)
+        chart_info = song['charts'][difficulty]
+        draw_text(f"{chart_info['lanes']}키   노트 {chart_info['notes']}개", font_small, WHITE, screen, SCREEN_WIDTH // 2, 505)
+        draw_text("위/아래: 곡   좌/우: 난이도   Enter: 시작   ESC: 종료", font_small, GRAY_TEXT, screen, SCREEN_WIDTH // 2, 560)
+
+        pygame.display.flip()
+        clock.tick(30)
+
+# --- 지연 측정 화면 ---
+def calibrate_latency():
+    """박자음에 맞춰 스페이스를 누르게 해서 소리가 들리기까지의 지연을 재고 저장
+
+    박자에 맞춰 누르면 반응 속도는 상쇄되므로, 입력 시각과 박자음을 재생한 시각의 차이가
+    곧 출력 지연(믹서 버퍼 + 드라이버 + 스피커)이 됩니다.
+    """
+    global audio_offset
+    click_times, tap_times = [], []
+    start = time.perf_counter() + 1.0  # 1초 뒤부터 박자음 시작
+    result_text = None
+
+    while True:
+        now = (time.perf_counter() - start) * 1000
+        if len(click_times) < CALIBRATION_CLICKS and now >= len(click_times) * CALIBRATION_INTERVAL:
+            hit_sounds.play()
+            click_times.append(now)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_game()
+            if event.type != pygame.KEYDOWN:
+                continue
+            if result_text is not None or event.key == pygame.K_ESCAPE:
+                return
+            if event.key == pygame.K_SPACE:
+                tap_times.append(now)
+
+        if result_text is None and len(click_times) == CALIBRATION_CLICKS and \
+                now > click_times[-1] + CALIBRATION_INTERVAL:
+            latency = estimate_latency(click_times, tap_times, CALIBRATION_INTERVAL)
+            if latency is None:
+                result_text = "입력이 부족합니다. 다시 시도해 주세요."
+            else:
+                audio_offset = latency
+                save_latency(latency)
+                result_text = f"지연 {latency:.0f}ms (저장됨)"
+
+        screen.fill(BLACK)
+        draw_text("지연 측정", font_large, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
+        if result_text is None:
+            draw_text("박자음에 맞춰 스페이스를 누르세요", font_small, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            draw_text(f"{len(click_times)} / {CALIBRATION_CLICKS}", font_medium, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT * 2 // 3)
+        else:
+            draw_text(result_text, font_medium, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            draw_text("아무 키나 눌러 돌아가기", font_small, GRAY_TEXT, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT * 2 // 3)
+        draw_text(f"현재 보정값: {audio_offset:.0f}ms", font_small, GRAY_TEXT, screen, SCREEN_WIDTH // 2, 560)
+
+        pygame.display.flip()
+        clock.tick(FPS)
+
 # --- 메인 게임 루프 ---
-def game_loop(song_file, beatmap_file):
-    game_state = GameState.START
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replays")
+
+def game_loop(song_file, chart, chart_name="replay"):
+    """곡 한 번을 플레이하고, 결과 화면에서 고른 다음 동작("retry" 또는 "menu")을 반환
 
-    # 게임 변수
-    score = 0
-    combo = 0
-    max_combo = 0
-    judgements = {"Perfect": 0, "Great": 0, "Good": 0, "Miss": 0}
+    끝까지 플레이하면 키 입력 기록을 replays/<chart_name>_<날짜>.rpl로 저장합니다.
+    """
+    game_state = GameState.START
 
     # 판정 텍스트 관련
     judgement_text = ""
-    judgement_timer = 0
+    judgement_until = 0  # 이 시각(pygame ticks)까지 판정 텍스트 표시
 
     # 비트맵 및 노트 관리
-    beatmap = load_beatmap(beatmap_file)
-    if not beatmap:
-        return # 비트맵 로드 실패 시 종료
-
-    all_sprites = pygame.sprite.Group()
-    notes_in_lanes = [[] for _ in range(LANE_COUNT)]
-
-    # 노트가 판정선까지 도달하는 데 걸리는 시간 (ms)
-    time_to_reach_judgement_line = (JUDGEMENT_LINE_Y / NOTE_SPEED) * (1000 / FPS)
+    playfield = Playfield(chart)
+    judge = playfield.judge
+    key_mapping = playfield.layout.key_mapping
+    recorder = ReplayRecorder()
 
     music_started = False
-    start_time = 0
-
-
+    audio_clock = AudioClock(offset=audio_offset)
 
     # --- 게임 루프 ---
     running = True
@@ -157,154 +446,150 @@ def game_loop(song_file, beatmap_file):
                 running = False
 
             if game_state == GameState.START:
-                if event.type == pygame.KEYDOWN:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                    calibrate_latency()
+                    audio_clock.offset = audio_offset
+                elif event.type == pygame.KEYDOWN:
                     game_state = GameState.PLAYING
                     music_started = True
                     pygame.mixer.music.load(song_file)
                     pygame.mixer.music.play()
-                    start_time = pygame.time.get_ticks()
+                    audio_clock.start()
 
             elif game_state == GameState.PLAYING:
                 if event.type == pygame.KEYDOWN:
-                    if event.key in KEY_MAPPING:
-                        lane_idx = KEY_MAPPING[event.key]
-                        hit = False
-                        # 해당 레인의 가장 가까운 노트를 찾음
-                        if notes_in_lanes[lane_idx]:
-                            note = notes_in_lanes[lane_idx][0]
-                            distance = abs(note.rect.centery - JUDGEMENT_LINE_Y)
-
-                            if distance <= PERFECT_RANGE:
-                                judgement_text = "Perfect"
-                                score += 300
-                                combo += 1
-                                judgements["Perfect"] += 1
-                                hit = True
-                            elif distance <= GREAT_RANGE:
-                                judgement_text = "Great"
-                                score += 200
-                                combo += 1
-                                judgements["Great"] += 1
-                                hit = True
-                            elif distance <= GOOD_RANGE:
-                                judgement_text = "Good"
-                                score += 100
-                                combo += 1
-                                judgements["Good"] += 1
-                                hit = True
-
-                            if hit:
-                                judgement_timer = FPS // 2 # 0.5초간 표시
-                                note.kill()
-                                notes_in_lanes[lane_idx].pop(0)
+                    if event.key in key_mapping:
+                        hit_sounds.play()  # 판정과 상관없이 누르는 즉시 소리로 알려 줌
+                        lane = key_mapping[event.key]
+                        now = recorder.record(lane, audio_clock.now())  # 리플레이와 같은 정밀도로 판정
+                        result = playfield.press(lane, now)
+                        if result:
+                            judgement_text = result[0]
+                            judgement_until = pygame.time.get_ticks() + 500 # 0.5초간 표시
+                elif event.type == pygame.KEYUP:
+                    # 롱노트를 누르고 있을 때만 떼는 시각이 판정에 쓰이므로 그때만 기록
+                    lane = key_mapping.get(event.key)
+                    if lane is not None and judge.hold_notes[lane] != NO_HOLD:
+                        now = recorder.record(lane, audio_clock.now(), release=True)
+                        result = playfield.release(lane, now)
+                        if result:
+                            judgement_text = result[0]
+                            judgement_until = pygame.time.get_ticks() + 500
 
             elif game_state == GameState.RESULT:
                 if event.type == pygame.KEYDOWN:
-                    game_loop() # 게임 재시작
-                    return
+                    # 비트맵은 이미 읽어 둔 배열을 그대로 쓰므로 다시 읽지 않음
+                    return "menu" if event.key == pygame.K_ESCAPE else "retry"
 
 
         # --- 게임 로직 업데이트 ---
         if game_state == GameState.PLAYING:
-            current_time = pygame.time.get_ticks() - start_time
-
-            # 노트 생성
-            for note_data in beatmap:
-                if not note_data['spawned'] and current_time >= note_data['time'] - time_to_reach_judgement_line:
-                    note = Note(note_data['lane'])
-                    all_sprites.add(note)
-                    notes_in_lanes[note_data['lane']].append(note)
-                    note_data['spawned'] = True
-
-            # 노트 이동
-            all_sprites.update()
-
-            # Miss 판정
-            for i in range(LANE_COUNT):
-                # 리스트를 복사해서 순회 (삭제 중 에러 방지)
-                for note in list(notes_in_lanes[i]):
-                    if note.rect.top > JUDGEMENT_LINE_Y + GOOD_RANGE:
-                        judgement_text = "Miss"
-                        judgement_timer = FPS // 2
-                        judgements["Miss"] += 1
-                        combo = 0
-                        note.kill()
-                        notes_in_lanes[i].remove(note)
-
-            # 콤보 업데이트
-            if combo > max_combo:
-                max_combo = combo
-
-            # 판정 텍스트 타이머 감소
-            if judgement_timer > 0:
-                judgement_timer -= 1
-
-            # 게임 종료 조건 (음악이 끝나고 모든 노트가 사라졌을 때)
-            if not pygame.mixer.music.get_busy() and len(all_sprites) == 0:
-                 game_state = GameState.RESULT
+            _, missed, _ = playfield.update(audio_clock.now())
+            if missed:
+                judgement_text = "Miss"
+                judgement_until = pygame.time.get_ticks() + 500
 
+            # 게임 종료 조건 (음악이 끝나고 모든 노트가 판정되었을 때)
+            if not pygame.mixer.music.get_busy() and judge.finished:
+                game_state = GameState.RESULT
+                replay_file = f"{chart_name}_{time.strftime('%Y%m%d_%H%M%S')}.rpl"
+                recorder.save(os.path.join(REPLAY_DIR, replay_file), chart, judge, audio_offset)
 
-        # --- 화면 그리기 ---
-        screen.fill(BLACK)
 
+        # --- 화면 그리기 ---
         if game_state == GameState.START:
+            screen.fill(BLACK)
             draw_text("Pygame 리듬 게임", font_large, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3)
-            draw_text("사용할 키: D, F, J, K", font_medium, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+            key_font = font_medium if playfield.layout.lane_count == 4 else font_small  # 키가 많으면 작은 글씨로
+            draw_text(f"사용할 키: {playfield.layout.key_names}", key_font, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
             draw_text("아무 키나 눌러 시작하세요", font_small, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT * 2 // 3)
+            draw_text(f"C: 지연 측정 (현재 {audio_offset:.0f}ms)", font_small, GRAY_TEXT, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT * 2 // 3 + 50)
 
         elif game_state == GameState.PLAYING or game_state == GameState.RESULT:
-            # 레인 그리기
-            for i in range(LANE_COUNT):
-                x = LANE_START_X + i * (LANE_WIDTH + LANE_SEPARATOR_WIDTH)
-                pygame.draw.rect(screen, GRAY, (x, 0, LANE_WIDTH, SCREEN_HEIGHT))
-
-            # 판정선 그리기
-            pygame.draw.line(screen, JUDGEMENT_LINE_COLOR, (LANE_START_X, JUDGEMENT_LINE_Y),
-                             (LANE_START_X + TOTAL_LANE_WIDTH, JUDGEMENT_LINE_Y), 5)
-
-            # 노트 그리기
-            all_sprites.draw(screen)
+            playfield.draw(screen)
 
             # UI 텍스트 그리기
-            draw_text(f"점수: {score}", font_small, WHITE, screen, 80, 30)
+            draw_text(f"점수: {judge.score}", font_small, WHITE, screen, 80, 30)
 
-            if combo > 1:
-                draw_text(f"{combo} 콤보!", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 150)
+            if judge.combo > 1:
+                draw_text(f"{judge.combo} 콤보!", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 150)
 
-            if judgement_timer > 0:
+            if pygame.time.get_ticks() < judgement_until:
                 draw_text(judgement_text, font_medium, LANE_COLORS[3], screen, SCREEN_WIDTH // 2, 250)
 
         if game_state == GameState.RESULT:
-            # 반투명 배경
-            result_bg = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            result_bg.fill((0, 0, 0, 180))
-            screen.blit(result_bg, (0, 0))
+            screen.blit(RESULT_OVERLAY, (0, 0))
 
             draw_text("결과", font_large, WHITE, screen, SCREEN_WIDTH // 2, 80)
-            draw_text(f"총점: {score}", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 180)
-            draw_text(f"최대 콤보: {max_combo}", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 240)
+            draw_text(f"총점: {judge.score}", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 180)
+            draw_text(f"최대 콤보: {judge.max_combo}", font_medium, WHITE, screen, SCREEN_WIDTH // 2, 240)
 
             y_offset = 320
-            for j, count in judgements.items():
+            for j, count in judge.counts.items():
                 draw_text(f"{j}: {count}", font_small, WHITE, screen, SCREEN_WIDTH // 2, y_offset)
                 y_offset += 40
 
-            draw_text("아무 키나 눌러 다시 시작", font_small, WHITE, screen, SCREEN_WIDTH // 2, 550)
+            draw_text("아무 키나 눌러 다시 시작 (ESC: 곡 선택)", font_small, WHITE, screen, SCREEN_WIDTH // 2, 550)
 
 
         # --- 화면 업데이트 ---
         pygame.display.flip()
         clock.tick(FPS)
 
-    # --- 종료 ---
-    pygame.quit()
-    sys.exit()
+    quit_game()
+
+def play_library(folder):
+    library = Library(folder)
+    library.refresh()  # 바뀐 파일만 다시 읽음
+    if not library.songs:
+        print(f"오류: '{folder}'에 곡(음악 파일 + <이름>_<난이도>_map.txt)이 없습니다.")
+        return
+
+    selected, difficulty, message = 0, "", None
+    while True:
+        choice = select_song(library, selected, difficulty, message)
+        message = None
+        if choice is None:
+            return
+        selected, difficulty = choice
+        song = library.songs[selected]
+        # 목록을 만든 뒤에 비트맵이 지워지거나 고쳐졌으면 곡 선택으로 돌아감
+        try:
+            chart = library.chart(song, difficulty)
+        except (OSError, ChartError) as e:
+            print(f"오류: {e}")
+            message = f"비트맵을 읽을 수 없습니다: {song['charts'][difficulty]['file']}"
+            continue
+        if not chart.times:
+            message = f"노트가 없는 비트맵입니다: {song['charts'][difficulty]['file']}"
+            continue
+        chart_name = os.path.splitext(song["charts"][difficulty]["file"])[0]
+        while game_loop(library.audio_path(song), chart, chart_name) == "retry":
+            pass
+
+def play_single(song_file, beatmap_file):
+    try:
+        chart = load_beatmap(beatmap_file)
+    except FileNotFoundError:
+        print(f"오류: 비트맵 파일 '{beatmap_file}'을 찾을 수 없습니다.")
+        return
+    except ChartError as e:
+        print(f"오류: {e}")
+        return
+    if not chart.times:
+        return # 노트가 없으면 종료
+    chart_name = os.path.splitext(os.path.basename(beatmap_file))[0]
+    while game_loop(song_file, chart, chart_name) == "retry":
+        pass
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("사용법: python beat.py <음악_파일.mp3> <비트맵_파일.txt>")
+    if len(sys.argv) == 3:
+        play_single(os.path.abspath(sys.argv[1]), os.path.abspath(sys.argv[2]))
+    elif len(sys.argv) <= 2:
+        # 곡 폴더를 주지 않으면 이 파일이 있는 폴더에서 곡을 찾음
+        play_library(sys.argv[1] if len(sys.argv) == 2 else os.path.dirname(os.path.abspath(__file__)))
+    else:
+        print("사용법: python beat.py [곡_폴더]")
+        print("        python beat.py <음악_파일.mp3> <비트맵_파일.txt>")
         sys.exit(1)
-    
-    song_file = os.path.abspath(sys.argv[1])
-    beatmap_file = os.path.abspath(sys.argv[2])
-    game_loop(song_file, beatmap_file)
+    quit_game()
@@ -0,0 +1,225 @@
+"""beat.py 자동 플레이 벤치마크 (화면과 소리 없이 실행)
+
+비트맵을 읽어 일정한 간격으로 흐르는 가상 시계로 beat.py의 Playfield(노트 생성/이동/판정)를 돌리고,
+봇이 노트 시각에 맞춰(원하면 오차를 섞어) 키를 누릅니다. 프레임당 처리 시간, 생성/판정/Miss 수,
+판정 오차 분포를 출력하고, 결과가 맞지 않으면 종료 코드 1을 돌려주므로 CI에서도 쓸 수 있습니다.
+
+--lanes와 --holds로 레인 수를 바꾸고 노트 일부를 롱노트로 바꿔서, 다키/롱노트 비트맵도 같은 방식으로 잴 수 있습니다.
+
+사용법: python bench_autoplay.py song_hard_map.txt --scale 10 --jitter 20
+        python bench_autoplay.py song_hard_map.txt --scale 4 --lanes 7 --holds 0.5
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import sys
+import time
+from array import array
+
+import beat
+from chart import MAX_LANES, MIN_LANES, Chart, load_beatmap
+
+HISTOGRAM_BIN = 10  # 판정 오차 분포의 칸 너비 (ms)
+HOLD_GAP = 150      # 롱노트 끝과 같은 레인의 다음 노트 사이에 남길 간격 (ms)
+MIN_HOLD = 100      # 이보다 짧게밖에 못 만드는 노트는 일반 노트로 둠 (ms)
+MAX_HOLD = 2000
+
+
+def scale_chart(chart, scale):
+    """노트를 scale배로 늘린 비트맵 (원래 노트 사이사이에 레인을 바꾼 복사본을 끼워 넣음, 롱노트는 일반 노트로)"""
+    times, lanes = chart.times, chart.lanes
+    if scale <= 1 or len(times) < 2:
+        return chart
+    gap = (times[-1] - times[0]) / (len(times) - 1)
+    notes = sorted(
+        (t + round(k * gap / scale), (lane + k) % chart.lane_count)
+        for k in range(scale)
+        for t, lane in zip(times, lanes)
+    )
+    return Chart(array('i', [t for t, _ in notes]), array('B', [lane for _, lane in notes]),
+                 array('i', bytes(4 * len(notes))), chart.lane_count)
+
+
+def remap_lanes(chart, lane_count, seed=0):
+    """레인 수를 lane_count로 바꾼 비트맵 (노트마다 레인을 새로 뽑음, 롱노트는 일반 노트로)"""
+    rng = random.Random(seed)
+    lanes = array('B', [rng.randrange(lane_count) for _ in chart.lanes])
+    return Chart(chart.times, lanes, array('i', bytes(4 * len(lanes))), lane_count)
+
+
+def add_holds(chart, fraction, seed=0):
+    """노트 중 fraction 비율을 같은 레인의 다음 노트 직전까지 이어지는 롱노트로 바꾼 비트맵"""
+    rng = random.Random(seed)
+    ends = array('i', chart.ends)
+    next_time = [None] * chart.lane_count  # 뒤에서부터 훑으며 레인별 다음 노트 시각
+    for i in range(len(chart.times) - 1, -1, -1):
+        t, lane = chart.times[i], chart.lanes[i]
+        if not ends[i] and rng.random() < fraction:
+            end = t + MAX_HOLD if next_time[lane] is None else min(t + MAX_HOLD, next_time[lane] - HOLD_GAP)
+            if end - t >= MIN_HOLD:
+                ends[i] = end
+        next_time[lane] = t
+    return Chart(chart.times, chart.lanes, ends, chart.lane_count)
+
+
+def autoplay(chart, fps=beat.FPS, jitter=0.0, seed=0, draw=False):
+    """가상 시계로 한 곡을 자동 플레이하고 측정값을 dict로 반환"""
+    times = chart.times
+    playfield = beat.Playfield(chart)
+    judge = playfield.judge
+    rng = random.Random(seed)
+
+    # 봇 입력: 노트마다 한 번 누르고 롱노트는 끝에서 뗌, 모두 노트 시각 + 정규분포 오차
+    events = []
+    for t, lane, hold_end in zip(times, chart.lanes, chart.ends):
+        events.append((t + rng.gauss(0, jitter) if jitter else t, 0, lane))
+        if hold_end:
+            events.append((hold_end + rng.gauss(0, jitter) if jitter else hold_end, 1, lane))
+    events.sort()
+    step = 1000 / fps
+    now = min(events[0][0], times[0]) - playfield.spawn_ahead
+    end = max(events[-1][0], max(chart.ends)) + beat.GOOD_WINDOW + step
+
+    frame_costs = array('d')
+    errors = array('d')
+    spawned_count = missed_count = completed_count = released_count = 0
+    cursor = 0
+    while now <= end or not judge.finished:
+        start = time.perf_counter()
+        advanced = []
+
+        # 이번 프레임까지 들어온 입력 (실제 게임의 이벤트 처리처럼 업데이트보다 먼저)
+        while cursor < len(events) and events[cursor][0] <= now:
+            event_time, release, lane = events[cursor]
+            cursor += 1
+            # press/release도 입력 시각까지 먼저 진행하므로, 그때 생긴 생성/Miss도 세도록 여기서 진행
+            advanced.append(playfield.update(event_time))
+            if release:
+                released_count += playfield.release(lane, event_time) is not None
+                continue
+            result = playfield.press(lane, event_time)
+            if result:
+                errors.append(event_time - times[result[1]])
+
+        advanced.append(playfield.update(now))
+        for spawned, missed, completed in advanced:
+            spawned_count += len(spawned)
+            missed_count += len(missed)
+            completed_count += len(completed)
+        if draw:
+            playfield.draw(beat.screen)
+
+        frame_costs.append(time.perf_counter() - start)
+        now += step
+
+    return {
+        "notes": len(times),
+        "lanes": chart.lane_count,
+        "holds": sum(1 for hold_end in chart.ends if hold_end),
+        "frames": len(frame_costs),
+        "pool": len(playfield.pool.free) + len(playfield.pool.active),
+        "spawned": spawned_count,
+        "judged": len(errors),
+        "missed": missed_count,
+        "completed": completed_count,
+        "released": released_count,
+        "counts": judge.counts,
+        "score": judge.score,
+        "max_combo": judge.max_combo,
+        "frame_costs": sorted(frame_costs),
+        "errors": errors,
+    }
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def histogram(errors, window):
+    """판정 오차를 HISTOGRAM_BIN ms 칸으로 나눈 막대 그래프 (문자열 줄 목록)"""
+    bins = {}
+    for error in errors:
+        b = int(error // HISTOGRAM_BIN)
+        bins[b] = bins.get(b, 0) + 1
+    if not bins:
+        return []
+    peak = max(bins.values())
+    lines = []
+    for b in range(-window // HISTOGRAM_BIN, window // HISTOGRAM_BIN):
+        count = bins.get(b, 0)
+        bar = "#" * round(40 * count / peak)
+        lines.append(f"{b * HISTOGRAM_BIN:+5d}ms {count:6d} {bar}")
+    return lines
+
+
+def report(result, elapsed):
+    costs = [c * 1e6 for c in result["frame_costs"]]
+    print(f"{result['lanes']}레인, 노트 {result['notes']}개 (롱노트 {result['holds']}개), 프레임 {result['frames']}개, 노트 풀 {result['pool']}개, 실행 {elapsed:.2f}초")
+    print(f"생성 {result['spawned']}, 판정 {result['judged']}, Miss {result['missed']}, "
+          f"롱노트 끝까지 누름 {result['completed']}, 뗌 {result['released']}")
+    print("  ".join(f"{name} {count}" for name, count in result["counts"].items()),
+          f"/ 점수 {result['score']}, 최대 콤보 {result['max_combo']}")
+    print(f"프레임당 처리 시간(us): 평균 {sum(costs) / len(costs):.1f}, 중앙값 {percentile(costs, 0.5):.1f}, "
+          f"p95 {percentile(costs, 0.95):.1f}, p99 {percentile(costs, 0.99):.1f}, 최대 {costs[-1]:.1f}")
+    if result["errors"]:
+        errors = result["errors"]
+        print(f"판정 오차(ms): 평균 {sum(errors) / len(errors):+.2f}")
+        for line in histogram(errors, beat.GOOD_WINDOW):
+            print("  " + line)
+
+
+def check(result, jitter):
+    """결과가 맞는지 확인 -> 문제 목록"""
+    problems = []
+    if result["spawned"] != result["notes"]:
+        problems.append(f"생성된 노트 수가 다릅니다 ({result['spawned']} != {result['notes']})")
+    if result["judged"] + result["missed"] != result["notes"]:
+        problems.append("판정 + Miss 수가 노트 수와 다릅니다")
+    judgements = result["notes"] + result["holds"]  # 롱노트는 시작과 끝을 따로 판정
+    if sum(result["counts"].values()) != judgements:
+        problems.append(f"판정 수가 다릅니다 ({sum(result['counts'].values())} != {judgements})")
+    if jitter == 0 and result["counts"]["Perfect"] != judgements:
+        problems.append("오차 없이 눌렀는데 Perfect가 아닌 노트가 있습니다")
+    if jitter == 0 and result["completed"] != result["holds"]:
+        problems.append("오차 없이 눌렀는데 끝까지 누르지 못한 롱노트가 있습니다")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="beat.py 자동 플레이 벤치마크 (화면/소리 없이 판정 로직과 처리 시간을 측정)",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("beatmap", help="비트맵 파일 (.txt 또는 .chart)")
+    parser.add_argument("--scale", type=int, default=1, help="노트 수를 몇 배로 늘릴지 (기본값: 1)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="봇 입력 오차의 표준편차 ms (기본값: 0)")
+    parser.add_argument("--fps", type=float, default=beat.FPS, help=f"가상 프레임레이트 (기본값: {beat.FPS})")
+    parser.add_argument("--seed", type=int, default=0, help="입력 오차 난수 시드 (기본값: 0)")
+    parser.add_argument("--lanes", type=int, choices=range(MIN_LANES, MAX_LANES + 1),
+                        help="레인 수를 바꿔서 측정 (노트마다 레인을 새로 뽑음)")
+    parser.add_argument("--holds", type=float, default=0.0, help="롱노트로 바꿀 노트 비율 0~1 (기본값: 0)")
+    parser.add_argument("--draw", action="store_true", help="화면 그리기(dummy 드라이버)까지 포함해서 측정")
+    args = parser.parse_args()
+
+    chart = load_beatmap(args.beatmap)
+    if not chart.times:
+        print("오류: 노트가 없습니다.")
+        sys.exit(1)
+    if args.lanes:
+        chart = remap_lanes(chart, args.lanes, args.seed)
+    chart = scale_chart(chart, args.scale)
+    if args.holds:
+        chart = add_holds(chart, args.holds, args.seed)
+
+    started = time.perf_counter()
+    result = autoplay(chart, args.fps, args.jitter, args.seed, args.draw)
+    report(result, time.perf_counter() - started)
+
+    problems = check(result, args.jitter)
+    for problem in problems:
+        print(f"실패: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,212 @@
+"""비트맵(.txt)을 바이너리 차트로 컴파일하고 읽어 오는 모듈
+
+텍스트 비트맵: 한 줄에 노트 하나
+- 일반 노트 "시간,레인", 롱노트 "시작 시간,레인,끝 시간" (ms)
+- "# lanes: 7"처럼 레인 수(4~8)를 적을 수 있음 (없으면 쓰인 레인 중 가장 큰 값 + 1, 최소 4)
+
+바이너리 차트 구조 (리틀 엔디언)
+- 헤더 32바이트: 매직(b"BMAP"), 버전(uint16), 레인 수(uint16), 노트 수(uint32),
+  원본 수정 시각(int64, ns), 원본 크기(int64), 예약(uint32)
+- 노트 시간: int32 x 노트 수 (ms, 시간순 정렬)
+- 롱노트 끝 시간: int32 x 노트 수 (ms, 일반 노트는 0)
+- 노트 레인: uint8 x 노트 수
+
+정수 배열이 4바이트 경계에서 시작하므로 numpy.frombuffer나 mmap으로 복사 없이 바로 읽을 수 있습니다.
+
+사용법: python chart.py <비트맵.txt> [...]   (검사 후 __chartcache__에 컴파일)
+"""
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+MAGIC = b"BMAP"
+VERSION = 2
+HEADER = struct.Struct("<4sHHIqqI")
+CACHE_DIR = "__chartcache__"
+MIN_LANES = 4
+MAX_LANES = 8
+
+# times: 노트 시간, lanes: 레인, ends: 롱노트 끝 시간 (일반 노트는 0), lane_count: 레인 수
+Chart = namedtuple("Chart", "times lanes ends lane_count")
+
+
+class ChartError(ValueError):
+    pass
+
+
+def parse_lane_count(line):
+    """'# lanes: 7' 주석이면 레인 수, 아니면 None"""
+    key, _, value = line.lstrip('#').partition(':')
+    if key.strip().lower() != "lanes":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_text(filename):
+    """텍스트 비트맵을 검사하며 읽어 Chart로 반환
+
+    빈 줄과 '#'으로 시작하는 주석은 건너뛰고, 형식이 틀린 줄은 줄 번호와 함께 ChartError를 냅니다.
+    """
+    notes = []
+    lane_count = None
+    with open(filename, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if line.startswith('#'):
+                lane_count = parse_lane_count(line) or lane_count
+                continue
+            if not line:
+                continue
+            parts = line.split(',')
+            try:
+                if len(parts) not in (2, 3):
+                    raise ValueError
+                time, lane = int(parts[0]), int(parts[1])
+                end = int(parts[2]) if len(parts) == 3 else 0
+            except ValueError:
+                raise ChartError(f"{filename}:{line_no}: '시간,레인' 또는 '시간,레인,끝 시간' 형식이 아닙니다: {line!r}")
+            if time < 0 or not 0 <= lane < MAX_LANES:
+                raise ChartError(f"{filename}:{line_no}: 시간이나 레인 값이 범위를 벗어났습니다: {line!r}")
+            if len(parts) == 3 and end <= time:
+                raise ChartError(f"{filename}:{line_no}: 롱노트 끝 시간이 시작 시간보다 빠릅니다: {line!r}")
+            notes.append((time, lane, end, line_no))
+
+    if lane_count is None:
+        lane_count = max([MIN_LANES] + [lane + 1 for _, lane, _, _ in notes])
+    if not MIN_LANES <= lane_count <= MAX_LANES:
+        raise ChartError(f"{filename}: 레인 수는 {MIN_LANES}~{MAX_LANES}개여야 합니다 ({lane_count})")
+
+    # 시간을 기준으로 정렬
+    notes.sort()
+    hold_until = [-1] * lane_count  # 레인별로 앞 롱노트가 끝나는 시각
+    for time, lane, end, line_no in notes:
+        if lane >= lane_count:
+            raise ChartError(f"{filename}:{line_no}: 레인 {lane}은 0~{lane_count - 1} 범위를 벗어납니다")
+        if time <= hold_until[lane]:
+            raise ChartError(f"{filename}:{line_no}: 같은 레인의 롱노트가 끝나기 전에 노트가 있습니다")
+        hold_until[lane] = end if end else -1
+
+    times = array('i', [t for t, _, _, _ in notes])
+    lanes = array('B', [lane for _, lane, _, _ in notes])
+    ends = array('i', [end for _, _, end, _ in notes])
+    return Chart(times, lanes, ends, lane_count)
+
+
+def write_chart(filename, chart, source_mtime=0, source_size=0):
+    times = array('i', chart.times)
+    ends = array('i', chart.ends)
+    if sys.byteorder != 'little':
+        times.byteswap()
+        ends.byteswap()
+    tmp = filename + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, chart.lane_count, len(times), source_mtime, source_size, 0))
+        f.write(times.tobytes())
+        f.write(ends.tobytes())
+        f.write(bytes(chart.lanes))
+    os.replace(tmp, filename)  # 쓰는 도중에 다른 프로세스가 읽어도 깨진 파일을 보지 않도록
+
+
+def read_header(data):
+    magic, version, lane_count, count, mtime, size, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ChartError("차트 파일 형식이 맞지 않습니다")
+    return lane_count, count, mtime, size
+
+
+def load_chart(filename):
+    """바이너리 차트를 Chart(times array('i'), lanes array('B'), ends array('i'), lane_count)로 읽어 옴"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    lane_count, count, _, _ = read_header(data)
+    start = HEADER.size
+    times = array('i')
+    times.frombytes(data[start:start + count * 4])
+    ends = array('i')
+    ends.frombytes(data[start + count * 4:start + count * 8])
+    if sys.byteorder != 'little':
+        times.byteswap()
+        ends.byteswap()
+    lanes = array('B', data[start + count * 8:start + count * 9])
+    return Chart(times, lanes, ends, lane_count)
+
+
+def map_chart(filename):
+    """바이너리 차트를 mmap으로 열어 복사 없이 numpy 배열로 된 Chart를 반환 (numpy 필요)"""
+    import mmap
+    import numpy as np
+
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    lane_count, count, _, _ = read_header(data)
+    times = np.frombuffer(data, dtype='<i4', count=count, offset=HEADER.size)
+    ends = np.frombuffer(data, dtype='<i4', count=count, offset=HEADER.size + count * 4)
+    lanes = np.frombuffer(data, dtype=np.uint8, count=count, offset=HEADER.size + count * 8)
+    return Chart(times, lanes, ends, lane_count)
+
+
+def cache_path(filename):
+    folder, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0] + ".chart")
+
+
+def is_fresh(compiled, stat):
+    """컴파일된 차트가 원본(stat)과 같은 수정 시각/크기로 만들어졌는지"""
+    try:
+        with open(compiled, 'rb') as f:
+            _, _, mtime, size = read_header(f.read(HEADER.size))
+    except (OSError, struct.error, ChartError):
+        return False
+    return mtime == stat.st_mtime_ns and size == stat.st_size
+
+
+def compile_chart(filename):
+    """텍스트 비트맵을 검사하고 캐시 폴더에 컴파일, 컴파일된 파일 경로를 반환"""
+    stat = os.stat(filename)
+    compiled = cache_path(filename)
+    if is_fresh(compiled, stat):
+        return compiled
+    chart = parse_text(filename)
+    os.makedirs(os.path.dirname(compiled), exist_ok=True)
+    write_chart(compiled, chart, stat.st_mtime_ns, stat.st_size)
+    return compiled
+
+
+def load_beatmap(filename):
+    """비트맵을 시간순으로 정렬된 배열들로 된 Chart로 읽어 옴
+
+    .txt는 원본이 바뀌었을 때만 다시 컴파일하고, 그 외에는 캐시된 바이너리를 바로 읽습니다.
+    """
+    if filename.endswith(".chart"):
+        return load_chart(filename)
+    try:
+        return load_chart(compile_chart(filename))
+    except OSError as e:
+        if not os.path.exists(filename):
+            raise
+        # 캐시 폴더에 쓸 수 없으면 텍스트를 바로 읽음
+        print(f"경고: 차트 캐시를 쓸 수 없습니다 ({e})")
+        return parse_text(filename)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("사용법: python chart.py <비트맵.txt> [...]")
+        sys.exit(1)
+
+    failed = False
+    for path in sys.argv[1:]:
+        try:
+            chart = load_chart(compile_chart(path))
+        except (OSError, ChartError) as e:
+            print(f"오류: {e}")
+            failed = True
+            continue
+        holds = sum(1 for end in chart.ends if end)
+        print(f"{path}: {chart.lane_count}레인, 노트 {len(chart.times)}개 (롱노트 {holds}개) -> {cache_path(path)}")
+    sys.exit(1 if failed else 0)
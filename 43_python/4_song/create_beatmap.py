@@ -1,10 +1,358 @@
 import librosa
 import numpy as np
+import soxr
 import argparse
-import random
 import os
+import glob
+import hashlib
+import itertools
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def create_beatmap(mp3_path, output_path, density=0.7, chord_chance=0.15):
+# --- 스트리밍 분석 설정 ---
+# 전체 분석(librosa.load 기본값 22050Hz, onset_strength 기본값)과 같은 값이 나오도록,
+# 곡의 샘플레이트와 상관없이 블록마다 ANALYSIS_SR로 리샘플링한 뒤 같은 창 길이/간격으로 분석함
+ANALYSIS_SR = 22050
+FRAME_LENGTH = 2048  # STFT 창 길이 (ANALYSIS_SR에서 샘플)
+HOP_LENGTH = 512     # 프레임 간격 (ANALYSIS_SR에서 샘플)
+BLOCK_LENGTH = 256   # 한 번에 읽어 들이는 프레임 수 (약 6초)
+N_MELS = 128
+TOP_DB = 80.0        # power_to_db 기본값: 가장 큰 소리보다 이만큼 작은 소리는 같은 값으로 (무음 구간 잡음 무시)
+
+
+def resampled_blocks(mp3_path, block_samples):
+    """오디오를 모노로 블록 단위로 읽어 ANALYSIS_SR로 바꿔서 돌려줌 (블록 길이는 대략 block_samples)
+
+    librosa.load처럼 soxr HQ로 리샘플링하되, 블록 사이에 필터 상태를 이어 가므로 경계에 이음매가 생기지 않음
+    """
+    sr = librosa.get_samplerate(mp3_path)
+    native = max(1, round(block_samples * sr / ANALYSIS_SR))
+    blocks = librosa.stream(mp3_path, block_length=1, frame_length=native, hop_length=native,
+                            mono=True, fill_value=None)
+    if sr == ANALYSIS_SR:
+        yield from blocks
+        return
+    resampler = soxr.ResampleStream(sr, ANALYSIS_SR, 1, dtype='float32', quality='HQ')
+    block = next(blocks, None)
+    while block is not None:
+        following = next(blocks, None)  # 마지막 블록이면 필터에 남은 샘플까지 꺼내야 함
+        yield resampler.resample_chunk(block.astype(np.float32), last=following is None)
+        block = following
+
+
+def stream_mel(mp3_path, block_length=BLOCK_LENGTH):
+    """블록 단위 멜 스펙트로그램(dB, 하한 없음) -> 블록마다 (N_MELS, 프레임 수) 배열
+
+    melspectrogram(center=True)처럼 곡 앞뒤에 FRAME_LENGTH // 2 샘플씩 0을 붙인 것으로 보고 자름.
+    다음 프레임에 필요한 FRAME_LENGTH - HOP_LENGTH 샘플은 블록 사이에 넘겨 주므로 프레임이 빠지거나 겹치지 않음
+    """
+    mel_basis = librosa.filters.mel(sr=ANALYSIS_SR, n_fft=FRAME_LENGTH, n_mels=N_MELS)
+    pad = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+    carry = pad
+    for samples in itertools.chain(resampled_blocks(mp3_path, block_length * HOP_LENGTH), [pad]):
+        carry = np.concatenate([carry, samples])
+        if len(carry) < FRAME_LENGTH:
+            continue
+        frames = (len(carry) - FRAME_LENGTH) // HOP_LENGTH + 1
+        used = carry[:(frames - 1) * HOP_LENGTH + FRAME_LENGTH]
+        power = np.abs(librosa.stft(used, n_fft=FRAME_LENGTH, hop_length=HOP_LENGTH, center=False)) ** 2
+        carry = carry[frames * HOP_LENGTH:]
+        yield librosa.power_to_db(mel_basis @ power, ref=1.0, top_db=None)
+
+
+def stream_envelope(mp3_path, block_length=BLOCK_LENGTH):
+    """오디오를 블록 단위로 읽으며 온셋 세기를 구함 -> (세기 배열, 샘플레이트, 간격 샘플 수)
+
+    오디오는 블록 하나만 메모리에 있고, 남는 것은 프레임당 숫자 하나인 세기 배열뿐입니다 (10분 곡에 약 100KB).
+    스펙트럼 차이에 필요한 직전 프레임은 블록 사이에 넘겨 줍니다.
+
+    onset_strength와 같은 값이 나오도록
+    - dB 하한(곡 전체에서 가장 큰 값 - TOP_DB)을 알아야 하므로 곡을 두 번 읽음 (처음은 가장 큰 값만)
+    - onset_strength처럼 세기 앞에 (lag + FRAME_LENGTH // (2 * HOP_LENGTH)) 프레임을 채우고 프레임 수에 맞춰 자름
+      (k번째 값의 시각 k * HOP_LENGTH가 새 프레임 창의 끝이 되도록)
+    """
+    floor = max((float(mel.max()) for mel in stream_mel(mp3_path, block_length)), default=0.0) - TOP_DB
+    previous = None  # 직전 블록의 마지막 멜 프레임 (dB)
+    frames = 0
+    envelopes = [np.zeros(1 + FRAME_LENGTH // (2 * HOP_LENGTH), dtype=np.float32)]
+    for mel in stream_mel(mp3_path, block_length):
+        mel = np.maximum(mel, floor)
+        frames += mel.shape[1]
+        flux = np.diff(mel if previous is None else np.hstack([previous, mel]), axis=1)
+        previous = mel[:, -1:]
+        envelopes.append(np.maximum(0.0, flux).mean(axis=0).astype(np.float32))
+    return np.concatenate(envelopes)[:frames], ANALYSIS_SR, HOP_LENGTH
+
+
+def detect_onsets(envelope, sr, hop_length=HOP_LENGTH):
+    """온셋 세기에서 온셋을 골라 (시각(초), 세기) 배열로
+
+    - librosa.onset.onset_detect는 온셋 이벤트의 프레임 인덱스를 반환합니다.
+    - 곡 전체의 세기로 정규화해서 고르므로, 스트리밍 분석도 세기를 다 모은 뒤에 같은 함수로 고릅니다.
+    - 피크 직전의 극소점으로 당겨(backtrack) 소리가 시작하는 위치에 맞춥니다.
+    """
+    if len(envelope) == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.float32)
+    peaks = librosa.onset.onset_detect(onset_envelope=envelope, sr=sr, hop_length=hop_length, units='frames')
+    onset_frames = librosa.onset.onset_backtrack(peaks, envelope)
+    return librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop_length), envelope[peaks]
+
+
+def beat_grid(envelope, sr, hop_length=HOP_LENGTH):
+    """온셋 세기로 템포(BPM)와 박자 시각(초)을 구함"""
+    if len(envelope) == 0:
+        return 0.0, np.zeros(0)
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=envelope, sr=sr, hop_length=hop_length)
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+    return float(np.atleast_1d(tempo)[0]), beat_times
+
+
+def make_analysis(onset_times, onset_strengths, tempo, beat_times):
+    return {
+        "onset_times": np.asarray(onset_times, dtype=np.float64),
+        "onset_strengths": np.asarray(onset_strengths, dtype=np.float32),
+        "tempo": float(tempo),
+        "beat_times": np.asarray(beat_times, dtype=np.float64),
+    }
+
+
+def analyze_envelope(envelope, sr, hop_length=HOP_LENGTH):
+    """온셋 세기 -> 분석 결과 dict (전체/스트리밍 분석 공통)"""
+    onset_times, onset_strengths = detect_onsets(envelope, sr, hop_length)
+    tempo, beat_times = beat_grid(envelope, sr, hop_length)
+    return make_analysis(onset_times, onset_strengths, tempo, beat_times)
+
+
+def analyze_full(mp3_path):
+    """곡 전체를 메모리에 올려 분석 -> 분석 결과 dict"""
+    y, sr = librosa.load(mp3_path)
+    return analyze_envelope(librosa.onset.onset_strength(y=y, sr=sr), sr)
+
+
+def analyze_stream(mp3_path):
+    """곡을 블록 단위로 읽으며 분석 -> 분석 결과 dict (analyze_full과 같은 결과가 나오도록 맞춤)"""
+    return analyze_envelope(*stream_envelope(mp3_path))
+
+
+def check_stream(mp3_path):
+    """스트리밍 분석이 전체 분석과 같은지 -> 다른 점 목록 (같으면 빈 목록)
+
+    온셋 수가 같고 각 온셋 시각 차이가 프레임 간격 하나 이내면 같은 것으로 봅니다.
+    """
+    full = analyze_full(mp3_path)["onset_times"]
+    stream = analyze_stream(mp3_path)["onset_times"]
+    tolerance = HOP_LENGTH / ANALYSIS_SR + 1e-6
+    if len(full) != len(stream):
+        return [f"온셋 수 {len(full)} != {len(stream)}"]
+    if len(full) and np.abs(full - stream).max() > tolerance:
+        return [f"온셋 시각 차이 최대 {np.abs(full - stream).max() * 1000:.1f}ms"]
+    return []
+
+
+# --- 분석 결과 캐시 ---
+# 음악 파일 옆에 <이름>.analysis.npz로 저장하고, 음악 내용의 해시와 분석 설정이 같을 때만 다시 씀.
+# 밀도나 코드 확률, 레인 규칙만 바꿔서 다시 만들 때는 디코딩 없이 캐시만 읽습니다.
+ANALYSIS_VERSION = 2  # 2: 스트리밍 분석을 전체 분석과 같은 프레임 크기/시각/피크 선택으로 맞춤
+
+
+def analysis_key(mp3_path, stream):
+    digest = hashlib.sha1()
+    with open(mp3_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    params = (ANALYSIS_VERSION, stream, FRAME_LENGTH, HOP_LENGTH, BLOCK_LENGTH, N_MELS, TOP_DB) if stream \
+        else (ANALYSIS_VERSION, stream)
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def analysis_cache_path(mp3_path):
+    return os.path.splitext(mp3_path)[0] + ".analysis.npz"
+
+
+def read_analysis_cache(mp3_path, key):
+    try:
+        with np.load(analysis_cache_path(mp3_path)) as data:
+            if str(data["key"]) != key:
+                return None
+            return make_analysis(data["onset_times"], data["onset_strengths"], data["tempo"], data["beat_times"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def write_analysis_cache(mp3_path, key, analysis):
+    path = analysis_cache_path(mp3_path)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, key=np.array(key), **analysis)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"경고: 분석 결과를 저장하지 못했습니다 ({e})")
+
+
+def analyze(mp3_path, stream=False, use_cache=True):
+    """곡을 분석하거나 캐시에서 읽어 옴 -> 분석 결과 dict"""
+    key = analysis_key(mp3_path, stream)
+    if use_cache:
+        analysis = read_analysis_cache(mp3_path, key)
+        if analysis is not None:
+            return analysis
+    analysis = analyze_stream(mp3_path) if stream else analyze_full(mp3_path)
+    write_analysis_cache(mp3_path, key, analysis)
+    return analysis
+
+
+# --- 노트 선택 / 레인 배치 설정 ---
+LANE_COUNT = 4
+ALIGN_TOLERANCE = 0.03  # 박자선(정박/반박)에서 이만큼(초) 벗어나면 정렬 점수가 크게 줄어듦
+FALLBACK_WINDOW = 0.5   # 박자를 찾지 못했을 때 쓰는 선택 구간 길이 (초)
+JACK_GAP = 180          # 같은 레인을 다시 칠 수 있는 최소 간격 (ms), 이보다 빠른 연타(잭)는 만들지 않음
+ALTERNATE_GAP = 150     # 이보다 빠르게 이어지는 노트는 양손을 번갈아 가며 배치 (ms)
+
+
+def beat_alignment(times, beat_times):
+    """온셋마다 가장 가까운 정박/반박까지의 거리를 0~1 점수로 (박자선 위면 1)"""
+    if len(beat_times) < 2:
+        return np.ones_like(times)
+    grid = np.empty(len(beat_times) * 2 - 1)
+    grid[0::2] = beat_times
+    grid[1::2] = (beat_times[:-1] + beat_times[1:]) / 2
+    i = np.clip(np.searchsorted(grid, times), 1, len(grid) - 1)
+    distance = np.minimum(np.abs(times - grid[i - 1]), np.abs(times - grid[i]))
+    return np.exp(-(distance / ALIGN_TOLERANCE) ** 2)
+
+
+def select_onsets(analysis, density, rng):
+    """박자 구간마다 점수(세기 x 박자 정렬)가 높은 온셋을 density 비율만큼 골라 (인덱스, 점수) 반환
+
+    동전 던지기 대신 구간 안에서 순위를 매겨 위에서부터 고르므로, 쉬운 난이도일수록
+    강하고 박자에 맞는 소리만 남습니다. 모든 계산이 NumPy 배열 연산 한 번으로 끝납니다.
+    """
+    times = analysis["onset_times"]
+    strengths = analysis["onset_strengths"].astype(np.float64)
+    beat_times = analysis["beat_times"]
+    if len(times) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    top = strengths.max()
+    score = (strengths / top if top > 0 else np.ones_like(strengths)) * (0.5 + 0.5 * beat_alignment(times, beat_times))
+    score += rng.random(len(times)) * 1e-9  # 같은 점수끼리 순서를 정함
+
+    if len(beat_times) >= 2:
+        window = np.searchsorted(beat_times, times, side='right')
+    else:
+        window = (times // FALLBACK_WINDOW).astype(np.int64)
+
+    # 구간별로 점수 내림차순 정렬 -> 구간 안 순위
+    order = np.lexsort((-score, window))
+    _, starts, counts = np.unique(window[order], return_index=True, return_counts=True)
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+    # 구간마다 density x 온셋 수 만큼 (소수점은 확률적으로 올림해서 평균이 density가 되게)
+    keep_count = np.floor(counts * density + rng.random(len(counts))).astype(np.int64)
+    keep = order[rank < np.repeat(keep_count, counts)]
+    keep.sort()
+    return keep, score[keep]
+
+
+def pick_lane(lanes, last_hit, time_ms, coin):
+    """잭 간격을 지키는 레인 중 하나, 모두 막혀 있으면 None"""
+    allowed = [lane for lane in lanes if time_ms - last_hit[lane] >= JACK_GAP]
+    if allowed:
+        return allowed[int(coin * len(allowed))]
+    return None
+
+
+def assign_lanes(times_ms, chords, rng, lane_count=LANE_COUNT):
+    """노트에 레인을 배치 -> (times, lanes) 배열, 동시치기는 노트 두 개가 됨
+
+    - 같은 레인은 JACK_GAP보다 빠르게 다시 나오지 않음 (고른 손의 레인이 모두 막히면 다른 손으로,
+      모든 레인이 막히면 그 노트는 뺌)
+    - 왼손(앞쪽 절반 레인)과 오른손(나머지) 노트 수를 맞추고, 빠른 연타는 손을 번갈아 배치
+    - 동시치기는 양손에 하나씩
+    레인은 앞 노트에 따라 정해지므로 순서대로 한 번 훑고, 필요한 난수는 미리 한꺼번에 뽑아 둡니다.
+    """
+    half = lane_count // 2
+    hands = (list(range(half)), list(range(half, lane_count)))
+    last_hit = [-JACK_GAP] * lane_count
+    hand_notes = [0, 0]
+    last_hand, last_time = 0, -ALTERNATE_GAP
+    randoms = rng.random((len(times_ms), 3)).tolist()
+
+    out_times, out_lanes = [], []
+    for time_ms, chord, (hand_coin, lane_coin, chord_coin) in zip(times_ms.tolist(), chords.tolist(), randoms):
+        if time_ms - last_time < ALTERNATE_GAP:
+            hand = 1 - last_hand
+        elif hand_notes[0] != hand_notes[1]:
+            hand = 0 if hand_notes[0] < hand_notes[1] else 1
+        else:
+            hand = int(hand_coin < 0.5)
+
+        # 동시치기는 양손에 하나씩, 아니면 고른 손이 막혔을 때만 다른 손으로
+        coins = (lane_coin, chord_coin if chord else lane_coin)
+        for h, coin in zip((hand, 1 - hand), coins):
+            lane = pick_lane(hands[h], last_hit, time_ms, coin)
+            if lane is None:
+                continue
+            last_hit[lane] = time_ms
+            hand_notes[h] += 1
+            out_times.append(time_ms)
+            out_lanes.append(lane)
+            last_hand, last_time = h, time_ms
+            if not chord:
+                break
+
+    times = np.array(out_times, dtype=np.int64)
+    lanes = np.array(out_lanes, dtype=np.int64)
+    order = np.lexsort((lanes, times))
+    return times[order], lanes[order]
+
+
+def generate_notes(analysis, density=0.7, chord_chance=0.15, seed=None, lane_count=LANE_COUNT):
+    """분석 결과로 노트를 만들어 (시간 ms, 레인)을 시간순으로 반환
+
+    :param seed: 같은 seed와 분석 결과면 항상 같은 비트맵이 나옵니다 (None이면 매번 다름)
+    """
+    rng = np.random.default_rng(seed)
+
+    # 3. 세기와 박자 정렬로 노트 선택
+    selected, score = select_onsets(analysis, density, rng)
+    times_ms = (analysis["onset_times"][selected] * 1000).astype(np.int64)
+
+    # 같은 ms로 겹친 온셋은 하나로
+    if len(times_ms):
+        unique = np.concatenate([[True], np.diff(times_ms) > 0])
+        times_ms, score = times_ms[unique], score[unique]
+
+    # 5. 동시치기(코드): 점수 상위 chord_chance 비율의 노트
+    if chord_chance > 0 and len(score):
+        chords = score >= np.quantile(score, 1 - min(chord_chance, 1.0))
+    else:
+        chords = np.zeros(len(score), dtype=bool)
+
+    # 4. 레인 할당
+    times, lanes = assign_lanes(times_ms, chords, rng, lane_count)
+    return list(zip(times.tolist(), lanes.tolist()))
+
+
+def write_beatmap(output_path, mp3_path, notes):
+    """노트 (시간 ms, 레인)를 비트맵 파일로 저장하고 노트 수를 반환
+
+    다 쓴 뒤에 파일 이름을 바꿔서 중간에 멈춰도 덜 쓴 파일이 최신 비트맵으로 남지 않게 합니다.
+    """
+    count = 0
+    tmp = output_path + ".tmp"
+    with open(tmp, 'w') as f:
+        f.write(f"# Beatmap generated from '{os.path.basename(mp3_path)}'\n")
+        for time_ms, lane in notes:
+            f.write(f"{time_ms},{lane}\n")
+            count += 1
+        f.write(f"# Total notes: {count}\n")
+    os.replace(tmp, output_path)
+    return count
+
+
+def create_beatmap(mp3_path, output_path, density=0.7, chord_chance=0.15, stream=False, use_cache=True, seed=None):
     """
     MP3 파일에서 비트를 분석하여 리듬 게임용 beatmap.txt 파일을 생성합니다.
 
@@ -12,6 +360,10 @@ def create_beatmap(mp3_path, output_path, density=0.7, chord_chance=0.15):
     :param output_path: 생성될 beatmap.txt 파일 경로
     :param density: 노트 생성 밀도 (0.1 ~ 1.0). 값이 클수록 노트가 많아집니다.
     :param chord_chance: 동시치기(코드)가 발생할 확률 (0.0 ~ 1.0)
+    :param stream: True면 곡을 블록 단위로 읽으며 분석합니다.
+                   곡 길이와 상관없이 메모리 사용량이 일정해서 긴 음원에 알맞습니다.
+    :param use_cache: 같은 곡을 같은 설정으로 분석한 캐시(<이름>.analysis.npz)가 있으면 그대로 씁니다.
+    :param seed: 난수 시드, 같은 값을 주면 같은 비트맵이 만들어집니다.
     """
     if not os.path.exists(mp3_path):
         print(f"오류: 파일 '{mp3_path}'를 찾을 수 없습니다.")
@@ -20,65 +372,114 @@ def create_beatmap(mp3_path, output_path, density=0.7, chord_chance=0.15):
     print(f"'{mp3_path}' 파일을 분석 중입니다. 잠시만 기다려주세요...")
 
     try:
-        # 1. 오디오 파일 로드
-        y, sr = librosa.load(mp3_path)
+        # 1~2. 분석 (같은 곡을 분석해 둔 캐시가 있으면 그대로 사용)
+        analysis = analyze(mp3_path, stream, use_cache)
+        print(f"총 {len(analysis['onset_times'])}개의 잠재적 노트 지점을 감지했습니다. (템포 {analysis['tempo']:.1f} BPM)")
 
-        # 2. 온셋(소리 시작점) 감지
-        #    - librosa.onset.onset_detect는 온셋 이벤트의 프레임 인덱스를 반환합니다.
-        #    - backtrack=True를 사용하여 실제 피크에 더 가깝게 위치를 조정합니다.
-        onset_frames = librosa.onset.onset_detect(y=y, sr=sr, units='frames', backtrack=True)
+        # 3~5. 노트 선택과 레인 할당, 6. 파일로 저장
+        notes = generate_notes(analysis, density, chord_chance, seed)
+        count = write_beatmap(output_path, mp3_path, notes)
 
-        # 프레임을 시간(초)으로 변환
-        onset_times = librosa.frames_to_time(onset_frames, sr=sr)
+        print(f"성공! '{output_path}' 파일에 {count}개의 노트가 포함된 비트맵을 생성했습니다.")
+        print(f"팁: 생성된 비트맵이 너무 어렵거나 쉬우면 --density 와 --chord-chance 옵션을 조절해보세요.")
 
-        print(f"총 {len(onset_times)}개의 잠재적 노트 지점을 감지했습니다.")
+    except Exception as e:
+        print(f"오류가 발생했습니다: {e}")
+        print("librosa 또는 ffmpeg 설치에 문제가 없는지 확인해주세요.")
 
-        # 3. 노트 생성 및 레인 할당
-        notes = []
-        last_lane = -1
 
-        for t in onset_times:
-            # 밀도(density) 설정에 따라 노트를 생성할지 결정
-            if random.random() > density:
-                continue
+# --- 일괄 생성 ---
+AUDIO_EXTENSIONS = (".mp3", ".ogg", ".wav", ".flac")
 
-            # 시간을 밀리초(ms)로 변환
-            time_ms = int(t * 1000)
-
-            # 4. 레인 할당 로직
-            # 이전 레인과 겹치지 않도록 간단한 로직 추가
-            available_lanes = [0, 1, 2, 3]
-            if last_lane != -1 and len(available_lanes) > 1:
-                # available_lanes.remove(last_lane) # 바로 옆에 같은 노트가 나오는 것을 방지하려면 주석 해제
-                pass
-
-            lane = random.choice(available_lanes)
-            notes.append((time_ms, lane))
-            last_lane = lane
-
-            # 5. 동시치기(코드) 생성 로직
-            if random.random() < chord_chance:
-                chord_lanes = [0, 1, 2, 3]
-                chord_lanes.remove(lane) # 이미 할당된 레인은 제외
-                chord_lane = random.choice(chord_lanes)
-                notes.append((time_ms, chord_lane))
-
-        # 시간순으로 정렬
-        notes.sort()
-
-        # 6. 파일로 저장
-        with open(output_path, 'w') as f:
-            f.write(f"# Beatmap generated from '{os.path.basename(mp3_path)}'\n")
-            f.write(f"# Total notes: {len(notes)}\n")
-            for time_ms, lane in notes:
-                f.write(f"{time_ms},{lane}\n")
-
-        print(f"성공! '{output_path}' 파일에 {len(notes)}개의 노트가 포함된 비트맵을 생성했습니다.")
-        print(f"팁: 생성된 비트맵이 너무 어렵거나 쉬우면 --density 와 --chord-chance 옵션을 조절해보세요.")
+# 난이도별 (density, chord_chance), 파일 이름은 beat.py 곡 목록과 같은 <이름>_<난이도>_map.txt
+DIFFICULTIES = {
+    "easy": (0.4, 0.05),
+    "normal": (0.7, 0.15),
+    "hard": (1.0, 0.3),
+}
+
+
+def find_audio_files(inputs):
+    """파일, 폴더, 글롭 패턴을 받아 음악 파일 목록으로 펼침"""
+    files = []
+    for pattern in inputs:
+        paths = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+            elif path.lower().endswith(AUDIO_EXTENSIONS):
+                files.append(path)
+    return sorted(set(files))
+
+
+def chart_paths(mp3_path, out_dir=None):
+    folder = out_dir or os.path.dirname(mp3_path)
+    stem = os.path.splitext(os.path.basename(mp3_path))[0]
+    return {name: os.path.join(folder, f"{stem}_{name}_map.txt") for name in DIFFICULTIES}
 
+
+def is_up_to_date(mp3_path, outputs):
+    """모든 난이도 비트맵이 음악 파일보다 나중에 만들어졌으면 True"""
+    source_mtime = os.path.getmtime(mp3_path)
+    return all(os.path.exists(path) and os.path.getmtime(path) >= source_mtime for path in outputs.values())
+
+
+def song_seed(seed, mp3_path, difficulty):
+    """일괄 생성에서 곡/난이도마다 다른, 하지만 실행 순서와 상관없이 항상 같은 시드"""
+    if seed is None:
+        return None
+    name = os.path.basename(mp3_path).encode()
+    return [seed, zlib.crc32(name), list(DIFFICULTIES).index(difficulty)]
+
+
+def create_charts(mp3_path, outputs, stream=False, use_cache=True, seed=None):
+    """곡을 한 번만 분석해서 모든 난이도 비트맵을 만듦 -> (곡, {난이도: 노트 수} 또는 오류 메시지)"""
+    try:
+        analysis = analyze(mp3_path, stream, use_cache)
+        counts = {}
+        for name, path in outputs.items():
+            density, chord_chance = DIFFICULTIES[name]
+            notes = generate_notes(analysis, density, chord_chance, song_seed(seed, mp3_path, name))
+            counts[name] = write_beatmap(path, mp3_path, notes)
+        return mp3_path, counts
     except Exception as e:
-        print(f"오류가 발생했습니다: {e}")
-        print("librosa 또는 ffmpeg 설치에 문제가 없는지 확인해주세요.")
+        return mp3_path, f"{type(e).__name__}: {e}"
+
+
+def create_beatmaps(inputs, out_dir=None, jobs=None, stream=False, force=False, use_cache=True, seed=None):
+    """여러 곡의 비트맵을 프로세스 풀에서 나누어 생성
+
+    곡마다 디코딩과 온셋 분석을 한 번만 하고, 각 프로세스는 librosa를 한 번만 불러온 뒤
+    여러 곡을 이어서 처리합니다.
+    """
+    files = find_audio_files(inputs)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    tasks = []
+    for mp3_path in files:
+        outputs = chart_paths(mp3_path, out_dir)
+        if force or not is_up_to_date(mp3_path, outputs):
+            tasks.append((mp3_path, outputs))
+    print(f"곡 {len(files)}개 중 {len(tasks)}개를 생성합니다 (나머지는 이미 최신).")
+    if not tasks:
+        return
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(create_charts, mp3_path, outputs, stream, use_cache, seed) for mp3_path, outputs in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            mp3_path, result = future.result()
+            name = os.path.basename(mp3_path)
+            if isinstance(result, str):
+                failed += 1
+                print(f"[{done}/{len(tasks)}] 오류: {name}: {result}")
+            else:
+                counts = ", ".join(f"{level} {count}" for level, count in result.items())
+                print(f"[{done}/{len(tasks)}] {name}: {counts}")
+
+    print(f"완료! 성공 {len(tasks) - failed}개, 실패 {failed}개")
 
 
 if __name__ == "__main__":
@@ -87,7 +488,9 @@ if __name__ == "__main__":
         formatter_class=argparse.RawTextHelpFormatter
     )
 
-    parser.add_argument("mp3_file", help="분석할 MP3 파일의 경로")
+    parser.add_argument("mp3_file", nargs="+",
+                        help="분석할 MP3 파일의 경로\n"
+                             "폴더나 글롭 패턴(\"music/*.mp3\"), 여러 파일을 주면 일괄 생성 모드로 동작합니다.")
 
     parser.add_argument(
         "-o", "--output",
@@ -111,6 +514,69 @@ if __name__ == "__main__":
              "값이 높을수록 코드가 더 자주 나옵니다."
     )
 
+    parser.add_argument(
+        "-s", "--stream",
+        action="store_true",
+        help="곡을 블록 단위로 읽으며 분석합니다 (긴 음원용).\n"
+             "오디오는 블록 하나만 메모리에 올리고, 결과는 전체 분석과 같습니다."
+    )
+
+    parser.add_argument(
+        "-b", "--batch",
+        action="store_true",
+        help="일괄 생성 모드: 곡마다 easy/normal/hard 비트맵(<이름>_<난이도>_map.txt)을 만듭니다.\n"
+             "이미 최신인 비트맵은 건너뜁니다."
+    )
+
+    parser.add_argument(
+        "--out-dir",
+        help="일괄 생성 모드에서 비트맵을 저장할 폴더 (기본값: 음악 파일과 같은 폴더)"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="일괄 생성 모드에서 사용할 프로세스 수 (기본값: CPU 코어 수)"
+    )
+
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="일괄 생성 모드에서 최신인 비트맵도 다시 만듭니다."
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="저장된 분석 결과(<이름>.analysis.npz)를 쓰지 않고 다시 분석합니다."
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="난수 시드, 같은 값을 주면 같은 비트맵이 만들어집니다."
+    )
+
+    parser.add_argument(
+        "--check-stream",
+        action="store_true",
+        help="비트맵을 만들지 않고, 곡마다 스트리밍 분석과 전체 분석의 온셋이 같은지만 확인합니다."
+    )
+
     args = parser.parse_args()
 
-    create_beatmap(args.mp3_file, args.output, args.density, args.chord_chance)
+    if args.check_stream:
+        failed = 0
+        for path in find_audio_files(args.mp3_file):
+            problems = check_stream(path)
+            failed += bool(problems)
+            print(f"{'실패' if problems else '통과'}: {os.path.basename(path)}" + "".join(f" ({problem})" for problem in problems))
+        raise SystemExit(1 if failed else 0)
+
+    single = args.mp3_file[0]
+    if args.batch or len(args.mp3_file) > 1 or os.path.isdir(single) or glob.has_magic(single):
+        create_beatmaps(args.mp3_file, args.out_dir, args.jobs, args.stream, args.force, not args.no_cache, args.seed)
+    else:
+        create_beatmap(single, args.output, args.density, args.chord_chance, args.stream, not args.no_cache, args.seed)
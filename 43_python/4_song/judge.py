@@ -0,0 +1,199 @@
+"""리듬 게임 판정 엔진 (pygame 없이 동작)
+
+레인마다 노트 시간을 정렬된 배열로 들고, 두 개의 인덱스로 범위를 관리합니다.
+
+- head: 아직 판정되지 않은 첫 노트 (그 앞은 모두 판정 끝)
+- tail: 아직 화면에 나오지 않은 첫 노트 (head ~ tail 사이가 화면에 보이는 노트)
+
+키 입력은 [head, tail) 구간을 이분 탐색해서 판정 범위 안의 가장 가까운 노트를 찾고,
+Miss는 head를 앞으로 밀기만 하면 되므로 매 프레임 리스트를 복사하거나 지울 필요가 없습니다.
+
+롱노트는 시작을 일반 노트처럼 판정한 뒤, 레인별 배열(hold_notes, hold_ends)에 누르고 있는
+노트를 기록해 두고 끝을 한 번 더 판정합니다 (롱노트 하나 = 판정 두 번).
+- 끝 시각 근처(판정 범위 안)에서 떼면 오차로 판정, 그보다 일찍 떼면 Miss
+- 끝 시각까지 누르고 있으면 Perfect
+"""
+from array import array
+from bisect import bisect_left
+
+# (이름, 허용 오차 ms, 점수) - 좁은 범위부터
+DEFAULT_WINDOWS = (("Perfect", 35, 300), ("Great", 70, 200), ("Good", 100, 100))
+
+NOT_JUDGED = 0
+MISS = 255  # judged 배열에 기록하는 Miss 값 (그 외에는 windows 인덱스 + 1)
+NO_HOLD = -1
+
+
+class Judge:
+    def __init__(self, times, lanes, lane_count, windows=DEFAULT_WINDOWS, ends=None):
+        self.times = times
+        self.lanes = lanes
+        self.ends = ends if ends is not None else array('i', bytes(4 * len(times)))  # 0이면 일반 노트
+        self.lane_count = lane_count
+        self.windows = windows
+        self.max_window = windows[-1][1]
+
+        # 레인별 노트 시간 / 전체 노트 번호 (times가 정렬되어 있으므로 레인별로도 정렬됨)
+        self.lane_times = [array('i') for _ in range(lane_count)]
+        self.lane_notes = [array('i') for _ in range(lane_count)]
+        for index, (t, lane) in enumerate(zip(times, lanes)):
+            self.lane_times[lane].append(t)
+            self.lane_notes[lane].append(index)
+
+        self.reset()
+
+    def reset(self):
+        self.judged = bytearray(len(self.times))  # 노트별 판정 결과
+        self.heads = [0] * self.lane_count
+        self.tails = [0] * self.lane_count
+        self.spawn_cursor = 0
+
+        # 레인별로 지금 누르고 있는 롱노트 (없으면 NO_HOLD)와 그 끝 시각
+        self.hold_notes = array('i', [NO_HOLD] * self.lane_count)
+        self.hold_ends = array('i', [0] * self.lane_count)
+
+        self.score = 0
+        self.combo = 0
+        self.max_combo = 0
+        self.counts = {name: 0 for name, _, _ in self.windows}
+        self.counts["Miss"] = 0
+
+    @property
+    def finished(self):
+        return all(head == len(t) for head, t in zip(self.heads, self.lane_times)) and \
+            all(note == NO_HOLD for note in self.hold_notes)
+
+    def spawn(self, until):
+        """시간이 until 이하인 노트를 화면에 내보내고, 새로 나온 노트 번호들을 반환"""
+        times = self.times
+        start = self.spawn_cursor
+        cursor = start
+        while cursor < len(times) and times[cursor] <= until:
+            self.tails[self.lanes[cursor]] += 1
+            cursor += 1
+        self.spawn_cursor = cursor
+        return range(start, cursor)
+
+    def hit(self, lane, now):
+        """lane을 now(ms)에 눌렀을 때의 판정 -> (판정 이름, 노트 번호), 해당 노트가 없으면 None"""
+        times = self.lane_times[lane]
+        notes = self.lane_notes[lane]
+        head = self.heads[lane]
+        tail = self.tails[lane]
+        judged = self.judged
+
+        # 판정 범위 안에서 가장 가까운, 아직 판정되지 않은 노트
+        best = -1
+        best_error = self.max_window + 1
+        i = bisect_left(times, now - self.max_window, head, tail)
+        while i < tail:
+            error = abs(times[i] - now)
+            if error >= best_error:
+                break  # 시간순이므로 이후 노트는 더 멀어짐
+            if not judged[notes[i]]:
+                best, best_error = i, error
+            i += 1
+        if best < 0:
+            return None
+
+        note = notes[best]
+        name = self._judge(best_error)
+        judged[note] = self._rank(name)
+        if self.ends[note]:
+            if self.hold_notes[lane] != NO_HOLD:
+                self._miss_hold_end(lane)  # 떼지 않고 다음 롱노트를 누른 경우 (정상 입력에서는 없음)
+            self.hold_notes[lane] = note
+            self.hold_ends[lane] = self.ends[note]
+
+        if best == head:
+            self._advance_head(lane)
+        return name, note
+
+    def release(self, lane, now):
+        """lane을 now(ms)에 뗐을 때 롱노트 끝 판정 -> (판정 이름, 노트 번호), 누르던 롱노트가 없으면 None"""
+        note = self.hold_notes[lane]
+        if note == NO_HOLD:
+            return None
+        self.hold_notes[lane] = NO_HOLD
+        error = self.hold_ends[lane] - now
+        if error > self.max_window:
+            self._add_miss(1)  # 너무 일찍 뗌
+            return "Miss", note
+        return self._judge(abs(error)), note
+
+    def expire(self, now):
+        """now까지 지나간 일을 시간순으로 처리 -> (Miss된 노트 번호들, 끝까지 눌러서 끝난 롱노트 번호들)
+
+        - 판정 범위를 지나친 노트는 Miss (롱노트면 끝도 Miss)
+        - 끝 시각까지 누르고 있던 롱노트는 끝을 Perfect로 판정
+        Miss와 롱노트 완료가 섞여 있으면 시각 순서대로 처리하므로, 몇 ms마다 부르든 콤보가 같게 나옵니다.
+        """
+        due = []  # (시각, 종류, 레인, 노트 번호)
+        judged = self.judged
+        limit = now - self.max_window
+        for lane in range(self.lane_count):
+            times = self.lane_times[lane]
+            notes = self.lane_notes[lane]
+            head = self.heads[lane]
+            tail = self.tails[lane]
+            while head < tail and times[head] < limit:
+                note = notes[head]
+                if not judged[note]:
+                    due.append((times[head] + self.max_window, 0, lane, note))
+                head += 1
+            self.heads[lane] = head
+            self._advance_head(lane)
+
+            if self.hold_notes[lane] != NO_HOLD and self.hold_ends[lane] <= now:
+                due.append((self.hold_ends[lane], 1, lane, self.hold_notes[lane]))
+
+        if not due:
+            return (), ()
+        if len(due) > 1:
+            due.sort()
+
+        missed, completed = [], []
+        for _, kind, lane, note in due:
+            if kind == 0:
+                judged[note] = MISS
+                self._add_miss(2 if self.ends[note] else 1)
+                missed.append(note)
+            else:
+                self.hold_notes[lane] = NO_HOLD
+                self._judge(0)
+                completed.append(note)
+        return missed, completed
+
+    def _judge(self, error):
+        """오차(ms)로 판정하고 점수/콤보에 반영, 판정 이름을 반환"""
+        for name, window, points in self.windows:
+            if error <= window:
+                break
+        self.score += points
+        self.combo += 1
+        self.max_combo = max(self.max_combo, self.combo)
+        self.counts[name] += 1
+        return name
+
+    def _rank(self, name):
+        for rank, (window_name, _, _) in enumerate(self.windows):
+            if window_name == name:
+                return rank + 1
+        return MISS
+
+    def _add_miss(self, count):
+        self.combo = 0
+        self.counts["Miss"] += count
+
+    def _miss_hold_end(self, lane):
+        self.hold_notes[lane] = NO_HOLD
+        self._add_miss(1)
+
+    def _advance_head(self, lane):
+        # 가까운 노트를 먼저 쳐서 생긴 판정 끝난 노트들을 건너뜀
+        notes = self.lane_notes[lane]
+        head = self.heads[lane]
+        tail = self.tails[lane]
+        while head < tail and self.judged[notes[head]]:
+            head += 1
+        self.heads[lane] = head
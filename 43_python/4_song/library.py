@@ -0,0 +1,163 @@
+"""곡 폴더를 훑어 곡 목록 인덱스를 만들고 저장하는 모듈
+
+곡 폴더 구성 (파일 이름으로 곡과 비트맵을 짝지음)
+- 음악: <이름>.mp3 / .ogg / .wav
+- 비트맵: <이름>_<난이도>_map.txt  (예: song.mp3 -> song_easy_map.txt, song_hard_map.txt)
+
+인덱스(library_index.json)에는 곡마다 제목, 길이, 난이도별 레인 수/노트 수, 체크섬을 저장해 두고,
+다음 실행 때는 수정 시각이나 크기가 바뀐 파일만 다시 읽습니다.
+음악 파일은 곡을 고른 뒤에 처음 불러오고, 한 번 읽은 비트맵은 메모리에 남겨 재시작할 때 다시 읽지 않습니다.
+"""
+import hashlib
+import json
+import os
+
+from chart import ChartError, load_beatmap
+
+AUDIO_EXTENSIONS = (".mp3", ".ogg", ".wav")
+CHART_SUFFIX = "_map.txt"
+INDEX_FILE = "library_index.json"
+INDEX_VERSION = 2
+DIFFICULTY_ORDER = ("easy", "normal", "hard")
+
+
+def file_checksum(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_duration(path):
+    """곡 길이(초), 읽을 수 없으면 0
+
+    파일 헤더만 읽으므로 곡 전체를 디코딩하지 않음 (soundfile은 librosa와 함께 설치됨, mp3/ogg/wav 모두 읽음)
+    """
+    try:
+        import soundfile
+        return round(soundfile.info(path).duration, 2)
+    except Exception:
+        return 0
+
+
+def difficulty_key(name):
+    if name in DIFFICULTY_ORDER:
+        return (DIFFICULTY_ORDER.index(name), name)
+    return (len(DIFFICULTY_ORDER), name)
+
+
+def is_stale(entry, stat):
+    return entry is None or entry.get("mtime") != stat.st_mtime_ns or entry.get("size") != stat.st_size
+
+
+class Library:
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.index_path = os.path.join(self.folder, INDEX_FILE)
+        self.songs = []   # 제목순으로 정렬된 곡 정보 (dict)
+        self._charts = {}  # (비트맵 경로) -> Chart
+        self._index = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._index = data.get("songs", {})
+            self._sort()
+
+    def save(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "songs": self._index}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.index_path)
+
+    def refresh(self):
+        """곡 폴더를 다시 훑어 바뀐 파일만 인덱스에 반영하고, 바뀐 곡 수를 반환"""
+        names = os.listdir(self.folder)
+        charts = {}
+        for name in names:
+            if name.endswith(CHART_SUFFIX):
+                stem, _, difficulty = name[:-len(CHART_SUFFIX)].rpartition('_')
+                if stem:
+                    charts.setdefault(stem, {})[difficulty] = name
+
+        index = {}
+        changed = 0
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in AUDIO_EXTENSIONS or stem not in charts:
+                continue
+            old = self._index.get(name)
+            entry, updated = self._scan_song(name, stem, charts[stem], old)
+            index[name] = entry
+            changed += updated
+
+        changed += len(set(self._index) - set(index))  # 지워진 곡
+        self._index = index
+        self._sort()
+        if changed or not os.path.exists(self.index_path):
+            self.save()
+        return changed
+
+    def _scan_song(self, name, stem, chart_files, old):
+        path = os.path.join(self.folder, name)
+        stat = os.stat(path)
+        updated = False
+        if is_stale(old, stat):
+            entry = {
+                "title": stem.replace('_', ' '),
+                "duration": audio_duration(path),
+                "checksum": file_checksum(path),
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "charts": {},
+            }
+            updated = True
+        else:
+            entry = dict(old, charts={})
+
+        old_charts = old.get("charts", {}) if old else {}
+        for difficulty, chart_name in chart_files.items():
+            chart_path = os.path.join(self.folder, chart_name)
+            chart_stat = os.stat(chart_path)
+            chart_entry = old_charts.get(difficulty)
+            if is_stale(chart_entry, chart_stat) or chart_entry.get("file") != chart_name:
+                self._charts.pop(chart_path, None)
+                try:
+                    chart = self.chart_arrays(chart_path)
+                except ChartError as e:
+                    print(f"경고: {e}")
+                    continue
+                chart_entry = {"file": chart_name, "notes": len(chart.times), "lanes": chart.lane_count,
+                               "mtime": chart_stat.st_mtime_ns, "size": chart_stat.st_size}
+                updated = True
+            entry["charts"][difficulty] = chart_entry
+        if set(entry["charts"]) != set(old_charts):
+            updated = True
+        return entry, updated
+
+    def _sort(self):
+        self.songs = []
+        for name, entry in sorted(self._index.items(), key=lambda item: item[1]["title"].lower()):
+            if entry["charts"]:
+                self.songs.append(dict(entry, audio=name))
+
+    def difficulties(self, song):
+        return sorted(song["charts"], key=difficulty_key)
+
+    def audio_path(self, song):
+        return os.path.join(self.folder, song["audio"])
+
+    def chart_arrays(self, chart_path):
+        if chart_path not in self._charts:
+            self._charts[chart_path] = load_beatmap(chart_path)
+        return self._charts[chart_path]
+
+    def chart(self, song, difficulty):
+        """곡/난이도의 Chart, 한 번 읽은 비트맵은 재사용"""
+        return self.chart_arrays(os.path.join(self.folder, song["charts"][difficulty]["file"]))
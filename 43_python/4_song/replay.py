@@ -0,0 +1,217 @@
+"""리듬 게임 리플레이 저장과 점수 검증
+
+리플레이에는 키 입력마다 (오디오 시계 시각, 레인)을 기록합니다. 롱노트를 누르고 있다가 뗀 것도
+레인에 RELEASE 비트를 켜서 같이 기록합니다. 판정은 입력 시각만으로 정해지므로
+(Miss와 롱노트 완료는 입력 직전과 곡 끝에서 같은 규칙으로 처리) 같은 비트맵에 다시 판정하면 점수가 그대로 나와야 합니다.
+
+리플레이 파일 구조 (리틀 엔디언)
+- 헤더: 매직(b"BRPL"), 버전, 레인 수, 비트맵 해시(SHA-1), 판정 범위 3개(ms),
+  기록된 점수/최대 콤보/Perfect/Great/Good/Miss, 입력 수, 기록 시각, 지연 보정값
+- 본문(zlib 압축): 입력 시각 차이 int32 x 입력 수 (0.1ms 단위), 레인 uint8 x 입력 수 (떼기는 | RELEASE)
+
+사용법: python replay.py <비트맵 또는 폴더>... <리플레이.rpl 또는 폴더>...
+        (리플레이마다 해시가 같은 비트맵을 찾아 다시 판정하고, 기록된 점수와 비교)
+"""
+import hashlib
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from judge import DEFAULT_WINDOWS, Judge
+
+MAGIC = b"BRPL"
+VERSION = 1
+HEADER = struct.Struct("<4sHB20s3H6IIdf")
+TIME_SCALE = 10  # 입력 시각을 0.1ms 단위 정수로 저장
+REPLAY_EXTENSION = ".rpl"
+JUDGEMENT_NAMES = ("Perfect", "Great", "Good", "Miss")
+RELEASE = 0x80  # 레인 값에 켜면 키를 뗀 기록
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def chart_hash(times, lanes, ends=()):
+    """비트맵 내용의 SHA-1 (파일 형식(.txt/.chart)과 상관없이 노트가 같으면 같은 값)
+
+    롱노트가 없는 비트맵은 끝 시간을 넣지 않으므로 롱노트 지원 전에 저장한 리플레이도 그대로 맞습니다.
+    """
+    data = [array('i', times)]
+    if any(ends):
+        data.append(array('i', ends))
+    if sys.byteorder != 'little':
+        for values in data:
+            values.byteswap()
+    return hashlib.sha1(b"".join(values.tobytes() for values in data) + bytes(lanes)).digest()
+
+
+def quantize(now):
+    """입력 시각을 파일에 저장되는 정밀도(0.1ms)로 맞춤, 게임과 검증기가 같은 값으로 판정하도록"""
+    return round(now * TIME_SCALE) / TIME_SCALE
+
+
+class ReplayRecorder:
+    def __init__(self):
+        self.ticks = array('i')   # 입력 시각 (0.1ms 단위)
+        self.lanes = array('B')
+
+    def record(self, lane, now, release=False):
+        """키 입력(release=True면 뗌)을 기록하고, 판정에 쓸 (저장 정밀도로 맞춘) 시각을 반환"""
+        tick = round(now * TIME_SCALE)
+        self.ticks.append(tick)
+        self.lanes.append(lane | RELEASE if release else lane)
+        return tick / TIME_SCALE
+
+    def save(self, path, chart, judge, offset=0.0):
+        windows = [window for _, window, _ in judge.windows]
+        counts = [judge.counts.get(name, 0) for name in JUDGEMENT_NAMES]
+        deltas = array('i', [b - a for a, b in zip([0] + self.ticks.tolist(), self.ticks)])
+        if sys.byteorder != 'little':
+            deltas.byteswap()
+        header = HEADER.pack(MAGIC, VERSION, judge.lane_count, chart_hash(chart.times, chart.lanes, chart.ends),
+                             *windows, judge.score, judge.max_combo, *counts,
+                             len(self.ticks), time.time(), offset)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(zlib.compress(deltas.tobytes() + self.lanes.tobytes(), 9))
+
+
+def read_replay(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        (magic, version, lane_count, digest, w1, w2, w3, score, max_combo,
+         perfect, great, good, miss, count, recorded_at, offset) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{path}: 리플레이 파일 형식이 맞지 않습니다")
+        body = zlib.decompress(data[HEADER.size:])
+    except (struct.error, zlib.error):
+        raise ReplayError(f"{path}: 리플레이 파일이 손상되었습니다")
+    if len(body) != count * 5:
+        raise ReplayError(f"{path}: 입력 수가 맞지 않습니다")
+
+    deltas = array('i')
+    deltas.frombytes(body[:count * 4])
+    if sys.byteorder != 'little':
+        deltas.byteswap()
+    ticks = array('i')
+    total = 0
+    for delta in deltas:
+        total += delta
+        ticks.append(total)
+    return {
+        "lane_count": lane_count,
+        "chart_hash": digest,
+        "windows": (w1, w2, w3),
+        "score": score,
+        "max_combo": max_combo,
+        "counts": dict(zip(JUDGEMENT_NAMES, (perfect, great, good, miss))),
+        "ticks": ticks,
+        "lanes": array('B', body[count * 4:]),
+        "recorded_at": recorded_at,
+        "offset": offset,
+    }
+
+
+def rejudge(replay, chart):
+    """리플레이 입력으로 비트맵(Chart)을 다시 판정한 Judge를 반환
+
+    판정 범위와 레인 수는 리플레이 헤더가 아니라 게임과 비트맵의 값을 씁니다 (헤더는 고쳐 쓸 수 있으므로).
+    """
+    judge = Judge(chart.times, chart.lanes, chart.lane_count, DEFAULT_WINDOWS, chart.ends)
+    judge.spawn(float('inf'))  # 판정 범위(수백 ms)보다 훨씬 일찍 나오므로 처음부터 모두 내보내도 같음
+    for tick, lane in zip(replay["ticks"], replay["lanes"]):
+        now = tick / TIME_SCALE
+        judge.expire(now)
+        if lane & RELEASE:
+            if lane & ~RELEASE < judge.lane_count:
+                judge.release(lane & ~RELEASE, now)
+        elif lane < judge.lane_count:
+            judge.hit(lane, now)
+    judge.expire(float('inf'))
+    return judge
+
+
+def verify(replay, chart):
+    """다시 판정한 결과가 기록과 같은지 -> 다른 항목 목록 (같으면 빈 목록)"""
+    problems = []
+    windows = tuple(window for _, window, _ in DEFAULT_WINDOWS)
+    if tuple(replay["windows"]) != windows:
+        problems.append(f"판정 범위 {replay['windows']} != {windows}")
+    if replay["lane_count"] != chart.lane_count:
+        problems.append(f"레인 수 {replay['lane_count']} != {chart.lane_count}")
+    if problems:
+        return problems
+
+    judge = rejudge(replay, chart)
+    if judge.score != replay["score"]:
+        problems.append(f"점수 {replay['score']} != {judge.score}")
+    if judge.max_combo != replay["max_combo"]:
+        problems.append(f"최대 콤보 {replay['max_combo']} != {judge.max_combo}")
+    for name in JUDGEMENT_NAMES:
+        if judge.counts[name] != replay["counts"][name]:
+            problems.append(f"{name} {replay['counts'][name]} != {judge.counts[name]}")
+    return problems
+
+
+def expand(paths, extensions):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(extensions))
+        elif path.endswith(extensions):
+            files.append(path)
+    return files
+
+
+if __name__ == "__main__":
+    from chart import ChartError, load_beatmap
+
+    if len(sys.argv) < 3:
+        print("사용법: python replay.py <비트맵 또는 폴더>... <리플레이.rpl 또는 폴더>...")
+        sys.exit(1)
+
+    # 비트맵은 해시별로 한 번만 읽어 두고 모든 리플레이가 같이 씀
+    charts = {}
+    for path in expand(sys.argv[1:], (".txt", ".chart")):
+        try:
+            chart = load_beatmap(path)
+        except (OSError, ChartError) as e:
+            print(f"경고: {e}")
+            continue
+        charts[chart_hash(chart.times, chart.lanes, chart.ends)] = chart
+
+    replays = expand(sys.argv[1:], (REPLAY_EXTENSION,))
+    started = time.perf_counter()
+    ok = bad = unknown = 0
+    for path in replays:
+        try:
+            replay = read_replay(path)
+        except (OSError, ReplayError) as e:
+            print(f"실패: {e}")
+            bad += 1
+            continue
+        chart = charts.get(replay["chart_hash"])
+        if chart is None:
+            print(f"건너뜀: {path}: 맞는 비트맵이 없습니다")
+            unknown += 1
+            continue
+        try:
+            problems = verify(replay, chart)
+        except Exception as e:  # 파일 하나가 이상해도 나머지는 계속 검사
+            problems = [f"{type(e).__name__}: {e}"]
+        if problems:
+            print(f"실패: {path}: {', '.join(problems)}")
+            bad += 1
+        else:
+            ok += 1
+
+    elapsed = time.perf_counter() - started
+    print(f"리플레이 {len(replays)}개 검사 ({elapsed:.2f}초): 통과 {ok}, 실패 {bad}, 비트맵 없음 {unknown}")
+    sys.exit(1 if bad else 0)
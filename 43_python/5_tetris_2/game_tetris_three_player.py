@@ -3,9 +3,14 @@ import random
 import socket
 import threading
 import pickle
+import os
 import sys
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop, Interval
+
 # 게임 설정
 GRID_WIDTH = 10
 GRID_HEIGHT = 20
@@ -13,6 +18,10 @@ CELL_SIZE = 25  # 3명이 들어가도록 크기 조정
 WINDOW_WIDTH = CELL_SIZE * GRID_WIDTH * 3 + 250  # 3명 화면 + 여백
 WINDOW_HEIGHT = CELL_SIZE * GRID_HEIGHT + 120
 
+# 프레임 설정
+FPS = 60      # 화면 갱신 상한
+SIM_HZ = 60   # 게임 로직 갱신 횟수 (초당, FPS와 무관)
+
 # 색상 정의
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -54,6 +63,7 @@ def get_local_ip():
 class Tetris:
     def __init__(self, x_offset):
         self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.heights = HeightMap(self.grid)  # 열마다 가장 위 블록의 행 번호
         self.current_piece = None
         self.current_x = 0
         self.current_y = 0
@@ -120,15 +130,26 @@ class Tetris:
     def hard_drop(self):
         if not self.game_started:
             return
-        while self.move(0, 1):
-            pass
+        self.current_y = self.landing_y()
         self.lock_piece()
 
+    def landing_y(self):
+        """높이 맵으로 현재 블록이 떨어질 행을 바로 계산 (하드 드롭, 고스트 블록용)"""
+        cells = shape_cells(self.current_piece, self.current_x, self.current_y)
+        distance = self.heights.drop_distance(cells)
+        if distance is None:
+            # 다른 블록 아래로 들어가 있으면 한 칸씩 확인
+            distance = 0
+            while self.is_valid_position(y=self.current_y + distance + 1):
+                distance += 1
+        return self.current_y + distance
+
     def lock_piece(self):
         for row in range(len(self.current_piece)):
             for col in range(len(self.current_piece[row])):
                 if self.current_piece[row][col]:
                     self.grid[self.current_y + row][self.current_x + col] = self.current_shape + 1
+        self.heights.lock(shape_cells(self.current_piece, self.current_x, self.current_y))
 
         self.clear_lines()
         self.spawn_piece()
@@ -147,13 +168,14 @@ class Tetris:
             new_grid.insert(0, [0 for _ in range(GRID_WIDTH)])
 
         self.grid = new_grid
+        self.heights.clear_rows(self.grid, lines_cleared)
         self.score += lines_cleared * 100
 
     def start_game(self):
         self.game_started = True
         self.spawn_piece()
 
-    def draw(self, screen):
+    def draw(self, screen, ghost=False):
         # 게임 보드 그리기
         for y in range(GRID_HEIGHT):
             for x in range(GRID_WIDTH):
@@ -163,6 +185,15 @@ class Tetris:
                                    (self.x_offset + x * CELL_SIZE, y * CELL_SIZE + 60,
                                     CELL_SIZE - 1, CELL_SIZE - 1))
 
+        # 고스트 블록 (착지 위치), 상대방 보드는 네트워크로 받은 것이라 그리지 않음
+        if ghost and self.current_piece and not self.game_over and self.game_started:
+            ghost_y = self.landing_y()
+            color = COLORS[self.current_shape]
+            for x, y in shape_cells(self.current_piece, self.current_x, ghost_y):
+                pygame.draw.rect(screen, color,
+                               (self.x_offset + x * CELL_SIZE, y * CELL_SIZE + 60,
+                                CELL_SIZE - 1, CELL_SIZE - 1), 2)
+
         # 현재 블록 그리기
         if self.current_piece and not self.game_over and self.game_started:
             for row in range(len(self.current_piece)):
@@ -188,7 +219,7 @@ class NetworkGame:
     def __init__(self, player_type, host_ip='localhost', port=5555):
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        self.clock = pygame.time.Clock()
+        self.loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
         self.font = pygame.font.Font(None, 28)
         self.small_font = pygame.font.Font(None, 20)
 
@@ -211,7 +242,8 @@ class NetworkGame:
         self.ready_states = [False, False, False]
         self.all_ready = False
         self.countdown = -1
-        self.last_drop_time = 0
+        self.countdown_timer = Interval(1.0)  # 1초마다 카운트다운
+        self.drop_timer = Interval(0.5)       # 0.5초마다 자동 낙하
 
         # 연결 상태
         self.connections = [None, None, None]
@@ -350,6 +382,7 @@ class NetworkGame:
         # 모두 준비되었는지 확인
         if self.all_connected and all(self.ready_states) and not self.all_ready:
             self.all_ready = True
+            self.countdown_timer.reset()  # 이전에 쌓인 시간 없이 3초를 셈
             self.countdown = 3
 
     def handle_events(self):
@@ -372,25 +405,21 @@ class NetworkGame:
                     elif event.key == pygame.K_SPACE:
                         self.my_game.hard_drop()
 
-    def update(self):
-        current_time = pygame.time.get_ticks()
-
+    def update(self, dt):
         # 카운트다운 처리
         if self.all_ready and self.countdown > 0:
-            if current_time % 1000 < 20:
+            for _ in range(self.countdown_timer.tick(dt)):
                 self.countdown -= 1
                 if self.countdown == 0:
                     for game in self.games:
                         game.start_game()
+                    self.drop_timer.reset()
+                    break
 
         # 자동 낙하
         if self.my_game.game_started and not self.my_game.game_over:
-            if current_time - self.last_drop_time > 500:
+            for _ in range(self.drop_timer.tick(dt)):
                 self.my_game.drop()
-                self.last_drop_time = current_time
-
-        # 게임 상태 전송
-        self.broadcast_game_state()
 
     def draw(self):
         self.screen.fill(BLACK)
@@ -450,7 +479,7 @@ class NetworkGame:
 
         # 게임 그리기
         for game in self.games:
-            game.draw(self.screen)
+            game.draw(self.screen, ghost=game is self.my_game)
 
         # 점수 표시
         for i in range(3):
@@ -469,9 +498,13 @@ class NetworkGame:
     def run(self):
         while self.running:
             self.handle_events()
-            self.update()
+            for _ in range(self.loop.advance()):
+                self.update(self.loop.step)
+
+            # 게임 상태 전송 (프레임당 한 번)
+            self.broadcast_game_state()
             self.draw()
-            self.clock.tick(60)
+            self.loop.idle()
 
         # 정리
         if hasattr(self, 'server_socket'):
@@ -1,6 +1,13 @@
+import os
+import sys
+
 import pygame
 import random
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop, Interval
+
 pygame.init()
 
 # 게임 설정
@@ -9,6 +16,8 @@ SCREEN_HEIGHT = 600
 GRID_SIZE = 30
 COLUMNS = 10
 ROWS = 20
+FPS = 60      # 화면 갱신 상한
+SIM_HZ = 60   # 게임 로직 갱신 횟수 (초당, FPS와 무관)
 
 # 색상
 BLACK = (0, 0, 0)
@@ -52,6 +61,7 @@ class Player:
     def __init__(self, offset_x):
         self.offset_x = offset_x
         self.grid = [[0]*COLUMNS for _ in range(ROWS)]
+        self.heights = HeightMap(self.grid)  # 열마다 가장 위 블록의 행 번호
         self.tetromino = Tetromino(3, 0)
         self.next_tetromino = Tetromino(3, 0)
         self.game_over = False
@@ -72,6 +82,7 @@ class Player:
             for x, cell in enumerate(row):
                 if cell:
                     self.grid[y + self.tetromino.y][x + self.tetromino.x] = self.tetromino.color
+        self.heights.lock(shape_cells(self.tetromino.shape, self.tetromino.x, self.tetromino.y))
         self.clear_lines()
         self.tetromino = self.next_tetromino
         self.next_tetromino = Tetromino(3, 0)
@@ -84,13 +95,26 @@ class Player:
         for _ in range(lines_cleared):
             new_grid.insert(0, [0]*COLUMNS)
         self.grid = new_grid
+        self.heights.clear_rows(self.grid, lines_cleared)
         return lines_cleared
 
+    def landing_y(self):
+        """높이 맵으로 현재 블록이 떨어질 행을 바로 계산 (고스트 블록용)"""
+        t = self.tetromino
+        distance = self.heights.drop_distance(shape_cells(t.shape, t.x, t.y))
+        if distance is None:
+            # 다른 블록 아래로 들어가 있으면 한 칸씩 확인
+            distance = 0
+            while self.valid_position(t.shape, 0, distance + 1):
+                distance += 1
+        return t.y + distance
+
     def add_garbage(self, lines=1):
         for _ in range(lines):
             self.grid.pop(0)
             garbage = [random.choice([0, 255]) for _ in range(COLUMNS)]
             self.grid.append([GRAY if cell == 255 else 0 for cell in garbage])
+        self.heights.raise_rows(self.grid, lines)
 
 def draw_grid(screen, player, x_offset):
     for y, row in enumerate(player.grid):
@@ -101,6 +125,17 @@ def draw_grid(screen, player, x_offset):
             pygame.draw.rect(screen, BLACK, pygame.Rect(
                 x_offset + x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 1)
 
+    # 고스트 블록 (착지 위치)
+    ghost_y = player.landing_y()
+    for y, row in enumerate(player.tetromino.shape):
+        for x, cell in enumerate(row):
+            if cell:
+                pygame.draw.rect(screen, player.tetromino.color, pygame.Rect(
+                    x_offset + (player.tetromino.x + x) * GRID_SIZE,
+                    (ghost_y + y) * GRID_SIZE,
+                    GRID_SIZE, GRID_SIZE
+                ), 3)
+
     # Draw current tetromino
     for y, row in enumerate(player.tetromino.shape):
         for x, cell in enumerate(row):
@@ -113,35 +148,32 @@ def draw_grid(screen, player, x_offset):
 
 def main():
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    clock = pygame.time.Clock()
 
     p1 = Player(0)
     p2 = Player(SCREEN_WIDTH // 2)
 
-    fall_time = 0
-    fall_speed = 0.5
+    loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
+    gravity = Interval(0.5)  # 0.5초마다 한 칸 낙하
 
     running = True
     while running:
         screen.fill(BLACK)
-        fall_time += clock.get_rawtime()
-        clock.tick()
-
-        if fall_time / 1000 >= fall_speed:
-            fall_time = 0
-            for player in [p1, p2]:
-                if not player.game_over:
-                    if player.valid_position(player.tetromino.shape, 0, 1):
-                        player.tetromino.y += 1
-                    else:
-                        player.place_tetromino()
-                        # 공격 시스템
-                        lines = player.clear_lines()
-                        if lines > 0:
-                            if player == p1:
-                                p2.add_garbage(lines)
-                            else:
-                                p1.add_garbage(lines)
+
+        for _ in range(loop.advance()):
+            for _ in range(gravity.tick(loop.step)):
+                for player in [p1, p2]:
+                    if not player.game_over:
+                        if player.valid_position(player.tetromino.shape, 0, 1):
+                            player.tetromino.y += 1
+                        else:
+                            player.place_tetromino()
+                            # 공격 시스템
+                            lines = player.clear_lines()
+                            if lines > 0:
+                                if player == p1:
+                                    p2.add_garbage(lines)
+                                else:
+                                    p1.add_garbage(lines)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -186,6 +218,7 @@ def main():
         draw_grid(screen, p2, SCREEN_WIDTH // 2 + 50)
 
         pygame.display.update()
+        loop.idle()
 
     pygame.quit()
 
@@ -1,6 +1,14 @@
+import os
+import sys
+
 import pygame
 import random
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.controls import PlayerInput, event_clock, load_controls
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop, Interval
+
 pygame.init()
 
 # 화면 설정
@@ -9,6 +17,11 @@ SCREEN_HEIGHT = 600
 GRID_SIZE = 30
 COLUMNS = 10
 ROWS = 20
+FPS = 60      # 화면 갱신 상한
+SIM_HZ = 60   # 게임 로직 갱신 횟수 (초당, FPS와 무관)
+
+# 키 설정 파일 (없으면 기본값: P1 = W/A/S/D, P2 = 방향키)
+CONTROLS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "controls.json")
 
 # 색상 정의
 BLACK = (0, 0, 0)
@@ -44,6 +57,7 @@ class Player:
     def __init__(self, offset_x):
         self.offset_x = offset_x
         self.grid = [[0]*COLUMNS for _ in range(ROWS)]
+        self.heights = HeightMap(self.grid)  # 열마다 가장 위 블록의 행 번호
         self.tetromino = Tetromino(3, 0)
         self.next_tetromino = Tetromino(3, 0)
         self.game_over = False
@@ -65,6 +79,7 @@ class Player:
             for x, cell in enumerate(row):
                 if cell:
                     self.grid[y + self.tetromino.y][x + self.tetromino.x] = self.tetromino.color
+        self.heights.lock(shape_cells(self.tetromino.shape, self.tetromino.x, self.tetromino.y))
         lines = self.clear_lines()
         self.tetromino = self.next_tetromino
         self.next_tetromino = Tetromino(3, 0)
@@ -72,14 +87,45 @@ class Player:
             self.game_over = True
         return lines
 
+    def handle_actions(self, actions):
+        """한 step 동안 쌓인 입력을 한 번에 처리"""
+        tetromino = self.tetromino
+        for action in actions:
+            if action == "left":
+                if self.valid_position(tetromino.shape, -1, 0):
+                    tetromino.x -= 1
+            elif action == "right":
+                if self.valid_position(tetromino.shape, 1, 0):
+                    tetromino.x += 1
+            elif action == "down":
+                if self.valid_position(tetromino.shape, 0, 1):
+                    tetromino.y += 1
+            elif action == "rotate":
+                shape = tetromino.shape
+                tetromino.rotate()
+                if not self.valid_position(tetromino.shape, 0, 0):
+                    tetromino.shape = shape
+
     def clear_lines(self):
         new_grid = [row for row in self.grid if any(cell == 0 for cell in row)]
         lines_cleared = ROWS - len(new_grid)
         for _ in range(lines_cleared):
             new_grid.insert(0, [0]*COLUMNS)
         self.grid = new_grid
+        self.heights.clear_rows(self.grid, lines_cleared)
         return lines_cleared
 
+    def landing_y(self):
+        """높이 맵으로 현재 블록이 떨어질 행을 바로 계산 (고스트 블록용)"""
+        t = self.tetromino
+        distance = self.heights.drop_distance(shape_cells(t.shape, t.x, t.y))
+        if distance is None:
+            # 다른 블록 아래로 들어가 있으면 한 칸씩 확인
+            distance = 0
+            while self.valid_position(t.shape, 0, distance + 1):
+                distance += 1
+        return t.y + distance
+
     def add_garbage(self, lines=1):
         for _ in range(lines):
             self.grid.pop(0)
@@ -89,6 +135,7 @@ class Player:
                 if i != hole:
                     garbage[i] = GRAY
             self.grid.append(garbage)
+        self.heights.raise_rows(self.grid, lines)
 
 def draw_grid(screen, player, x_offset):
     for y, row in enumerate(player.grid):
@@ -99,6 +146,17 @@ def draw_grid(screen, player, x_offset):
             pygame.draw.rect(screen, BLACK, pygame.Rect(
                 x_offset + x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 1)
 
+    # 고스트 블록 (착지 위치)
+    ghost_y = player.landing_y()
+    for y, row in enumerate(player.tetromino.shape):
+        for x, cell in enumerate(row):
+            if cell:
+                pygame.draw.rect(screen, player.tetromino.color, pygame.Rect(
+                    x_offset + (player.tetromino.x + x) * GRID_SIZE,
+                    (ghost_y + y) * GRID_SIZE,
+                    GRID_SIZE, GRID_SIZE
+                ), 3)
+
     for y, row in enumerate(player.tetromino.shape):
         for x, cell in enumerate(row):
             if cell:
@@ -111,91 +169,58 @@ def draw_grid(screen, player, x_offset):
 def main():
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("2인용 테트리스")
-    clock = pygame.time.Clock()
 
     p1 = Player(50)
     p2 = Player(SCREEN_WIDTH // 2 + 50)
 
-    fall_time = 0
-    fall_speed = 0.5
+    loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
+    gravity = Interval(0.5)  # 0.5초마다 한 칸 낙하
 
-    key_cooldown = 150  # ms
-    last_key_press_time = {
-        "p1_left": 0, "p1_right": 0, "p1_down": 0, "p1_rotate": 0,
-        "p2_left": 0, "p2_right": 0, "p2_down": 0, "p2_rotate": 0
-    }
+    controls = load_controls(CONTROLS_FILE)
+    players = [p1, p2]
+    inputs = [PlayerInput(bindings, controls["das"], controls["arr"])
+              for bindings in controls["players"]]
 
     running = True
     while running:
         screen.fill(BLACK)
-        delta_time = clock.tick(60)
-        fall_time += delta_time
-        current_time = pygame.time.get_ticks()
-
-        if fall_time / 1000 > fall_speed:
-            fall_time = 0
-            for player in [p1, p2]:
-                if not player.game_over:
-                    if player.valid_position(player.tetromino.shape, 0, 1):
-                        player.tetromino.y += 1
-                    else:
-                        lines = player.place_tetromino()
-                        if lines > 0:
-                            if player == p1:
-                                p2.add_garbage(lines)
-                            else:
-                                p1.add_garbage(lines)
 
+        # 입력은 일어난 시각(게임 시각)과 함께 큐에 넣어 두고, 실제 처리는 아래 고정 step에서 함
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        keys = pygame.key.get_pressed()
-
-        # Player 1
-        if not p1.game_over:
-            if keys[pygame.K_a] and current_time - last_key_press_time["p1_left"] > key_cooldown:
-                if p1.valid_position(p1.tetromino.shape, -1, 0):
-                    p1.tetromino.x -= 1
-                last_key_press_time["p1_left"] = current_time
-            if keys[pygame.K_d] and current_time - last_key_press_time["p1_right"] > key_cooldown:
-                if p1.valid_position(p1.tetromino.shape, 1, 0):
-                    p1.tetromino.x += 1
-                last_key_press_time["p1_right"] = current_time
-            if keys[pygame.K_s] and current_time - last_key_press_time["p1_down"] > key_cooldown:
-                if p1.valid_position(p1.tetromino.shape, 0, 1):
-                    p1.tetromino.y += 1
-                last_key_press_time["p1_down"] = current_time
-            if keys[pygame.K_w] and current_time - last_key_press_time["p1_rotate"] > key_cooldown:
-                p1.tetromino.rotate()
-                if not p1.valid_position(p1.tetromino.shape, 0, 0):
-                    p1.tetromino.rotate()
-                last_key_press_time["p1_rotate"] = current_time
-
-        # Player 2
-        if not p2.game_over:
-            if keys[pygame.K_LEFT] and current_time - last_key_press_time["p2_left"] > key_cooldown:
-                if p2.valid_position(p2.tetromino.shape, -1, 0):
-                    p2.tetromino.x -= 1
-                last_key_press_time["p2_left"] = current_time
-            if keys[pygame.K_RIGHT] and current_time - last_key_press_time["p2_right"] > key_cooldown:
-                if p2.valid_position(p2.tetromino.shape, 1, 0):
-                    p2.tetromino.x += 1
-                last_key_press_time["p2_right"] = current_time
-            if keys[pygame.K_DOWN] and current_time - last_key_press_time["p2_down"] > key_cooldown:
-                if p2.valid_position(p2.tetromino.shape, 0, 1):
-                    p2.tetromino.y += 1
-                last_key_press_time["p2_down"] = current_time
-            if keys[pygame.K_UP] and current_time - last_key_press_time["p2_rotate"] > key_cooldown:
-                p2.tetromino.rotate()
-                if not p2.valid_position(p2.tetromino.shape, 0, 0):
-                    p2.tetromino.rotate()
-                last_key_press_time["p2_rotate"] = current_time
+            now = loop.to_sim_time(event_clock(event)) * 1000
+            for player_input in inputs:
+                player_input.push(event, now)
+
+        step_time = loop.sim_time
+        for _ in range(loop.advance()):
+            step_time += loop.step
+            for player, player_input in zip(players, inputs):
+                actions = player_input.poll(step_time * 1000)
+                if actions and not player.game_over:
+                    player.handle_actions(actions)
+
+            for _ in range(gravity.tick(loop.step)):
+                for player, player_input in zip(players, inputs):
+                    if not player.game_over:
+                        if player.valid_position(player.tetromino.shape, 0, 1):
+                            player.tetromino.y += 1
+                        else:
+                            lines = player.place_tetromino()
+                            if player.game_over:
+                                player_input.clear()
+                            if lines > 0:
+                                if player == p1:
+                                    p2.add_garbage(lines)
+                                else:
+                                    p1.add_garbage(lines)
 
         draw_grid(screen, p1, p1.offset_x)
         draw_grid(screen, p2, p2.offset_x)
 
         pygame.display.update()
+        loop.idle()
 
     pygame.quit()
 
@@ -1,3 +1,6 @@
+import os
+import sys
+
 import pygame
 import random
 import socket
@@ -6,6 +9,10 @@ import threading
 import struct
 from queue import Queue, Empty
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.heightmap import HeightMap
+from tetris_common.loop import FixedStepLoop
+
 # --- 1. 기본 설정 및 상수 ---
 pygame.font.init()
 
@@ -16,6 +23,10 @@ PLAY_WIDTH = 300  # 10 blocks
 PLAY_HEIGHT = 600 # 20 blocks
 BLOCK_SIZE = 30
 
+# 프레임 설정
+FPS = 60      # 화면 갱신 상한 (상한이 없으면 CPU 코어 하나를 다 씀)
+SIM_HZ = 60   # 게임 로직 갱신 횟수 (초당, FPS와 무관)
+
 # 게임 보드 위치
 TOP_LEFT_X_P1 = 50
 TOP_LEFT_Y = SCREEN_HEIGHT - PLAY_HEIGHT - 50
@@ -141,6 +152,7 @@ class Piece:
 class TetrisGame:
     def __init__(self):
         self.grid = self.create_grid()
+        self.heights = HeightMap(self.grid, empty=(0, 0, 0))  # 열마다 가장 위 블록의 행 번호
         self.current_piece = self.get_shape()
         self.next_piece = self.get_shape()
         self.fall_time = 0
@@ -184,6 +196,18 @@ class TetrisGame:
                     return False
         return True
 
+    def landing_y(self, piece):
+        """높이 맵으로 블록이 떨어질 y를 바로 계산 (하드 드롭, 고스트 블록용)"""
+        distance = self.heights.drop_distance(self.convert_shape_format(piece))
+        if distance is None:
+            # 다른 블록 아래로 들어가 있으면 한 칸씩 확인
+            ghost = Piece(piece.x, piece.y + 1, piece.shape)
+            ghost.rotation = piece.rotation
+            while self.valid_space(ghost):
+                ghost.y += 1
+            distance = ghost.y - 1 - piece.y
+        return piece.y + distance
+
     def check_lost(self, positions):
         for pos in positions:
             _, y = pos
@@ -196,6 +220,8 @@ class TetrisGame:
         self.grid = self.create_grid(locked_positions)
 
     def clear_lines(self, locked_positions):
+        # 방금 고정된 블록까지 반영된 보드에서 꽉 찬 줄을 찾음
+        self.update_grid(locked_positions)
         inc = 0
         full_rows = []
         for i in range(len(self.grid) - 1, -1, -1):
@@ -214,6 +240,9 @@ class TetrisGame:
                     new_key = (x, y + lines_to_drop)
                     locked_positions[new_key] = locked_positions.pop(key)
 
+            self.update_grid(locked_positions)
+            self.heights.clear_rows(self.grid, inc)
+
         self.score += inc * 10
         self.lines_cleared += inc
         return inc
@@ -235,6 +264,9 @@ class TetrisGame:
                 if j != hole:
                     locked_positions[(j, 19 - i)] = (128, 128, 128)
 
+        self.update_grid(locked_positions)
+        self.heights.raise_rows(self.grid, num_lines)
+
 # --- 3. 네트워크 클래스 (개선됨) ---
 class Network:
     def __init__(self):
@@ -386,6 +418,11 @@ def draw_window(surface, grid_p1, grid_p2, score_p1=0, score_p2=0):
     score_label_p2 = font.render(f'Score: {score_p2}', 1, (255,255,255))
     surface.blit(score_label_p2, (TOP_LEFT_X_P2, TOP_LEFT_Y + PLAY_HEIGHT + 10))
 
+def draw_ghost(surface, positions, color, offset_x):
+    for x, y in positions:
+        if y > -1:
+            pygame.draw.rect(surface, color, (offset_x + x*BLOCK_SIZE, TOP_LEFT_Y + y*BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 3)
+
 def draw_next_shape(piece, surface):
     font = pygame.font.SysFont('comicsans', 30)
     label = font.render('Next Shape', 1, (255,255,255))
@@ -490,35 +527,35 @@ def main(win):
         print("Could not establish connection.")
         return
 
-    clock = pygame.time.Clock()
+    loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
     run = True
     while run:
-        game.fall_time += clock.get_rawtime()
-        clock.tick()
-
-        if game.fall_time / 1000 > game.fall_speed:
-            game.fall_time = 0
-            game.current_piece.y += 1
-            if not (game.valid_space(game.current_piece)) and game.current_piece.y > 0:
-                game.current_piece.y -= 1
-                piece_pos = game.convert_shape_format(game.current_piece)
-                for pos in piece_pos:
-                    locked_positions[pos] = game.current_piece.color
-                game.current_piece = game.next_piece
-                game.next_piece = game.get_shape()
-                lines_cleared = game.clear_lines(locked_positions)
-                garbage_to_send = 0
-                if lines_cleared == 2: garbage_to_send = 1
-                elif lines_cleared == 3: garbage_to_send = 2
-                elif lines_cleared == 4: garbage_to_send = 4
-                if game.check_lost(locked_positions):
-                    game.game_over = True
-                network.send({
-                    'grid': game.create_grid(locked_positions),
-                    'score': game.score,
-                    'game_over': game.game_over,
-                    'garbage': garbage_to_send
-                })
+        for _ in range(loop.advance()):
+            game.fall_time += loop.step * 1000
+            if game.fall_time / 1000 > game.fall_speed:
+                game.fall_time -= game.fall_speed * 1000
+                game.current_piece.y += 1
+                if not (game.valid_space(game.current_piece)) and game.current_piece.y > 0:
+                    game.current_piece.y -= 1
+                    piece_pos = game.convert_shape_format(game.current_piece)
+                    for pos in piece_pos:
+                        locked_positions[pos] = game.current_piece.color
+                    game.heights.lock(piece_pos)
+                    game.current_piece = game.next_piece
+                    game.next_piece = game.get_shape()
+                    lines_cleared = game.clear_lines(locked_positions)
+                    garbage_to_send = 0
+                    if lines_cleared == 2: garbage_to_send = 1
+                    elif lines_cleared == 3: garbage_to_send = 2
+                    elif lines_cleared == 4: garbage_to_send = 4
+                    if game.check_lost(locked_positions):
+                        game.game_over = True
+                    network.send({
+                        'grid': game.create_grid(locked_positions),
+                        'score': game.score,
+                        'game_over': game.game_over,
+                        'garbage': garbage_to_send
+                    })
 
         if game.garbage_to_add > 0:
             game.add_garbage_lines(game.garbage_to_add, locked_positions)
@@ -543,9 +580,7 @@ def main(win):
                     if not game.valid_space(game.current_piece):
                         game.current_piece.rotation = (game.current_piece.rotation - 1) % len(game.current_piece.shape)
                 elif event.key == pygame.K_SPACE:
-                    while game.valid_space(game.current_piece):
-                        game.current_piece.y += 1
-                    game.current_piece.y -= 1
+                    game.current_piece.y = game.landing_y(game.current_piece)
                     game.fall_time = game.fall_speed * 1000 + 1
 
         try:
@@ -588,6 +623,12 @@ def main(win):
             draw_window(win, temp_grid_p1, opponent_state['grid'], game.score, opponent_state['score'])
 
 
+        # 고스트 블록 (착지 위치), 내 보드는 항상 왼쪽
+        if not game.game_over:
+            ghost_y = game.landing_y(game.current_piece)
+            ghost_pos = [(x, y + ghost_y - game.current_piece.y) for x, y in shape_pos]
+            draw_ghost(win, ghost_pos, game.current_piece.color, TOP_LEFT_X_P1)
+
         draw_next_shape(game.next_piece, win)
 
         if game.game_over or opponent_state['game_over']:
@@ -599,6 +640,7 @@ def main(win):
             game.game_over = True # Stop local player input
 
         pygame.display.update()
+        loop.idle()
 
         if game.game_over:
             pygame.time.delay(3000)
@@ -3,8 +3,13 @@ import random
 import socket
 import threading
 import pickle
+import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_common.heightmap import HeightMap, shape_cells
+from tetris_common.loop import FixedStepLoop, Interval
+
 # 게임 설정
 GRID_WIDTH = 10
 GRID_HEIGHT = 20
@@ -12,6 +17,10 @@ CELL_SIZE = 30
 WINDOW_WIDTH = CELL_SIZE * GRID_WIDTH * 2 + 200  # 두 플레이어 화면 + 중간 공간
 WINDOW_HEIGHT = CELL_SIZE * GRID_HEIGHT + 100
 
+# 프레임 설정
+FPS = 60      # 화면 갱신 상한
+SIM_HZ = 60   # 게임 로직 갱신 횟수 (초당, FPS와 무관)
+
 # 색상 정의
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -40,6 +49,7 @@ SHAPES = [
 class Tetris:
     def __init__(self, x_offset):
         self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.heights = HeightMap(self.grid)  # 열마다 가장 위 블록의 행 번호
         self.current_piece = None
         self.current_x = 0
         self.current_y = 0
@@ -98,15 +108,26 @@ class Tetris:
             self.lock_piece()
 
     def hard_drop(self):
-        while self.move(0, 1):
-            pass
+        self.current_y = self.landing_y()
         self.lock_piece()
 
+    def landing_y(self):
+        """높이 맵으로 현재 블록이 떨어질 행을 바로 계산 (하드 드롭, 고스트 블록용)"""
+        cells = shape_cells(self.current_piece, self.current_x, self.current_y)
+        distance = self.heights.drop_distance(cells)
+        if distance is None:
+            # 다른 블록 아래로 들어가 있으면 한 칸씩 확인
+            distance = 0
+            while self.is_valid_position(y=self.current_y + distance + 1):
+                distance += 1
+        return self.current_y + distance
+
     def lock_piece(self):
         for row in range(len(self.current_piece)):
             for col in range(len(self.current_piece[row])):
                 if self.current_piece[row][col]:
                     self.grid[self.current_y + row][self.current_x + col] = self.current_shape + 1
+        self.heights.lock(shape_cells(self.current_piece, self.current_x, self.current_y))
 
         self.clear_lines()
         self.spawn_piece()
@@ -125,9 +146,10 @@ class Tetris:
             new_grid.insert(0, [0 for _ in range(GRID_WIDTH)])
 
         self.grid = new_grid
+        self.heights.clear_rows(self.grid, lines_cleared)
         self.score += lines_cleared * 100
 
-    def draw(self, screen):
+    def draw(self, screen, ghost=False):
         # 게임 보드 그리기
         for y in range(GRID_HEIGHT):
             for x in range(GRID_WIDTH):
@@ -137,6 +159,15 @@ class Tetris:
                                    (self.x_offset + x * CELL_SIZE, y * CELL_SIZE + 50,
                                     CELL_SIZE - 1, CELL_SIZE - 1))
 
+        # 고스트 블록 (착지 위치), 상대방 보드는 네트워크로 받은 것이라 그리지 않음
+        if ghost and self.current_piece and not self.game_over:
+            ghost_y = self.landing_y()
+            color = COLORS[self.current_shape]
+            for x, y in shape_cells(self.current_piece, self.current_x, ghost_y):
+                pygame.draw.rect(screen, color,
+                               (self.x_offset + x * CELL_SIZE, y * CELL_SIZE + 50,
+                                CELL_SIZE - 1, CELL_SIZE - 1), 2)
+
         # 현재 블록 그리기
         if self.current_piece and not self.game_over:
             for row in range(len(self.current_piece)):
@@ -163,7 +194,7 @@ class NetworkGame:
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("2인용 Tetris - " + ("Host" if is_host else "Guest"))
-        self.clock = pygame.time.Clock()
+        self.loop = FixedStepLoop(step_hz=SIM_HZ, max_fps=FPS)
         self.font = pygame.font.Font(None, 36)
 
         self.is_host = is_host
@@ -176,6 +207,7 @@ class NetworkGame:
 
         self.running = True
         self.connected = False
+        self.drop_timer = Interval(0.5)  # 0.5초마다 자동 낙하
 
         # 네트워크 설정
         if is_host:
@@ -263,13 +295,11 @@ class NetworkGame:
                 elif event.key == pygame.K_SPACE:
                     self.my_game.hard_drop()
 
-    def update(self):
+    def update(self, dt):
         # 자동 낙하 (0.5초마다)
-        if pygame.time.get_ticks() % 500 < 20 and not self.my_game.game_over:
-            self.my_game.drop()
-
-        # 게임 상태 전송
-        self.send_game_state()
+        if not self.my_game.game_over:
+            for _ in range(self.drop_timer.tick(dt)):
+                self.my_game.drop()
 
     def draw(self):
         self.screen.fill(BLACK)
@@ -298,7 +328,7 @@ class NetworkGame:
             self.screen.blit(my_score, (WINDOW_WIDTH // 2 + 50, WINDOW_HEIGHT - 40))
 
         # 게임 그리기
-        self.my_game.draw(self.screen)
+        self.my_game.draw(self.screen, ghost=True)
         self.opponent_game.draw(self.screen)
 
         # 연결 상태 표시
@@ -322,9 +352,13 @@ class NetworkGame:
     def run(self):
         while self.running:
             self.handle_events()
-            self.update()
+            for _ in range(self.loop.advance()):
+                self.update(self.loop.step)
+
+            # 게임 상태 전송 (프레임당 한 번)
+            self.send_game_state()
             self.draw()
-            self.clock.tick(60)
+            self.loop.idle()
 
         # 정리
         if hasattr(self, 'server_socket'):
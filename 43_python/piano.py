@@ -1,87 +1,182 @@
 import pygame
-import numpy as np
+import os
+import sys
 import time
 
+from piano_mixer import VoiceMixer
+from piano_playback import Playback
+from piano_record import LOG_EXTENSION, EventLogWriter, RecordError, load_recording, read_event_log, write_midi
+from piano_synth import HIGHEST_NOTE, LOWEST_NOTE, SAMPLE_RATE, PianoSynth, note_name
+
 pygame.init()
-pygame.mixer.init(frequency=44100, size=-16, channels=1)
+
+# 실시간 믹서가 오디오 장치를 직접 열어 누르는 동안 울리게 하고,
+# 열 수 없으면(pygame._sdl2가 없는 경우 등) 음마다 0.5초짜리 Sound를 재생
+pygame.mixer.quit()
+mixer = VoiceMixer()
+audio_device = mixer.open_device()
+if audio_device is None:
+    pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1)
 
 WIDTH, HEIGHT = 800, 300
+FPS = 60
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Pygame Piano (No WAV)")
 
 font = pygame.font.SysFont(None, 32)
 
-# 키보드 키 -> 음 이름 -> 주파수(Hz)
-key_to_freq = {
-    pygame.K_a: ("C", 261.63),
-    pygame.K_s: ("D", 293.66),
-    pygame.K_d: ("E", 329.63),
-    pygame.K_f: ("F", 349.23),
-    pygame.K_g: ("G", 392.00),
-    pygame.K_h: ("A", 440.00),
-    pygame.K_j: ("B", 493.88),
-    pygame.K_k: ("C2", 523.25),
+# 키보드 키 -> 옥타브 시작음(C)에서 몇 반음 위인지
+# 흰 건반: A S D F G H J K L ;  (C D E F G A B C D E)
+WHITE_KEYS = {
+    pygame.K_a: 0,
+    pygame.K_s: 2,
+    pygame.K_d: 4,
+    pygame.K_f: 5,
+    pygame.K_g: 7,
+    pygame.K_h: 9,
+    pygame.K_j: 11,
+    pygame.K_k: 12,
+    pygame.K_l: 14,
+    pygame.K_SEMICOLON: 16,
 }
+# 검은 건반: W E  T Y U  O P  (P는 건반이므로 재생/정지는 스페이스)
+BLACK_KEYS = {
+    pygame.K_w: 1,
+    pygame.K_e: 3,
+    pygame.K_t: 6,
+    pygame.K_y: 8,
+    pygame.K_u: 10,
+    pygame.K_o: 13,
+    pygame.K_p: 15,
+}
+key_to_offset = {**WHITE_KEYS, **BLACK_KEYS}
+
+# Z / X로 옥타브를 내리고 올림
+octave_base = 60  # C4
+MIN_OCTAVE_BASE = LOWEST_NOTE
+MAX_OCTAVE_BASE = HIGHEST_NOTE - max(key_to_offset.values())
 
-generated_sounds = {}
+# Sound로 재생할 때는 모든 음을 백그라운드에서 미리 만들어 둠 (키를 누를 때는 계산하지 않음)
+synth = None
+if audio_device is None:
+    synth = PianoSynth()
+    synth.start()
 
-recording = False
-recorded_notes = []
+def wait_for_keyboard():
+    """지금 옥타브의 건반 음이 만들어질 때까지 기다림 (누른 음이 소리 없이 빠지지 않도록)"""
+    if synth is not None:
+        synth.wait(octave_base + offset for offset in key_to_offset.values())
+
+wait_for_keyboard()
+
+held_keys = {}  # 누르고 있는 키 -> 음 번호 (누르는 중에 옥타브를 바꿔도 같은 음을 뗄 수 있도록)
+
+# 녹음은 recordings/piano_<날짜>.plog에 치는 대로 바로 쓰고, 끝나면 같은 이름의 .mid로도 저장
+RECORD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+recording = None  # 녹음 중이면 EventLogWriter
 record_start_time = 0
+# 스페이스로 재생할 파일 (python piano.py <파일.mid 또는 .plog>로 불러온 파일, 녹음하면 새 녹음)
+last_recording = sys.argv[1] if len(sys.argv) > 1 else None
+playback = Playback()
+playback_held = set()  # 재생 중 울리고 있는 음 (재생을 멈추면 뗌)
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
 RED = (255, 100, 100)
 
-def generate_sound(frequency, duration=0.5, volume=0.5, sample_rate=44100):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = np.sin(2 * np.pi * frequency * t)
-    audio = (wave * volume * (2**15 - 1)).astype(np.int16)
-
-    # mixer가 스테레오로 설정되어 있을 수 있으니, 2D 배열로 변환
-    if pygame.mixer.get_init()[2] == 2:  # stereo
-        audio = np.column_stack((audio, audio))  # duplicate mono to stereo
-
-    return pygame.sndarray.make_sound(audio)
-
-def play_note(key_code):
-    if key_code not in generated_sounds:
-        _, freq = key_to_freq[key_code]
-        generated_sounds[key_code] = generate_sound(freq)
-    generated_sounds[key_code].play()
+def play_note(note):
+    if synth is None:
+        mixer.note_on(note)
+        return
+    sound = synth.sound(note)
+    if sound is not None:  # 아직 렌더링 중인 음은 건너뜀 (시작 직후 잠깐)
+        sound.play()
+
+def release_note(note):
+    if synth is None:
+        mixer.note_off(note)
+
+def record(note, on):
+    if recording:
+        recording.write(note, time.perf_counter() - record_start_time, on)
+
+def start_recording():
+    global recording, record_start_time
+    path = os.path.join(RECORD_DIR, f"piano_{time.strftime('%Y%m%d_%H%M%S')}{LOG_EXTENSION}")
+    recording = EventLogWriter(path)
+    record_start_time = time.perf_counter()
+
+def stop_recording():
+    global recording, last_recording
+    for note in held_keys.values():
+        record(note, False)  # 누르고 있던 음도 녹음 끝에서 뗀 것으로
+    recording.close()
+    path = recording.path
+    recording = None
+    write_midi(os.path.splitext(path)[0] + ".mid", *read_event_log(path))
+    last_recording = path
+    print(f"저장: {path}")
 
 def draw_piano():
     screen.fill(GRAY)
-    keys = list(key_to_freq.keys())
-    key_width = WIDTH // len(keys)
+    key_width = WIDTH // len(WHITE_KEYS)
 
-    for i, k in enumerate(keys):
+    white_x = {}
+    for i, (k, offset) in enumerate(WHITE_KEYS.items()):
         rect = pygame.Rect(i * key_width, 100, key_width - 2, 150)
+        white_x[offset] = rect.x
         pygame.draw.rect(screen, WHITE, rect)
         pygame.draw.rect(screen, BLACK, rect, 2)
         label = font.render(pygame.key.name(k), True, BLACK)
-        screen.blit(label, (rect.x + 10, rect.y + 10))
-
-    status = "Recording..." if recording else "Press R to Record | P to Play"
+        screen.blit(label, (rect.x + 10, rect.y + 122))
+        name = font.render(note_name(octave_base + offset), True, GRAY)
+        screen.blit(name, (rect.x + 10, rect.y + 96))
+
+    # 검은 건반은 바로 아래 흰 건반의 오른쪽 경계에 걸쳐 그림
+    for k, offset in BLACK_KEYS.items():
+        rect = pygame.Rect(white_x[offset - 1] + key_width * 2 // 3, 100, key_width * 2 // 3, 90)
+        pygame.draw.rect(screen, BLACK, rect)
+        label = font.render(pygame.key.name(k), True, WHITE)
+        screen.blit(label, (rect.x + 8, rect.y + 10))
+
+    if recording:
+        status = "Recording..."
+    elif playback.playing:
+        status = "Playing... (Space: Stop)"
+    else:
+        status = "Press R to Record | Space to Play"
     msg = font.render(status, True, RED if recording else BLACK)
     screen.blit(msg, (20, 20))
+    octave = font.render(f"Z/X: Octave ({note_name(octave_base)})", True, BLACK)
+    screen.blit(octave, (WIDTH - octave.get_width() - 20, 20))
+    if synth is not None and not synth.ready:
+        loading = font.render(f"Loading sounds... {len(synth.buffers)}", True, BLACK)
+        screen.blit(loading, (20, 60))
 
 def play_recorded():
-    if not recorded_notes:
+    """녹음한 음을 재생 목록에 올림, 실제로 울리는 것은 메인 루프 (재생 중에도 연주/녹음 가능)"""
+    global playback
+    if last_recording is None:
         print("녹음된 음이 없습니다.")
         return
-    for i, (key, timestamp) in enumerate(recorded_notes):
-        if i > 0:
-            delay = timestamp - recorded_notes[i-1][1]
-            time.sleep(delay)
-        play_note(key)
+    try:
+        notes, times, ons = load_recording(last_recording)
+    except (OSError, RecordError) as e:
+        print(f"오류: {e}")
+        return
+    playback = Playback(notes, times, ons)
+    playback.start()
 
 # 메인 루프
 running = True
+next_frame = time.perf_counter()
 while running:
-    draw_piano()
-    pygame.display.flip()
+    now = time.perf_counter()
+    if now >= next_frame:
+        draw_piano()
+        pygame.display.flip()
+        next_frame = max(next_frame + 1 / FPS, now)
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -90,20 +185,56 @@ while running:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_r:
                 if not recording:
-                    recorded_notes = []
-                    record_start_time = time.time()
-                    recording = True
+                    start_recording()
                     print("🎙️ 녹음 시작")
                 else:
-                    recording = False
+                    stop_recording()
                     print("🛑 녹음 종료")
-            elif event.key == pygame.K_p:
-                print("▶️ 재생 시작")
-                play_recorded()
-            elif event.key in key_to_freq:
-                play_note(event.key)
-                if recording:
-                    timestamp = time.time() - record_start_time
-                    recorded_notes.append((event.key, timestamp))
-
+            elif event.key == pygame.K_SPACE:
+                if playback.playing:
+                    playback.stop()
+                    for note in playback_held:
+                        release_note(note)
+                    playback_held.clear()
+                    print("⏹️ 재생 정지")
+                else:
+                    print("▶️ 재생 시작")
+                    play_recorded()
+            elif event.key == pygame.K_z:
+                octave_base = max(MIN_OCTAVE_BASE, octave_base - 12)
+                wait_for_keyboard()
+            elif event.key == pygame.K_x:
+                octave_base = min(MAX_OCTAVE_BASE, octave_base + 12)
+                wait_for_keyboard()
+            elif event.key in key_to_offset:
+                note = octave_base + key_to_offset[event.key]
+                held_keys[event.key] = note
+                play_note(note)
+                # 옥타브를 바꿔도 같은 음으로 재생되도록 키가 아닌 음 번호(MIDI)를 기록
+                record(note, True)
+
+        elif event.type == pygame.KEYUP and event.key in held_keys:
+            note = held_keys.pop(event.key)
+            release_note(note)
+            record(note, False)
+
+    # 재생: 지금까지 울려야 할 음만 꺼내서 울리거나 뗌
+    for note, on in playback.due():
+        if on:
+            play_note(note)
+            playback_held.add(note)
+        else:
+            release_note(note)
+            playback_held.discard(note)
+
+    # 다음 화면 갱신이나 다음 음 중 빠른 쪽까지만 쉼 (time.sleep 한 번에 몰아서 기다리지 않음)
+    wait = next_frame - time.perf_counter()
+    until_note = playback.time_until_next()
+    if until_note is not None:
+        wait = min(wait, until_note)
+    if wait > 0:
+        time.sleep(wait)
+
+if recording:
+    stop_recording()
 pygame.quit()
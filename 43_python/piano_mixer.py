@@ -0,0 +1,193 @@
+"""piano.py의 실시간 다성(폴리포닉) 믹서
+
+음마다 pygame Sound를 빈 채널에 재생하면 기본 채널 8개가 금방 모자라고, 누르는 길이와 상관없이 0.5초로 끝납니다.
+여기서는 오디오 장치의 콜백에서 울리고 있는 음(보이스)을 블록 단위로 NumPy로 합쳐 한 버퍼로 내보냅니다.
+
+- 보이스 상태는 보이스 수만큼의 평평한 배열(음 번호, 위상, 경과 샘플, 뗀 시점 등)로 들고, 블록마다 모든 보이스를
+  (보이스 수 x 블록 길이) 배열 한 번으로 계산
+- 키를 누르고 있는 동안은 ADSR의 서스테인으로 계속 울리고, 떼면 릴리스로 줄어듦
+- 보이스가 모자라면 이미 뗀 음 중 가장 작은 것, 없으면 가장 오래된 음을 빼앗아 씀
+- 누르기/떼기는 큐에 넣어 두고 다음 블록 시작에 반영하므로 UI 스레드와 오디오 스레드가 상태를 같이 건드리지 않음
+
+소리와 엔벨로프는 piano_synth와 같은 웨이브테이블, ADSR 값을 씁니다.
+
+사용법: python piano_mixer.py   (블록 크기/보이스 수별 렌더링 시간 측정)
+"""
+import queue
+import time
+
+import numpy as np
+
+from piano_synth import (ATTACK, DECAY, NOTE_VOLUME, RELEASE, SAMPLE_RATE, SUSTAIN, TABLE_SIZE, WAVETABLE,
+                         note_frequency)
+
+BLOCK_SIZE = 128  # 샘플 (44.1kHz에서 약 2.9ms)
+MAX_VOICES = 32
+FREE = -1
+
+
+class VoiceMixer:
+    def __init__(self, max_voices=MAX_VOICES, sample_rate=SAMPLE_RATE, volume=NOTE_VOLUME):
+        self.sample_rate = sample_rate
+        self.volume = volume
+        self.attack = max(1, int(ATTACK * sample_rate))
+        self.decay = max(1, int(DECAY * sample_rate))
+        self.release = max(1, int(RELEASE * sample_rate))
+
+        # 보이스별 상태 (FREE면 빈 보이스)
+        self.notes = np.full(max_voices, FREE, np.int32)
+        self.steps = np.zeros(max_voices)        # 샘플마다 웨이브테이블에서 건너뛰는 칸 수
+        self.phases = np.zeros(max_voices)       # 웨이브테이블 위치
+        self.ages = np.zeros(max_voices, np.int64)  # 누른 뒤 지난 샘플 수
+        self.released_at = np.full(max_voices, -1, np.int64)  # 뗀 시점의 ages (-1이면 누르고 있음)
+        self.release_levels = np.zeros(max_voices, np.float32)
+        self.started = np.zeros(max_voices, np.int64)  # 누른 순서 (빼앗을 보이스를 고를 때)
+
+        self.commands = queue.SimpleQueue()  # (음 번호, 누름 여부)
+        self.counter = 0
+        self.stolen = 0
+        self.ramp = np.arange(BLOCK_SIZE)
+
+    # --- UI 스레드에서 부르는 함수 (큐에만 넣음) ---
+    def note_on(self, note):
+        self.commands.put((note, True))
+
+    def note_off(self, note):
+        self.commands.put((note, False))
+
+    @property
+    def active_voices(self):
+        return int(np.count_nonzero(self.notes != FREE))
+
+    # --- 오디오 스레드 ---
+    def _held_level(self, ages):
+        """누르고 있는 동안의 엔벨로프 (어택 -> 디케이 -> 서스테인)"""
+        attack = ages / self.attack
+        decay = 1 - (1 - SUSTAIN) * np.clip((ages - self.attack) / self.decay, 0, 1)
+        return np.where(ages < self.attack, attack, decay)
+
+    def _release(self, voices):
+        ages = self.ages[voices]
+        self.release_levels[voices] = self._held_level(ages)
+        self.released_at[voices] = ages
+
+    def _start(self, note):
+        held = np.flatnonzero((self.notes == note) & (self.released_at < 0))
+        self._release(held)  # 같은 음을 다시 누르면 앞의 음은 떼고 새로 울림
+
+        free = np.flatnonzero(self.notes == FREE)
+        if free.size:
+            voice = free[0]
+        else:
+            self.stolen += 1
+            releasing = np.flatnonzero(self.released_at >= 0)
+            if releasing.size:
+                levels = self._envelope(self.ages[releasing][:, None], releasing)[:, 0]
+                voice = releasing[np.argmin(levels)]
+            else:
+                voice = np.argmin(self.started)
+
+        self.notes[voice] = note
+        self.steps[voice] = note_frequency(note) * TABLE_SIZE / self.sample_rate
+        self.phases[voice] = 0.0
+        self.ages[voice] = 0
+        self.released_at[voice] = -1
+        self.started[voice] = self.counter
+        self.counter += 1
+
+    def _apply_commands(self):
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            note, on = command
+            if on:
+                self._start(note)
+            else:
+                self._release(np.flatnonzero((self.notes == note) & (self.released_at < 0)))
+
+    def _envelope(self, ages, voices):
+        """ages: (보이스 수, 샘플 수) 경과 샘플 -> 같은 모양의 엔벨로프"""
+        level = self._held_level(ages)
+        released_at = self.released_at[voices][:, None]
+        fading = self.release_levels[voices][:, None] * np.clip(1 - (ages - released_at) / self.release, 0, 1)
+        return np.where((released_at >= 0) & (ages >= released_at), fading, level)
+
+    def render(self, frames):
+        """다음 frames 샘플을 float32 배열(-1~1)로"""
+        self._apply_commands()
+        if frames > len(self.ramp):
+            self.ramp = np.arange(frames)
+        ramp = self.ramp[:frames]
+
+        voices = np.flatnonzero(self.notes != FREE)
+        if not voices.size:
+            return np.zeros(frames, np.float32)
+
+        # 모든 보이스를 (보이스 수 x frames) 배열로 한 번에 계산
+        steps = self.steps[voices]
+        position = (self.phases[voices][:, None] + ramp * steps[:, None]) % TABLE_SIZE
+        index = position.astype(np.int32)
+        frac = (position - index).astype(np.float32)
+        wave = WAVETABLE[index] + frac * (WAVETABLE[index + 1] - WAVETABLE[index])
+        ages = self.ages[voices]
+        mixed = (wave * self._envelope(ages[:, None] + ramp, voices)).sum(axis=0) * self.volume
+
+        self.phases[voices] = (self.phases[voices] + frames * steps) % TABLE_SIZE
+        self.ages[voices] = ages + frames
+        released_at = self.released_at[voices]
+        done = voices[(released_at >= 0) & (ages + frames - released_at >= self.release)]
+        self.notes[done] = FREE
+
+        # 여러 음이 겹쳐 1을 넘어도 찢어지는 소리가 나지 않도록 부드럽게 눌러 줌
+        return np.tanh(mixed).astype(np.float32)
+
+    def render_int16(self, frames):
+        return (self.render(frames) * (2**15 - 1)).astype(np.int16)
+
+    def open_device(self, block_size=BLOCK_SIZE):
+        """기본 오디오 장치를 열고 콜백에서 render하도록 연결, 열 수 없으면 None
+
+        pygame 2의 pygame._sdl2.audio(실험적 모듈)가 필요하고, pygame.mixer가 같은 장치를 열고 있으면 안 됩니다.
+        """
+        try:
+            from pygame._sdl2 import INIT_AUDIO, init_subsystem
+            from pygame._sdl2.audio import AUDIO_S16, AudioDevice, get_audio_device_names
+        except ImportError:
+            return None
+
+        def callback(device, stream):
+            stream[:] = self.render_int16(len(stream) // 2).tobytes()
+
+        try:
+            init_subsystem(INIT_AUDIO)
+            names = get_audio_device_names(False)
+            if not names:
+                return None
+            device = AudioDevice(devicename=names[0], iscapture=False, frequency=self.sample_rate,
+                                 audioformat=AUDIO_S16, numchannels=1, chunksize=block_size,
+                                 allowed_changes=0, callback=callback)
+        except Exception as e:
+            print(f"경고: 믹서용 오디오 장치를 열 수 없습니다 ({e})")
+            return None
+        device.pause(0)
+        return device
+
+
+if __name__ == "__main__":
+    # 블록 하나를 만드는 데 걸리는 시간이 블록 길이보다 충분히 짧아야 소리가 끊기지 않음
+    for block_size in (64, 128, 256, 512):
+        for voices in (1, 8, 32):
+            mixer = VoiceMixer(max_voices=voices)
+            for note in range(voices):
+                mixer.note_on(48 + note)
+            mixer.render(block_size)
+            count = 200
+            started = time.perf_counter()
+            for _ in range(count):
+                mixer.render(block_size)
+            cost = (time.perf_counter() - started) / count
+            budget = block_size / SAMPLE_RATE
+            print(f"블록 {block_size:4d} ({budget * 1000:4.1f}ms), 보이스 {voices:2d}: "
+                  f"{cost * 1e6:7.1f}us ({cost / budget:5.1%})")
@@ -0,0 +1,59 @@
+"""녹음한 연주를 화면을 멈추지 않고 재생하는 스케줄러
+
+음과 음 사이를 time.sleep으로 기다리면 그동안 창이 멈추고, 잠든 시간의 오차가 음마다 쌓입니다.
+여기서는 재생을 시작한 순간을 기준으로 음마다 '몇 초에 울려야 하는지'(절대 시각)를 정해 두고,
+게임 루프가 매번 due()로 지금까지 울려야 할 음만 꺼내 갑니다.
+- 시각을 매번 시작 시각과 현재 시계로 다시 계산하므로, 한 음이 늦게 울려도 다음 음에 오차가 쌓이지 않음
+- 다음 음까지 남은 시간(time_until_next)으로 루프가 쉬는 시간을 줄여서 제때 울리게 할 수 있음
+
+이벤트는 음 번호, 녹음 시작부터의 초, 누름 여부(0이면 키를 뗀 것) 세 배열로 받고,
+긴 녹음도 파이썬 객체 목록 없이 배열 그대로 재생합니다 (piano_record의 읽기 함수가 같은 모양으로 돌려줌).
+"""
+import time
+
+
+class Playback:
+    def __init__(self, notes=(), times=(), ons=b"", clock=time.perf_counter):
+        """시간순으로 정렬된 음 번호, 초, 누름 여부"""
+        self.notes = notes
+        self.times = times
+        self.ons = ons
+        self.clock = clock
+        self.start_time = None
+        self.cursor = 0
+        self.max_late = 0.0  # 가장 늦게 울린 음이 몇 초 늦었는지 (확인용)
+
+    @property
+    def playing(self):
+        return self.start_time is not None and self.cursor < len(self.times)
+
+    def start(self, now=None):
+        """처음부터 재생, 첫 음이 바로 울리도록 첫 음 시각을 0으로 맞춤"""
+        now = self.clock() if now is None else now
+        self.start_time = now - (self.times[0] if self.times else 0.0)
+        self.cursor = 0
+        self.max_late = 0.0
+
+    def stop(self):
+        self.start_time = None
+
+    def due(self, now=None):
+        """now까지 처리해야 하는데 아직 처리하지 않은 (음 번호, 누름 여부)들"""
+        if not self.playing:
+            return []
+        elapsed = (self.clock() if now is None else now) - self.start_time
+        times = self.times
+        start = cursor = self.cursor
+        while cursor < len(times) and times[cursor] <= elapsed:
+            cursor += 1
+        if cursor > start:
+            self.max_late = max(self.max_late, elapsed - times[start])
+        self.cursor = cursor
+        return list(zip(self.notes[start:cursor], self.ons[start:cursor]))
+
+    def time_until_next(self, now=None):
+        """다음 음까지 남은 초 (재생 중이 아니면 None)"""
+        if not self.playing:
+            return None
+        elapsed = (self.clock() if now is None else now) - self.start_time
+        return max(0.0, self.times[self.cursor] - elapsed)
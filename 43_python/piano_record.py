@@ -0,0 +1,230 @@
+"""piano.py 녹음 파일: 바이너리 이벤트 로그와 MIDI 파일
+
+이벤트 로그(.plog)는 녹음하는 동안 이벤트마다 바로 파일 끝에 덧붙이므로, 프로그램이 중간에 죽어도
+그때까지 친 음은 남고 메모리에는 아무것도 쌓이지 않습니다.
+
+이벤트 로그 구조 (리틀 엔디언)
+- 헤더: 매직(b"PLOG"), 버전(uint16), 녹음 시작 시각(double, time.time())
+- 이벤트: 녹음 시작부터의 시각(uint32, 0.1ms 단위), 음(uint8, 누름이면 | NOTE_ON) - 이벤트 하나에 5바이트
+  (쓰다가 끊긴 마지막 이벤트는 읽을 때 버림)
+
+MIDI는 표준 MIDI 파일(format 0, 트랙 하나, 120BPM)로 내보내고, format 0/1 파일을 읽어 재생할 수 있습니다.
+
+사용법: python piano_record.py <녹음.plog>...   (같은 이름의 .mid로 변환)
+"""
+import os
+import struct
+import sys
+import time
+from array import array
+
+MAGIC = b"PLOG"
+VERSION = 1
+HEADER = struct.Struct("<4sHd")
+EVENT = struct.Struct("<IB")
+TIME_SCALE = 10000  # 0.1ms 단위
+NOTE_ON = 0x80
+LOG_EXTENSION = ".plog"
+
+MIDI_PPQ = 480        # 4분음표 하나의 틱 수
+MIDI_TEMPO = 500000   # 4분음표 하나의 마이크로초 (120BPM)
+MIDI_VELOCITY = 100
+DRUM_CHANNEL = 9      # 타악기 채널은 음 높이가 아니므로 읽지 않음
+
+
+class RecordError(ValueError):
+    pass
+
+
+class EventLogWriter:
+    """녹음하면서 이벤트를 바로 파일에 쓰는 로그"""
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        self.file.flush()
+        self.count = 0
+
+    def write(self, note, seconds, on):
+        self.file.write(EVENT.pack(round(seconds * TIME_SCALE), note | NOTE_ON if on else note))
+        self.file.flush()  # 프로그램이 죽어도 운영체제 버퍼까지는 넘어가 있도록
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_event_log(path):
+    """이벤트 로그 -> (음 번호 array('i'), 초 array('d'), 누름 여부 bytes)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        magic, version, _ = HEADER.unpack_from(data)
+    except struct.error:
+        raise RecordError(f"{path}: 녹음 파일이 손상되었습니다")
+    if magic != MAGIC or version != VERSION:
+        raise RecordError(f"{path}: 녹음 파일 형식이 맞지 않습니다")
+
+    count = (len(data) - HEADER.size) // EVENT.size
+    notes, times, ons = array('i'), array('d'), bytearray()
+    for tick, value in EVENT.iter_unpack(data[HEADER.size:HEADER.size + count * EVENT.size]):
+        notes.append(value & ~NOTE_ON)
+        times.append(tick / TIME_SCALE)
+        ons.append(1 if value & NOTE_ON else 0)
+    return notes, times, bytes(ons)
+
+
+# --- MIDI ---
+def variable_length(value):
+    """MIDI 가변 길이 정수 (7비트씩, 마지막 바이트만 최상위 비트 0)"""
+    data = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        data.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(data)
+
+
+def write_midi(path, notes, times, ons):
+    """시간순 이벤트를 표준 MIDI 파일로 저장"""
+    ticks_per_second = MIDI_PPQ * 1_000_000 / MIDI_TEMPO
+    track = bytearray()
+    track += b"\x00\xff\x51\x03" + MIDI_TEMPO.to_bytes(3, 'big')
+    last = 0
+    for note, seconds, on in zip(notes, times, ons):
+        tick = max(last, round(seconds * ticks_per_second))
+        track += variable_length(tick - last)
+        track += bytes((0x90, note, MIDI_VELOCITY) if on else (0x80, note, 0))
+        last = tick
+    track += b"\x00\xff\x2f\x00"  # 트랙 끝
+
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, MIDI_PPQ))
+        f.write(b"MTrk" + struct.pack(">I", len(track)) + track)
+    os.replace(tmp, path)
+
+
+def read_variable_length(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_track(data):
+    """트랙 하나 -> [(틱, 종류, 값)], 종류는 'tempo'(값: 마이크로초) 또는 'note'(값: (음, 누름 여부))"""
+    events = []
+    pos = tick = 0
+    running = 0  # running status: 상태 바이트가 빠지면 앞의 채널 이벤트와 같은 상태
+    while pos < len(data):
+        delta, pos = read_variable_length(data, pos)
+        tick += delta
+        if data[pos] & 0x80:
+            status = data[pos]
+            pos += 1
+            if status < 0xF0:
+                running = status
+        else:
+            status = running
+
+        if status == 0xFF:  # 메타 이벤트
+            kind = data[pos]
+            length, pos = read_variable_length(data, pos + 1)
+            if kind == 0x51:
+                events.append((tick, 'tempo', int.from_bytes(data[pos:pos + 3], 'big')))
+            elif kind == 0x2F:
+                break
+            pos += length
+        elif status in (0xF0, 0xF7):  # 시스템 익스클루시브
+            length, pos = read_variable_length(data, pos)
+            pos += length
+        else:
+            kind, channel = status & 0xF0, status & 0x0F
+            size = 1 if kind in (0xC0, 0xD0) else 2
+            values = data[pos:pos + size]
+            pos += size
+            if channel == DRUM_CHANNEL or kind not in (0x80, 0x90):
+                continue
+            note, velocity = values
+            events.append((tick, 'note', (note, kind == 0x90 and velocity > 0)))
+    return events
+
+
+def read_midi(path):
+    """MIDI 파일 -> (음 번호 array('i'), 초 array('d'), 누름 여부 bytes), 모든 트랙을 합쳐 시간순으로"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        if data[:4] != b"MThd":
+            raise RecordError(f"{path}: MIDI 파일이 아닙니다")
+        header_length, midi_format, track_count, division = struct.unpack_from(">IHHH", data, 4)
+        if midi_format not in (0, 1):
+            raise RecordError(f"{path}: format {midi_format} MIDI 파일은 읽을 수 없습니다")
+        pos = 8 + header_length
+        events = []
+        for _ in range(track_count):
+            kind, length = struct.unpack_from(">4sI", data, pos)
+            pos += 8
+            if kind == b"MTrk":
+                events.extend(read_track(data[pos:pos + length]))
+            pos += length
+    except RecordError:
+        raise
+    except (struct.error, IndexError, ValueError):
+        raise RecordError(f"{path}: MIDI 파일이 손상되었습니다")
+
+    # 같은 틱이면 템포 변경 -> 떼기 -> 누르기 순으로 (같은 음을 끊고 다시 치는 경우)
+    events.sort(key=lambda event: (event[0], event[1] == 'note', event[1] == 'note' and event[2][1]))
+
+    if division & 0x8000:  # SMPTE: 초당 프레임 수 x 프레임당 틱 수
+        ticks_per_second = -((division >> 8) - 256) * (division & 0xFF)
+        seconds_per_tick = lambda tempo: 1 / ticks_per_second
+    else:
+        seconds_per_tick = lambda tempo: tempo / 1_000_000 / division
+
+    notes, times, ons = array('i'), array('d'), bytearray()
+    tempo = MIDI_TEMPO
+    last_tick = 0
+    seconds = 0.0
+    for tick, kind, value in events:
+        seconds += (tick - last_tick) * seconds_per_tick(tempo)
+        last_tick = tick
+        if kind == 'tempo':
+            tempo = value
+        else:
+            notes.append(value[0])
+            times.append(seconds)
+            ons.append(1 if value[1] else 0)
+    return notes, times, bytes(ons)
+
+
+def load_recording(path):
+    """.plog 또는 .mid/.midi 파일 -> (음 번호, 초, 누름 여부)"""
+    if path.lower().endswith((".mid", ".midi")):
+        return read_midi(path)
+    return read_event_log(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("사용법: python piano_record.py <녹음.plog>...")
+        sys.exit(1)
+
+    failed = False
+    for path in sys.argv[1:]:
+        try:
+            notes, times, ons = read_event_log(path)
+        except (OSError, RecordError) as e:
+            print(f"오류: {e}")
+            failed = True
+            continue
+        output = os.path.splitext(path)[0] + ".mid"
+        write_midi(output, notes, times, ons)
+        length = times[-1] if times else 0
+        print(f"{path}: 이벤트 {len(notes)}개, {length:.1f}초 -> {output}")
+    sys.exit(1 if failed else 0)
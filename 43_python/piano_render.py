@@ -0,0 +1,144 @@
+"""녹음한(또는 불러온 MIDI) 피아노 연주를 화면/소리 장치 없이 WAV 파일로 렌더링
+
+piano.py가 실시간으로 쓰는 VoiceMixer를 그대로 오프라인으로 돌리므로 연주할 때와 같은 소리가 나고,
+오디오 장치를 기다리지 않으니 실제 연주 시간보다 훨씬 빨리 끝납니다.
+- 이벤트 사이를 블록 단위로 렌더링해서 바로 파일에 쓰므로, 녹음이 길어도 메모리는 블록 하나만큼만 씀
+- 누르기/떼기는 블록 경계가 아니라 이벤트가 있는 샘플 위치에 맞춰 반영
+- 파일이 여러 개면 프로세스 풀에서 나누어 렌더링
+
+사용법: python piano_render.py <녹음.plog|.mid 또는 폴더>... [-o 출력폴더] [-j 프로세스 수]
+"""
+import argparse
+import glob
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from piano_mixer import MAX_VOICES, VoiceMixer
+from piano_record import LOG_EXTENSION, RecordError, load_recording
+from piano_synth import SAMPLE_RATE
+
+RENDER_BLOCK = 4096  # 샘플 (실시간이 아니므로 블록이 클수록 빠름, 44.1kHz에서 약 93ms)
+RECORDING_EXTENSIONS = (LOG_EXTENSION, ".mid", ".midi")
+
+
+def render_events(notes, times, ons, wav_path, block_size=RENDER_BLOCK, sample_rate=SAMPLE_RATE,
+                  max_voices=MAX_VOICES):
+    """시간순 이벤트를 16비트 모노 WAV로 저장하고 길이(초)를 돌려줌, 마지막 음의 릴리스가 끝날 때까지 렌더링"""
+    mixer = VoiceMixer(max_voices, sample_rate)
+    tmp = wav_path + ".tmp"
+    position = 0  # 지금까지 쓴 샘플 수
+    with wave.open(tmp, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+
+        def render_until(target):
+            nonlocal position
+            while position < target:
+                frames = min(block_size, target - position)
+                out.writeframes(mixer.render_int16(frames).tobytes())
+                position += frames
+
+        held = set()
+        for note, seconds, on in zip(notes, times, ons):
+            render_until(round(seconds * sample_rate))
+            if on:
+                mixer.note_on(note)
+                held.add(note)
+            else:
+                mixer.note_off(note)
+                held.discard(note)
+        for note in held:  # 떼는 이벤트가 빠진 음은 끝에서 뗌
+            mixer.note_off(note)
+        mixer.render(0)  # 남은 누르기/떼기를 반영
+        while mixer.active_voices:
+            render_until(position + block_size)
+    os.replace(tmp, wav_path)
+    return position / sample_rate
+
+
+def output_path(path, out_dir=None):
+    name = os.path.splitext(os.path.basename(path))[0] + ".wav"
+    return os.path.join(out_dir or os.path.dirname(path), name)
+
+
+def render_file(path, out_dir=None, block_size=RENDER_BLOCK):
+    """녹음 파일 하나를 렌더링 -> (입력 경로, 출력 경로, 음원 길이 초, 걸린 초) 또는 실패하면 (입력 경로, 오류 메시지)"""
+    started = time.perf_counter()
+    try:
+        notes, times, ons = load_recording(path)
+        wav_path = output_path(path, out_dir)
+        length = render_events(notes, times, ons, wav_path, block_size)
+    except (OSError, RecordError) as e:
+        return path, f"{type(e).__name__}: {e}"
+    return path, wav_path, length, time.perf_counter() - started
+
+
+def find_recordings(inputs):
+    """파일, 폴더, 글롭 패턴 -> 녹음 파일 목록 (폴더면 안의 .plog/.mid 전부)"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(path for path in glob.glob(os.path.join(item, "*"))
+                                if path.lower().endswith(RECORDING_EXTENSIONS)))
+        elif glob.has_magic(item):
+            files.extend(sorted(glob.glob(item)))
+        else:
+            files.append(item)
+    return list(dict.fromkeys(files))
+
+
+def render_files(inputs, out_dir=None, jobs=None, block_size=RENDER_BLOCK):
+    """여러 녹음을 프로세스 풀에서 나누어 렌더링"""
+    files = find_recordings(inputs)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    print(f"녹음 {len(files)}개를 렌더링합니다.")
+
+    # piano.py는 녹음마다 a.plog와 a.mid를 같이 남기므로, 출력 WAV가 같으면 하나만 렌더링
+    # (.plog가 있으면 그것을: .mid는 시각이 1ms 단위로 반올림되어 있음)
+    outputs = {}
+    for path in files:
+        output = output_path(path, out_dir)
+        if output not in outputs or (path.lower().endswith(LOG_EXTENSION)
+                                     and not outputs[output].lower().endswith(LOG_EXTENSION)):
+            outputs[output] = path
+    skipped = len(files) - len(outputs)
+    for path in files:
+        chosen = outputs[output_path(path, out_dir)]
+        if chosen != path:
+            print(f"건너뜀: {os.path.basename(path)} (같은 녹음의 {os.path.basename(chosen)}를 렌더링)")
+
+    failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(render_file, path, out_dir, block_size) for path in outputs.values()]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            name = os.path.basename(result[0])
+            if len(result) == 2:
+                failed += 1
+                print(f"[{done}/{len(futures)}] 오류: {name}: {result[1]}")
+            else:
+                _, wav_path, length, elapsed = result
+                speed = length / elapsed if elapsed > 0 else float('inf')
+                print(f"[{done}/{len(futures)}] {name}: {length:.1f}초 -> {wav_path} ({elapsed:.2f}초, 실시간의 {speed:.0f}배)")
+
+    print(f"완료! 성공 {len(outputs) - failed}개, 실패 {failed}개, 건너뜀 {skipped}개 ({time.perf_counter() - started:.2f}초)")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="피아노 녹음(.plog)이나 MIDI 파일을 WAV로 렌더링합니다.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("recording", nargs="+", help="녹음 파일(.plog, .mid), 폴더 또는 글롭 패턴(\"recordings/*.plog\")")
+    parser.add_argument("-o", "--out-dir", help="WAV를 저장할 폴더 (기본값: 녹음 파일과 같은 폴더)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="사용할 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument("--block", type=int, default=RENDER_BLOCK, help=f"렌더링 블록 크기 샘플 (기본값: {RENDER_BLOCK})")
+    args = parser.parse_args()
+
+    raise SystemExit(1 if render_files(args.recording, args.out_dir, args.jobs, args.block) else 0)
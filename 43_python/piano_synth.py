@@ -0,0 +1,180 @@
+"""piano.py에서 쓰는 음 합성과 캐시
+
+- 사인파 한 주기를 담은 웨이브테이블 하나를 모든 음이 같이 쓰고, 음 높이에 맞는 간격으로 읽어(선형 보간) 소리를 만듦
+- ADSR 엔벨로프를 곱해서 소리 시작과 끝의 '틱' 소리(클릭)를 없앰
+- 여러 옥타브의 음을 시작할 때 백그라운드 스레드에서 미리 만들어 두므로, 키를 누를 때는 계산하지 않음
+- 만든 소리는 piano_cache.npz로 저장해 두고, 설정이 같으면 다음 실행 때 계산 없이 읽음
+- pygame Sound 객체는 최근에 쓴 것만 LRU로 남김 (원본 배열은 모두 메모리에 있으므로 다시 만들기만 하면 됨)
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+TABLE_SIZE = 4096
+NOTE_DURATION = 0.5  # 초
+NOTE_VOLUME = 0.5
+LOWEST_NOTE = 36     # MIDI 번호, C2
+HIGHEST_NOTE = 96    # C7
+SOUND_CACHE_SIZE = 24
+
+# ADSR (초 / 비율)
+ATTACK = 0.005
+DECAY = 0.08
+SUSTAIN = 0.7
+RELEASE = 0.06
+
+CACHE_VERSION = 1
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "piano_cache.npz")
+
+NOTE_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+
+# 한 주기 사인파, 보간할 때 마지막 칸 다음을 읽을 수 있도록 첫 값을 한 번 더 붙임
+WAVETABLE = np.sin(2 * np.pi * np.arange(TABLE_SIZE + 1) / TABLE_SIZE).astype(np.float32)
+
+
+def note_frequency(note):
+    """MIDI 음 번호 -> 주파수(Hz), 69번(A4)이 440Hz"""
+    return 440.0 * 2 ** ((note - 69) / 12)
+
+
+def note_name(note):
+    return f"{NOTE_NAMES[note % 12]}{note // 12 - 1}"
+
+
+def adsr_envelope(length, sample_rate=SAMPLE_RATE, attack=ATTACK, decay=DECAY, sustain=SUSTAIN, release=RELEASE):
+    """length 샘플짜리 음의 ADSR 엔벨로프 (끝의 release 구간에서 0으로 내려감)"""
+    a = min(length, int(attack * sample_rate))
+    d = min(length - a, int(decay * sample_rate))
+    r = min(length - a - d, int(release * sample_rate))
+    s = length - a - d - r
+    return np.concatenate((
+        np.linspace(0, 1, a, endpoint=False),
+        np.linspace(1, sustain, d, endpoint=False),
+        np.full(s, sustain),
+        np.linspace(sustain, 0, r),
+    )).astype(np.float32)
+
+
+def render_wave(frequency, length, sample_rate=SAMPLE_RATE, phase=0.0):
+    """웨이브테이블을 읽어 frequency Hz 사인파 length 샘플을 float32로 (-1~1)"""
+    position = (phase + np.arange(length) * (frequency * TABLE_SIZE / sample_rate)) % TABLE_SIZE
+    index = position.astype(np.int32)
+    frac = (position - index).astype(np.float32)
+    return WAVETABLE[index] + frac * (WAVETABLE[index + 1] - WAVETABLE[index])
+
+
+def render_note(note, duration=NOTE_DURATION, volume=NOTE_VOLUME, sample_rate=SAMPLE_RATE):
+    """MIDI 음 하나를 int16 배열로 (웨이브테이블 + ADSR)"""
+    length = int(sample_rate * duration)
+    wave = render_wave(note_frequency(note), length, sample_rate) * adsr_envelope(length, sample_rate)
+    return (wave * volume * (2**15 - 1)).astype(np.int16)
+
+
+def cache_key(duration, volume, sample_rate):
+    """캐시 파일이 지금 설정으로 만든 것인지 확인하는 값"""
+    params = (CACHE_VERSION, TABLE_SIZE, LOWEST_NOTE, HIGHEST_NOTE, duration, volume, sample_rate,
+              ATTACK, DECAY, SUSTAIN, RELEASE)
+    return hashlib.sha1(repr(params).encode()).hexdigest()
+
+
+class PianoSynth:
+    """음 번호 -> pygame Sound
+
+    start()로 백그라운드 렌더링을 시작하고, sound(note)는 준비된 소리만 돌려줍니다 (없으면 None).
+    아직 만들지 않은 음을 누르면 그 음을 먼저 만들도록 스레드에 알리기만 하고 바로 돌아옵니다.
+    """
+    def __init__(self, duration=NOTE_DURATION, volume=NOTE_VOLUME, sample_rate=SAMPLE_RATE,
+                 cache_file=CACHE_FILE, sound_cache_size=SOUND_CACHE_SIZE):
+        self.duration = duration
+        self.volume = volume
+        self.sample_rate = sample_rate
+        self.cache_file = cache_file
+        self.key = cache_key(duration, volume, sample_rate)
+        self.buffers = {}  # 음 번호 -> int16 배열 (렌더링 스레드만 씀)
+        self.sounds = OrderedDict()  # 음 번호 -> Sound, 최근에 쓴 것이 뒤
+        self.sound_cache_size = sound_cache_size
+        self.requests = queue.SimpleQueue()
+        self.thread = None
+
+    @property
+    def ready(self):
+        return len(self.buffers) == HIGHEST_NOTE - LOWEST_NOTE + 1
+
+    def start(self):
+        """디스크 캐시를 읽고, 없는 음은 백그라운드 스레드에서 만듦"""
+        self.load_cache()
+        if not self.ready:
+            self.thread = threading.Thread(target=self._render_all, daemon=True)
+            self.thread.start()
+
+    def load_cache(self):
+        try:
+            with np.load(self.cache_file) as data:
+                if str(data["key"]) != self.key:
+                    return False
+                buffers = data["buffers"]
+        except (OSError, KeyError, ValueError):
+            return False
+        for offset, buffer in enumerate(buffers):
+            self.buffers[LOWEST_NOTE + offset] = buffer
+        return True
+
+    def save_cache(self):
+        buffers = np.stack([self.buffers[note] for note in range(LOWEST_NOTE, HIGHEST_NOTE + 1)])
+        tmp = self.cache_file + ".tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, key=self.key, buffers=buffers)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"경고: 음 캐시를 저장할 수 없습니다 ({e})")
+
+    def _render_all(self):
+        pending = [note for note in range(LOWEST_NOTE, HIGHEST_NOTE + 1) if note not in self.buffers]
+        while pending:
+            # 눌렀는데 아직 없던 음이 있으면 그것부터
+            try:
+                note = self.requests.get_nowait()
+                if note not in pending:
+                    continue
+                pending.remove(note)
+            except queue.Empty:
+                note = pending.pop(0)
+            self.buffers[note] = render_note(note, self.duration, self.volume, self.sample_rate)
+        self.save_cache()
+
+    def wait(self, notes):
+        """notes가 모두 만들어질 때까지 기다림 (먼저 만들도록 스레드에 알림), 음 하나에 1~2ms 정도"""
+        missing = [note for note in notes if LOWEST_NOTE <= note <= HIGHEST_NOTE and note not in self.buffers]
+        for note in missing:
+            self.requests.put(note)
+        while any(note not in self.buffers for note in missing):
+            time.sleep(0.001)
+
+    def sound(self, note):
+        """note의 Sound, 아직 만들어지지 않았거나 범위 밖이면 None"""
+        sound = self.sounds.get(note)
+        if sound is not None:
+            self.sounds.move_to_end(note)
+            return sound
+        buffer = self.buffers.get(note)
+        if buffer is None:
+            if LOWEST_NOTE <= note <= HIGHEST_NOTE:
+                self.requests.put(note)
+            return None
+
+        import pygame
+        # mixer가 스테레오로 설정되어 있을 수 있으니, 2D 배열로 변환
+        if pygame.mixer.get_init()[2] == 2:
+            buffer = np.column_stack((buffer, buffer))
+        sound = pygame.sndarray.make_sound(buffer)
+        self.sounds[note] = sound
+        if len(self.sounds) > self.sound_cache_size:
+            self.sounds.popitem(last=False)
+        return sound
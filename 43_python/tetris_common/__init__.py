@@ -0,0 +1 @@
+"""여러 테트리스 변형(2_tetris, 5_tetris_2)이 함께 쓰는 공용 모듈"""
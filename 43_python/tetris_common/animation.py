@@ -0,0 +1,46 @@
+"""게임 로직을 멈추지 않는 효과(애니메이션) 관리
+
+효과는 게임 step마다 시간만 흘려 보내고(update), 그리기는 렌더링 때만 합니다.
+줄 삭제 효과가 보이는 동안에도 다음 블록, 입력, 낙하는 그대로 진행됩니다.
+"""
+
+
+class Animator:
+    def __init__(self):
+        self.effects = []
+
+    def add(self, effect):
+        self.effects.append(effect)
+
+    def clear(self):
+        self.effects.clear()
+
+    def update(self, dt):
+        for effect in self.effects:
+            effect.elapsed += dt
+        self.effects = [e for e in self.effects if e.elapsed < e.duration]
+
+    def draw(self, surface):
+        for effect in self.effects:
+            effect.draw(surface)
+
+
+class RowFlash:
+    """지워진 줄 자리를 깜빡이게 하는 효과
+
+    frames: 번갈아 보여 줄 한 줄짜리 Surface 목록 (미리 한 번만 그려 두고 재사용)
+    """
+
+    def __init__(self, rows, frames, row_height, offset=(0, 0), duration=0.2, blink=0.1):
+        self.rows = rows
+        self.frames = frames
+        self.row_height = row_height
+        self.offset = offset
+        self.duration = duration
+        self.blink = blink
+        self.elapsed = 0.0
+
+    def draw(self, surface):
+        frame = self.frames[int(self.elapsed / self.blink) % len(self.frames)]
+        x, y = self.offset
+        surface.blits([(frame, (x, y + row * self.row_height)) for row in self.rows], False)
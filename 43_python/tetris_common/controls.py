@@ -0,0 +1,119 @@
+"""플레이어별 키 입력 버퍼 (DAS / ARR 지원)
+
+pygame.key.get_pressed()로 매 프레임 키 상태를 확인하면 프레임 사이에 눌렀다 뗀
+짧은 입력을 놓치고, 반복 속도도 FPS에 따라 달라집니다. 여기서는 KEYDOWN/KEYUP
+이벤트를 시각과 함께 큐에 넣어 두었다가, 고정 step마다 한 번에 꺼내 동작 목록으로
+바꿔 줍니다.
+
+- DAS (Delayed Auto Shift): 키를 누르고 있을 때 자동 반복이 시작되기까지의 시간
+- ARR (Auto Repeat Rate): 자동 반복이 시작된 뒤 한 칸씩 움직이는 간격
+"""
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+# 누르고 있으면 자동 반복되는 동작
+REPEATABLE = ("left", "right", "down")
+OPPOSITE = {"left": "right", "right": "left"}
+
+DEFAULT_CONTROLS = {
+    "das": 170,  # ms
+    "arr": 50,   # ms
+    "players": [
+        {"left": "a", "right": "d", "down": "s", "rotate": "w"},
+        {"left": "left", "right": "right", "down": "down", "rotate": "up"},
+    ],
+}
+
+
+def load_controls(path):
+    """키 설정 파일(JSON)을 읽어 옴, 파일이 없으면 기본값 사용
+
+    키 이름은 pygame.key.name()과 같은 형식입니다 ("a", "left", "space" 등).
+    """
+    controls = dict(DEFAULT_CONTROLS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            controls.update(json.load(f))
+
+    controls["players"] = [
+        {action: pygame.key.key_code(name) for action, name in bindings.items()}
+        for bindings in controls["players"]
+    ]
+    return controls
+
+
+def event_clock(event):
+    """이벤트가 일어난 시각 (time.perf_counter() 기준 초)
+
+    pygame-ce처럼 이벤트에 SDL 시각(timestamp, pygame.time.get_ticks()와 같은 ms 시계)이 있으면 그것을 쓰고,
+    없으면 이벤트를 꺼낸 지금 시각을 씀
+    """
+    now = time.perf_counter()
+    timestamp = getattr(event, "timestamp", None)
+    if timestamp is None:
+        return now
+    return now - max(0, pygame.time.get_ticks() - timestamp) / 1000
+
+
+class PlayerInput:
+    def __init__(self, bindings, das=170, arr=50):
+        self.key_to_action = {key: action for action, key in bindings.items()}
+        self.das = das
+        self.arr = max(1, arr)
+        self.queue = deque()  # (시각 ms, 동작, 눌림 여부)
+        self.held = {}        # 동작 -> 다음 자동 반복 시각 ms
+        self.directions = []  # 누르고 있는 좌우 방향, 마지막에 누른 것이 맨 뒤
+
+    def push(self, event, now):
+        """pygame 이벤트를 시각(now, ms)과 함께 큐에 저장"""
+        if event.type not in (pygame.KEYDOWN, pygame.KEYUP):
+            return
+        action = self.key_to_action.get(event.key)
+        if action is not None:
+            self.queue.append((now, action, event.type == pygame.KEYDOWN))
+
+    def clear(self):
+        """쌓인 입력과 누르고 있던 키를 모두 잊음 (재시작, 게임 오버)"""
+        self.queue.clear()
+        self.held.clear()
+        self.directions.clear()
+
+    def poll(self, now):
+        """now(ms)까지 처리해야 할 동작들을 순서대로 반환"""
+        actions = []
+        queue = self.queue
+        held = self.held
+        directions = self.directions
+
+        while queue and queue[0][0] <= now:
+            t, action, pressed = queue.popleft()
+            if pressed:
+                actions.append(action)
+                if action in REPEATABLE:
+                    held[action] = t + self.das
+                if action in OPPOSITE:
+                    # 반대 방향을 누르면 마지막에 누른 방향만 반복
+                    held.pop(OPPOSITE[action], None)
+                    if action in directions:
+                        directions.remove(action)
+                    directions.append(action)
+            else:
+                held.pop(action, None)
+                if action in directions:
+                    resume = directions[-1] == action
+                    directions.remove(action)
+                    # 나중에 누른 방향을 떼면 아직 누르고 있는 방향이 DAS부터 다시 반복
+                    if resume and directions:
+                        held[directions[-1]] = t + self.das
+
+        for action, next_time in held.items():
+            while next_time <= now:
+                actions.append(action)
+                next_time += self.arr
+            held[action] = next_time
+
+        return actions
@@ -0,0 +1,90 @@
+"""레벨별 낙하 속도(중력) 엔진
+
+속도는 G(1프레임 = 1/60초 동안 떨어지는 칸 수)로 나타냅니다.
+1G는 매 프레임 한 칸, 20G는 나타나자마자 바닥까지 떨어지는 속도입니다.
+떨어진 칸의 소수 부분은 버리지 않고 누적하므로, 프레임이 밀려서 step이
+몰려 와도 낙하 속도가 정확하게 유지됩니다.
+"""
+
+FRAME_HZ = 60
+MAX_G = 20  # 보드 높이만큼, 즉 즉시 바닥
+
+
+def guideline_table(max_level=20):
+    """테트리스 가이드라인의 레벨별 속도표 (마지막 레벨은 20G)
+
+    한 칸 떨어지는 데 걸리는 시간(초) = (0.8 - (레벨 - 1) * 0.007) ** (레벨 - 1)
+    """
+    table = []
+    for level in range(1, max_level):
+        seconds_per_row = (0.8 - (level - 1) * 0.007) ** (level - 1)
+        table.append(min(MAX_G, 1 / (seconds_per_row * FRAME_HZ)))
+    table.append(MAX_G)
+    return table
+
+
+def seconds_table(seconds_per_row):
+    """레벨별 한 칸 떨어지는 시간(초) 목록 -> G 속도표"""
+    return [min(MAX_G, 1 / (seconds * FRAME_HZ)) for seconds in seconds_per_row]
+
+
+LEVEL_TABLE = guideline_table()
+
+
+class Gravity:
+    def __init__(self, table=LEVEL_TABLE, lock_delay=0.5, soft_drop_factor=20, max_lock_resets=15):
+        self.table = table
+        self.lock_delay = lock_delay              # 바닥에 닿은 뒤 고정되기까지의 시간(초)
+        self.soft_drop_factor = soft_drop_factor  # 아래 키를 누르고 있을 때 속도 배수
+        self.max_lock_resets = max_lock_resets    # 바닥에서 움직여 고정을 미룰 수 있는 횟수
+        self.level = 1
+        self.soft_drop = False
+        self.reset()
+
+    def reset(self):
+        """새 블록이 나올 때 호출"""
+        self.progress = 0.0  # 아직 떨어지지 않은 칸 수(소수)
+        self.lock_timer = 0.0
+        self.lock_resets = 0
+        self.hard_drop = False  # lock_now 뒤에는 다음 update에서 고정될 때까지 움직일 수 없음
+
+    def cells_per_frame(self):
+        g = self.table[min(self.level, len(self.table)) - 1]
+        if self.soft_drop:
+            g *= self.soft_drop_factor
+        return min(g, MAX_G)
+
+    def on_move(self):
+        """바닥에 닿은 블록을 옆으로 옮기거나 돌렸을 때 고정 시간을 다시 셈 (횟수 제한, 하드 드롭 뒤에는 무시)"""
+        if self.hard_drop:
+            return
+        if self.lock_timer > 0 and self.lock_resets < self.max_lock_resets:
+            self.lock_timer = 0.0
+            self.lock_resets += 1
+
+    def lock_now(self):
+        """하드 드롭: 다음 update에서 바로 고정"""
+        self.hard_drop = True
+
+    def update(self, dt, distance):
+        """dt초 동안 떨어질 칸 수와 고정 여부를 반환
+
+        distance: 지금 위치에서 착지 위치까지 남은 칸 수
+        """
+        if self.hard_drop:
+            return distance, True
+
+        self.progress += self.cells_per_frame() * dt * FRAME_HZ
+        rows = int(self.progress)
+        if rows >= distance:
+            rows = distance
+            self.progress = 0.0  # 바닥에 닿았으면 남은 칸은 의미 없음
+        else:
+            self.progress -= rows
+
+        if distance - rows > 0:
+            self.lock_timer = 0.0
+            return rows, False
+
+        self.lock_timer += dt
+        return rows, self.lock_timer >= self.lock_delay
@@ -0,0 +1,78 @@
+"""열 높이 맵 (column height map)
+
+열마다 가장 위에 있는 블록의 행 번호(tops[x])를 기억해 둡니다. 블록이 고정되거나
+줄이 지워질 때만 바뀐 만큼 갱신하므로, 착지 위치(고스트 블록, 하드 드롭)를
+보드 전체를 훑지 않고 블록 폭만큼만 보고 바로 계산할 수 있습니다.
+"""
+
+
+def shape_cells(shape, x, y):
+    """2차원 모양 배열에서 블록이 차지한 (x, y) 칸 목록"""
+    return [(x + col, y + row)
+            for row, line in enumerate(shape)
+            for col, cell in enumerate(line) if cell]
+
+
+class HeightMap:
+    def __init__(self, grid, empty=0):
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.empty = empty
+        self.rebuild(grid)
+
+    def _scan(self, grid, x, start):
+        """x열에서 start행부터 아래로 내려가며 처음 만나는 블록의 행 번호"""
+        empty = self.empty
+        for y in range(max(0, start), self.rows):
+            if grid[y][x] != empty:
+                return y
+        return self.rows
+
+    def rebuild(self, grid):
+        """보드 전체를 다시 훑어서 새로 만듦 (새 게임 등)"""
+        self.tops = [self._scan(grid, x, 0) for x in range(self.cols)]
+
+    def lock(self, cells):
+        """고정된 블록 칸들을 반영"""
+        tops = self.tops
+        for x, y in cells:
+            if 0 <= y < tops[x]:
+                tops[x] = y
+
+    def clear_rows(self, grid, count):
+        """줄 count개가 지워진 뒤(grid는 정리된 보드)의 높이로 갱신
+
+        지워진 줄은 모든 열이 차 있으므로 열의 맨 위 블록보다 아래에 있습니다.
+        따라서 맨 위 블록 위쪽은 줄이 지워진 뒤에도 비어 있고, 그 아래만 확인하면 됩니다.
+        """
+        if count <= 0:
+            return
+        self.tops = [self._scan(grid, x, top + count) for x, top in enumerate(self.tops)]
+
+    def raise_rows(self, grid, count):
+        """아래에서 방해 줄 count개가 올라온 뒤(grid는 새 보드)의 높이로 갱신"""
+        if count <= 0:
+            return
+        self.tops = [self._scan(grid, x, min(top, self.rows) - count)
+                     for x, top in enumerate(self.tops)]
+
+    def drop_distance(self, cells):
+        """블록(cells)이 아래로 떨어질 수 있는 칸 수
+
+        블록이 이미 다른 블록 아래(처마 밑)로 들어가 있어서 높이 맵만으로는 알 수 없으면
+        None을 반환합니다. 이때는 한 칸씩 충돌 검사를 해야 합니다.
+        """
+        lowest = {}
+        for x, y in cells:
+            if y > lowest.get(x, -self.rows):
+                lowest[x] = y
+
+        tops = self.tops
+        distance = self.rows
+        for x, y in lowest.items():
+            d = tops[x] - 1 - y
+            if d < 0:
+                return None
+            if d < distance:
+                distance = d
+        return distance
@@ -0,0 +1,88 @@
+"""고정 시간 간격(fixed timestep) 게임 루프
+
+화면 주사율(FPS)과 상관없이 게임 로직은 항상 같은 간격(step)으로 진행됩니다.
+
+    loop = FixedStepLoop(step_hz=60, max_fps=FPS)
+    while running:
+        handle_events()
+        for _ in range(loop.advance()):
+            update(loop.step)        # 항상 1/60초씩 진행
+        draw()
+        pygame.display.flip()
+        loop.idle()                  # 남은 시간만큼 잠자기 (CPU를 태우지 않음)
+"""
+import asyncio
+import time
+
+
+class FixedStepLoop:
+    def __init__(self, step_hz=60, max_fps=60, max_frame_time=0.25):
+        self.step = 1.0 / step_hz
+        self.min_frame_time = 1.0 / max_fps if max_fps else 0.0
+        # 창을 끌거나 멈췄다가 돌아왔을 때 수백 step을 한꺼번에 돌리지 않도록 제한
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.sim_time = 0.0
+        self.frame_start = time.perf_counter()
+
+    def reset(self):
+        """누적 시간을 비움 (게임 재시작, 일시정지 해제 등)"""
+        self.accumulator = 0.0
+        self.frame_start = time.perf_counter()
+
+    def advance(self):
+        """지난 프레임 이후 흐른 시간을 누적하고, 이번 프레임에 돌릴 step 수를 반환"""
+        now = time.perf_counter()
+        frame_time = min(now - self.frame_start, self.max_frame_time)
+        self.frame_start = now
+        self.accumulator += frame_time
+
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        self.sim_time += steps * self.step
+        return steps
+
+    def to_sim_time(self, seconds):
+        """time.perf_counter() 시각 -> 게임 시각(sim_time과 같은 기준, 초)
+
+        advance() 직후 frame_start 시각의 게임 시각은 sim_time + accumulator이므로 그 뒤로 흐른 만큼 더함
+        """
+        return self.sim_time + self.accumulator + (seconds - self.frame_start)
+
+    def remaining(self):
+        """이번 프레임이 max_fps를 넘지 않도록 더 기다려야 하는 시간(초)"""
+        elapsed = time.perf_counter() - self.frame_start
+        return max(0.0, self.min_frame_time - elapsed)
+
+    def idle(self):
+        """남은 프레임 시간만큼 잠자기 (busy-wait 없음)"""
+        delay = self.remaining()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def idle_async(self):
+        """idle()의 asyncio 버전 (웹(Emscripten) 빌드에서는 반드시 양보해야 함)"""
+        await asyncio.sleep(self.remaining())
+
+
+class Interval:
+    """일정 주기마다 발생하는 이벤트 (자동 낙하, 카운트다운 등)
+
+    남는 시간을 버리지 않으므로 step 크기와 상관없이 주기가 정확하게 유지됩니다.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.elapsed = 0.0
+
+    def reset(self):
+        self.elapsed = 0.0
+
+    def tick(self, dt):
+        """dt초를 더하고, 그 사이에 몇 번의 주기가 지났는지 반환"""
+        self.elapsed += dt
+        if self.elapsed < self.period:
+            return 0
+        count = int(self.elapsed / self.period)
+        self.elapsed -= count * self.period
+        return count